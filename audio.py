@@ -0,0 +1,447 @@
+import os
+import sys
+import wave
+import time
+import queue
+import array
+import shutil
+import threading
+import subprocess as sub
+
+# system sounds (the boot chime, the exit sound...)
+#
+# wavs are decoded once into a pcm cache in one fixed format (16 bit stereo
+# 44.1k) and played by a single mixer thread that lives for the whole session.
+# play() just drops the clip on the mixer's queue, so overlapping sounds get
+# mixed instead of fighting over the device, and it returns the clip's length
+# so callers (exit) know how long they'd have to wait.
+#
+# the mixer writes to a sink: sounddevice (in requirements.txt) if it works,
+# else aplay/pacat/pw-cat on a pipe, else nothing at all (everything still
+# works, just silent, and you get told so once).
+# NullSink and FileSink are there to run it headless.
+
+RATE = 44100
+CHANNELS = 2
+WIDTH = 2  # bytes per sample
+FRAME = CHANNELS * WIDTH
+BLOCK_FRAMES = 1024  # ~23 ms per mixer step
+IDLE_CLOSE = 3.0  # seconds of silence before the sink lets go of the device
+
+
+class Clip:
+    __slots__ = ("name", "pcm", "frames")
+
+    def __init__(self, name, pcm):
+        self.name = name
+        self.pcm = pcm  # bytes, native-endian int16, RATE/CHANNELS
+        self.frames = len(pcm) // FRAME
+
+    @property
+    def duration(self):
+        return self.frames / RATE
+
+
+def _to_int16(raw, sampwidth):
+    if sampwidth == 2:
+        samples = array.array("h", raw)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return samples
+    if sampwidth == 1:
+        # 8 bit wavs are unsigned
+        return array.array("h", ((b - 128) << 8 for b in raw))
+    if sampwidth == 4:
+        wide = array.array("i", raw)
+        if sys.byteorder == "big":
+            wide.byteswap()
+        return array.array("h", (s >> 16 for s in wide))
+    raise ValueError(f"{sampwidth * 8} bit wavs aren't supported")
+
+
+def decode(path):
+    """
+    Reads a wav into a Clip in the mixer's format (stereo, RATE, int16).
+    """
+    with wave.open(path, "rb") as w:
+        channels, sampwidth, rate, nframes = w.getnchannels(), w.getsampwidth(), w.getframerate(), w.getnframes()
+        samples = _to_int16(w.readframes(nframes), sampwidth)
+    if channels == 1:
+        stereo = array.array("h", bytes(len(samples) * 2 * WIDTH))
+        stereo[0::2] = samples
+        stereo[1::2] = samples
+        samples = stereo
+    elif channels != 2:
+        # keep the first two
+        samples = array.array("h", (s for i, s in enumerate(samples) if i % channels < 2))
+    if rate != RATE:
+        # nearest sample is plenty for beeps and chimes
+        frames = len(samples) // 2
+        out = array.array("h", bytes(int(frames * RATE / rate) * FRAME))
+        for i in range(len(out) // 2):
+            j = int(i * rate / RATE) * 2
+            out[2 * i] = samples[j]
+            out[2 * i + 1] = samples[j + 1]
+        samples = out
+    return Clip(os.path.basename(path), samples.tobytes())
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load(path):
+    """
+    The decoded Clip for path, decoded again only if the file changed.
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    clip = decode(key)
+    with _cache_lock:
+        _cache[key] = (stamp, clip)
+    return clip
+
+
+# ---sinks
+#
+# write(pcm) may block, that's what paces the mixer. close() is called after
+# a while of silence and at shutdown; the next write opens it again.
+
+
+class NullSink:
+    """
+    Swallows everything. pace=True makes it take as long as real playback would.
+    """
+
+    def __init__(self, pace=False):
+        self.pace = pace
+        self.frames = 0
+
+    def write(self, pcm):
+        self.frames += len(pcm) // FRAME
+        if self.pace:
+            time.sleep(len(pcm) / FRAME / RATE)
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """
+    Writes what would have been played into a wav file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.out = None
+
+    def write(self, pcm):
+        if self.out is None:
+            self.out = wave.open(self.path, "wb")
+            self.out.setnchannels(CHANNELS)
+            self.out.setsampwidth(WIDTH)
+            self.out.setframerate(RATE)
+        self.out.writeframes(pcm if sys.byteorder == "little" else _swapped(pcm))
+
+    def close(self):
+        if self.out is not None:
+            self.out.close()
+            self.out = None
+
+
+def _swapped(pcm):
+    samples = array.array("h", pcm)
+    samples.byteswap()
+    return samples.tobytes()
+
+
+class PipeSink:
+    """
+    Raw pcm into a player's stdin (aplay and friends).
+    """
+
+    def __init__(self, argv):
+        self.argv = argv
+        self.proc = None
+
+    def write(self, pcm):
+        if self.proc is None or self.proc.poll() is not None:
+            # own session, ctrl-c at the prompt shouldn't kill the sound
+            self.proc = sub.Popen(self.argv, stdin=sub.PIPE, stdout=sub.DEVNULL, stderr=sub.DEVNULL, start_new_session=True)
+        try:
+            self.proc.stdin.write(pcm if sys.byteorder == "little" else _swapped(pcm))
+        except (BrokenPipeError, OSError):
+            self.proc = None
+
+    def close(self):
+        if self.proc is not None:
+            # the player finishes what it already has and exits on its own
+            try:
+                self.proc.stdin.close()
+            except OSError:
+                pass
+            self.proc = None
+
+
+class SoundDeviceSink:
+    def __init__(self, sounddevice):
+        self.sd = sounddevice
+        self.stream = None
+
+    def write(self, pcm):
+        if self.stream is None:
+            self.stream = self.sd.RawOutputStream(samplerate=RATE, channels=CHANNELS, dtype="int16")
+            self.stream.start()
+        self.stream.write(pcm)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+def default_sink():
+    """
+    The best sink this machine has, None when there's no way to make sound.
+    YAY_AUDIO_OUT=some.wav sends everything to that file instead.
+    """
+    if os.environ.get("YAY_AUDIO_OUT"):
+        return FileSink(os.environ["YAY_AUDIO_OUT"])
+    try:
+        import sounddevice
+
+        return SoundDeviceSink(sounddevice)
+    except (ImportError, OSError):
+        pass
+    raw = {
+        "aplay": ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-r", str(RATE), "-c", str(CHANNELS)],
+        "pacat": ["pacat", "--raw", "--format=s16le", f"--rate={RATE}", f"--channels={CHANNELS}"],
+        "pw-cat": ["pw-cat", "--playback", "--format=s16", f"--rate={RATE}", f"--channels={CHANNELS}", "-"],
+    }
+    for name, argv in raw.items():
+        if shutil.which(name):
+            return PipeSink(argv)
+    global _warned
+    if not _warned:
+        _warned = True
+        print("yay: no way to play sound here (pip install sounddevice, or install aplay/pacat/pw-cat), staying quiet", file=sys.stderr)
+    return None
+
+
+_warned = False  # told the user there's no sound, once is enough
+
+
+# ---mixer
+
+_numpy = False
+
+
+def _np():
+    # numpy is optional and slow to import, only bother once two sounds overlap
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def _mix(chunks):
+    if len(chunks) == 1:
+        return chunks[0]
+    size = max(len(c) for c in chunks)
+    numpy = _np()
+    if numpy is not None:
+        acc = numpy.zeros(size // WIDTH, dtype=numpy.int32)
+        for c in chunks:
+            acc[:len(c) // WIDTH] += numpy.frombuffer(c, dtype=numpy.int16)
+        return numpy.clip(acc, -32768, 32767).astype(numpy.int16).tobytes()
+    acc = [0] * (size // WIDTH)
+    for c in chunks:
+        for i, s in enumerate(array.array("h", c)):
+            acc[i] += s
+    return array.array("h", (-32768 if s < -32768 else 32767 if s > 32767 else s for s in acc)).tobytes()
+
+
+class ClipVoice:
+    """
+    A decoded Clip being played. Anything with read(nbytes) can be a voice:
+    it returns the next nbytes of pcm, less (or b"") once it's done.
+    """
+
+    __slots__ = ("clip", "pos")
+
+    def __init__(self, clip):
+        self.clip = clip
+        self.pos = 0
+
+    def read(self, nbytes):
+        data = self.clip.pcm[self.pos:self.pos + nbytes]
+        self.pos += len(data)
+        return data
+
+
+class Mixer:
+    """
+    One thread, one queue. play() never blocks on the device.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.queue = queue.Queue()
+        self.voices = []
+        self.busy = 0  # voices queued or still playing
+        self.done = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="yay-audio", daemon=True)
+        self.thread.start()
+
+    def play(self, voice):
+        with self.done:
+            self.busy += 1
+        self.queue.put(voice)
+
+    def wait(self, timeout=None):
+        """
+        Waits until everything queued has been handed to the sink. True if it got there.
+        """
+        with self.done:
+            return self.done.wait_for(lambda: self.busy == 0, timeout)
+
+    def _run(self):
+        step = BLOCK_FRAMES * FRAME
+        while True:
+            if not self.voices:
+                try:
+                    voice = self.queue.get(timeout=IDLE_CLOSE)
+                except queue.Empty:
+                    self.sink.close()
+                    voice = self.queue.get()
+                if voice is None:
+                    break
+                self.voices.append(voice)
+            while True:
+                try:
+                    voice = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if voice is None:
+                    self.voices.clear()
+                    self.sink.close()
+                    return
+                self.voices.append(voice)
+
+            chunks = []
+            finished = []
+            for voice in self.voices:
+                try:
+                    data = voice.read(step)
+                except Exception:
+                    data = b""
+                if data:
+                    chunks.append(data)
+                if len(data) < step:
+                    finished.append(voice)
+            if chunks:
+                try:
+                    self.sink.write(_mix(chunks))
+                except Exception:
+                    # a broken device shouldn't take the shell down, drop what's playing
+                    finished = self.voices
+            if finished:
+                self.voices = [v for v in self.voices if v not in finished]
+                with self.done:
+                    self.busy -= len(finished)
+                    self.done.notify_all()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join(1)
+
+
+class Engine:
+    def __init__(self, sink=None):
+        self.sink = sink if sink is not None else default_sink()
+        self.mixer = Mixer(self.sink) if self.sink is not None else None
+        # when will the last thing we started be over (monotonic)
+        self.until = 0.0
+
+    @property
+    def available(self):
+        return self.mixer is not None
+
+    def preload(self, *paths):
+        for path in paths:
+            try:
+                load(path)
+            except (OSError, EOFError, ValueError, wave.Error):
+                pass
+
+    def play(self, path):
+        """
+        Starts playing path and returns its length in seconds. 0 when there's
+        no sound to play (no sink, missing or broken file).
+        """
+        if self.mixer is None:
+            return 0.0
+        try:
+            clip = load(path)
+        except (OSError, EOFError, ValueError, wave.Error):
+            return 0.0
+        self.mixer.play(ClipVoice(clip))
+        self.until = max(self.until, time.monotonic() + clip.duration)
+        return clip.duration
+
+    def stream(self, voice):
+        """
+        Hands a streaming voice (see ClipVoice) to the mixer. False without a sink.
+        """
+        if self.mixer is None:
+            return False
+        self.mixer.play(voice)
+        return True
+
+    def remaining(self):
+        return max(0.0, self.until - time.monotonic())
+
+    def wait(self, timeout=None):
+        """
+        Waits for what's playing to finish, at most timeout seconds.
+        """
+        if self.mixer is None:
+            return
+        if self.remaining() <= 0:
+            return
+        # a little slack: the sink may have started late
+        left = self.remaining() + 0.25
+        self.mixer.wait(left if timeout is None else min(timeout, left))
+
+    def close(self):
+        if self.mixer is not None:
+            self.mixer.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def engine():
+    """
+    The session's engine, created (and the sink picked) on first use.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = Engine()
+    return _engine
+
+
+def play(path):
+    return engine().play(path)
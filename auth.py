@@ -0,0 +1,164 @@
+import os
+import hmac
+import time
+import math
+import hashlib
+import threading
+
+# password stuff for the login
+#
+# the bcrypt cost is picked per host: calibrate() times a cheap hash and
+# works out which cost lands closest to the target verify latency (each +1
+# doubles the work). the cost is part of the bcrypt hash itself ($2b$12$...),
+# so a hash made on a fast server and copied to a slow VM gets noticed and
+# redone at the local cost on the next good login.
+
+DEFAULT_TARGET_MS = 250
+MIN_COST = 10  # never go below this, whatever the host
+MAX_COST = 16
+PROBE_COST = 8
+
+
+def _bcrypt():
+    import bcrypt
+
+    return bcrypt
+
+
+def calibrate(target_ms=DEFAULT_TARGET_MS):
+    """
+    The bcrypt cost whose verify time on this host is closest to target_ms.
+    """
+    bcrypt = _bcrypt()
+    salt = bcrypt.gensalt(PROBE_COST)
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        bcrypt.hashpw(b"calibrating yaylinux", salt)
+        best = min(best, time.perf_counter() - t0)
+    cost = PROBE_COST + round(math.log2(max(target_ms / 1000.0, 1e-6) / max(best, 1e-6)))
+    return max(MIN_COST, min(MAX_COST, cost))
+
+
+def cost_of(hashed):
+    """
+    The cost baked into a bcrypt hash, None if it doesn't look like one.
+    """
+    try:
+        return int(hashed.split(b"$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def hash_password(password, cost):
+    bcrypt = _bcrypt()
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(cost))
+
+
+def check_password(password, hashed):
+    return _bcrypt().checkpw(password.encode('utf-8'), hashed)
+
+
+def needs_rehash(hashed, cost):
+    return cost is not None and cost_of(hashed) != cost
+
+
+class Verifier(threading.Thread):
+    """
+    checkpw on a thread, so the rest of startup runs while bcrypt grinds.
+    join() then look at .ok.
+    """
+
+    def __init__(self, password, hashed):
+        super().__init__(name="yay-login", daemon=True)
+        self.password = password
+        self.hashed = hashed
+        self.ok = False
+        self.error = None
+
+    def run(self):
+        try:
+            self.ok = check_password(self.password, self.hashed)
+        except Exception as e:
+            self.error = e
+
+
+# ---unlock tokens
+#
+# after a good login we can leave a token behind that lets the next launch
+# within ttl seconds skip bcrypt. it lives in a 0700 directory, is 0600 and
+# must be owned by us, and it's an HMAC keyed on the stored password hash,
+# so changing the password kills every token.
+
+def token_dir():
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "yaylinux")
+
+
+def token_path(user):
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in user) or "user"
+    return os.path.join(token_dir(), f"unlock-{safe}")
+
+
+def _sign(hashed, user, expires):
+    return hmac.new(hashed, f"{user}:{expires}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def tokens_supported():
+    return hasattr(os, "getuid")
+
+
+def issue_token(hashed, user, ttl):
+    if not tokens_supported() or ttl <= 0:
+        return None
+    directory = token_dir()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.chmod(directory, 0o700)
+    expires = int(time.time() + ttl)
+    path = token_path(user)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        os.write(fd, f"{expires} {_sign(hashed, user, expires)}\n".encode())
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+    return path
+
+
+def check_token(hashed, user):
+    """
+    True if there's a valid, unexpired, properly protected unlock token for user.
+    """
+    if not tokens_supported():
+        return False
+    path = token_path(user)
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    except OSError:
+        return False
+    try:
+        st = os.fstat(fd)
+        import stat
+
+        if not stat.S_ISREG(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+            return False
+        dir_st = os.stat(os.path.dirname(path))
+        if dir_st.st_uid != os.getuid() or dir_st.st_mode & 0o077:
+            return False
+        expires, _, signature = os.read(fd, 256).decode('ascii', 'replace').strip().partition(" ")
+    finally:
+        os.close(fd)
+    try:
+        if int(expires) < time.time():
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(signature, _sign(hashed, user, int(expires)))
+
+
+def revoke_token(user):
+    try:
+        os.remove(token_path(user))
+    except OSError:
+        pass
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import argparse
+import subprocess as sub
+
+# spawn vs coproc: how long does a trivial command take through each backend
+#
+#   python benchmarks/backends.py -n 5000
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import coproc  # noqa: E402
+
+
+def bench_spawn(command, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        sub.run(command, shell=True, capture_output=True)
+    return time.perf_counter() - t0
+
+
+def bench_coproc(command, n):
+    shell = coproc.ShellCoprocess()
+    shell.run(":")  # start-up is paid once per session, keep it out of the loop
+    t0 = time.perf_counter()
+    for _ in range(n):
+        shell.run(command)
+    took = time.perf_counter() - t0
+    shell.close()
+    return took
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare the spawn and coproc command backends")
+    parser.add_argument("-n", type=int, default=2000, help="commands per backend (default 2000)")
+    parser.add_argument("--command", default="echo hi", help="the command to run (default: echo hi)")
+    args = parser.parse_args()
+
+    results = {}
+    for name, bench in (("spawn", bench_spawn), ("coproc", bench_coproc)):
+        took = bench(args.command, args.n)
+        results[name] = took
+        print(f"{name:>7}: {args.n} x {args.command!r} in {took:.3f} s = {took / args.n * 1e6:9.1f} us/command")
+    print(f"coproc is {results['spawn'] / results['coproc']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,520 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import select
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess as sub
+
+# the benchmark suite: startup, command dispatch, subprocess overhead, ls,
+# littu and bcrypt, all headless
+#
+#   python benchmarks/suite.py                          everything, table on stdout
+#   python benchmarks/suite.py -o now.json              ...and the results as json
+#   python benchmarks/suite.py --baseline base.json     compare, exit 1 on a regression
+#   python benchmarks/suite.py --only ls,littu --full   some of it, with the big sizes
+#
+# a baseline is just the -o file of an earlier run (on the same machine,
+# numbers from different boxes don't compare). every result has a "value"
+# (the median, or a throughput) and says whether lower or higher is better;
+# it counts as a regression when it got worse by more than --threshold
+# percent.
+#
+# everything runs against a throwaway config/cache dir in --workdir, your
+# real yay setup is never touched.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+LS_SIZES = (10**3, 10**4, 10**5)
+LS_SIZES_FULL = LS_SIZES + (10**6,)
+LITTU_SIZES = (1024, 1024**2, 16 * 1024**2)
+LITTU_SIZES_FULL = LITTU_SIZES + (256 * 1024**2,)
+BENCH_PASSWORD = "yay bench"
+
+sys.path.insert(0, ROOT)
+
+
+class Suite:
+    def __init__(self, workdir, repeat, full=False, bcrypt_cost=None):
+        self.workdir = workdir
+        self.repeat = repeat
+        self.full = full
+        self.bcrypt_cost = bcrypt_cost
+        self.results = {}
+        # progress goes here even while quiet() swallows stdout/stderr
+        self.log = sys.stderr
+
+    def measure(self, func, loops=1, repeat=None, budget=10.0, setup=None, **extra):
+        """
+        Times func (loops calls per sample) and gives the per call
+        median/min/p95 in seconds. Stops early once budget seconds are spent
+        (after 3 samples at least), so the big cases don't take all day.
+        """
+        import stats
+
+        samples = []
+        spent = 0.0
+        for _ in range(repeat or self.repeat):
+            if setup is not None:
+                setup()
+            t0 = time.perf_counter()
+            for _ in range(loops):
+                func()
+            took = time.perf_counter() - t0
+            spent += took
+            samples.append(took / loops)
+            if spent > budget and len(samples) >= 3:
+                break
+        samples.sort()
+        result = {
+            "value": stats.percentile(samples, 50),
+            "unit": "s",
+            "better": "lower",
+            "min": samples[0],
+            "p95": stats.percentile(samples, 95),
+            "samples": len(samples),
+            "loops": loops,
+        }
+        result.update(extra)
+        return result
+
+    def time(self, name, func, **kw):
+        return self.record(name, self.measure(func, **kw))
+
+    def throughput(self, name, nbytes, func, **kw):
+        result = self.measure(func, **kw)
+        result.update(value=nbytes / result["value"] / 1e6, unit="MB/s", better="higher", seconds=result["value"], bytes=nbytes)
+        return self.record(name, result)
+
+    def record(self, name, result):
+        self.results[name] = result
+        print(f"  {name:<40} {fmt_result(result)}", file=self.log)
+        return result
+
+    def skip(self, name, why):
+        self.results[name] = {"skipped": why}
+        print(f"  {name:<40} skipped: {why}", file=self.log)
+
+
+def fmt_result(result):
+    if "skipped" in result:
+        return "skipped"
+    if result["unit"] == "s":
+        seconds = result["value"]
+        if seconds < 1e-3:
+            return f"{seconds * 1e6:10.1f} us"
+        if seconds < 1:
+            return f"{seconds * 1e3:10.2f} ms"
+        return f"{seconds:10.3f} s"
+    return f"{result['value']:10.1f} {result['unit']}"
+
+
+def env_for(workdir, name):
+    """
+    Environment for a yay started by the benchmarks: own config, cache and
+    audio output under workdir/name.
+    """
+    home = os.path.join(workdir, name)
+    os.makedirs(home, exist_ok=True)
+    env = dict(os.environ)
+    env.update(
+        YAY_CONFIG_DIR=os.path.join(home, "config"),
+        XDG_CACHE_HOME=os.path.join(home, "cache"),
+        XDG_RUNTIME_DIR=home,
+        YAY_AUDIO_OUT=os.path.join(home, "out.wav"),
+    )
+    env.pop("YAY_PASSWORD", None)
+    return env
+
+
+@contextlib.contextmanager
+def quiet():
+    # builtins print, externals get pumped into sys.stdout: all of it goes nowhere
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null), contextlib.redirect_stderr(null):
+        yield
+
+
+# ---startup
+
+
+def bench_startup(suite):
+    env = env_for(suite.workdir, "startup-batch")
+    suite.time("startup.interpreter", lambda: sub.run([sys.executable, "-c", "pass"], env=env), repeat=20)
+    # nobody set up yet, so batch mode needs no password: pure start, run, exit
+    suite.time(
+        "startup.batch",
+        lambda: sub.run([sys.executable, MAIN, "-c", ":"], env=env, stdout=sub.DEVNULL, cwd=ROOT),
+        repeat=20,
+    )
+    try:
+        import auth
+
+        hashed = auth.hash_password(BENCH_PASSWORD, auth.MIN_COST).decode("ascii")
+    except ImportError:
+        suite.skip("startup.time_to_prompt", "bcrypt is not installed")
+        return
+    if not hasattr(os, "openpty"):
+        suite.skip("startup.time_to_prompt", "needs a pty")
+        return
+    env = env_for(suite.workdir, "startup-prompt")
+    setup_user(env, hashed)
+    samples = []
+    for _ in range(min(suite.repeat, 10)):
+        took = time_to_prompt(env)
+        if took is None:
+            suite.skip("startup.time_to_prompt", "the shell never reached its prompt")
+            return
+        samples.append(took)
+    samples.sort()
+    import stats
+
+    suite.record(
+        "startup.time_to_prompt",
+        {
+            "value": stats.percentile(samples, 50),
+            "unit": "s",
+            "better": "lower",
+            "min": samples[0],
+            "p95": stats.percentile(samples, 95),
+            "samples": len(samples),
+        },
+    )
+
+
+def setup_user(env, hashed):
+    # through a child with the bench env, the config path is decided at import
+    code = (
+        "import platform, config, auth\n"
+        "s = config.store()\n"
+        f"s.update(user='bench', hostname='bench', password={hashed!r})\n"
+        "with s.edit() as data:\n"
+        "    data['state'].update(bcrypt_cost=auth.MIN_COST, bcrypt_host=platform.node())\n"
+    )
+    sub.run([sys.executable, "-c", code], env=env, cwd=ROOT, check=True)
+
+
+def time_to_prompt(env, timeout=30):
+    """
+    Starts the interactive shell on a pty with fast boot, types the password
+    and reads the time-to-prompt it reports (the typing is already taken
+    out of that number). Seconds, None if it never got there.
+    """
+    master, slave = os.openpty()
+    proc = sub.Popen(
+        [sys.executable, MAIN, "-i", "--fast"],
+        stdin=slave,
+        stdout=slave,
+        stderr=slave,
+        env=env,
+        cwd=ROOT,
+        start_new_session=True,
+    )
+    os.close(slave)
+    seen = b""
+    answered = False
+    took = None
+    deadline = time.monotonic() + timeout
+    try:
+        while time.monotonic() < deadline:
+            ready, _, _ = select.select([master], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(master, 4096)
+            except OSError:
+                break
+            if not data:
+                break
+            seen += data
+            if not answered and b"password?" in seen:
+                os.write(master, BENCH_PASSWORD.encode() + b"\n")
+                answered = True
+            match = re.search(rb"time-to-prompt ([\d.]+) ms", seen)
+            if match:
+                took = float(match.group(1)) / 1000
+                os.write(master, b"exit --now\n")
+                break
+        proc.wait(5)
+    except sub.TimeoutExpired:
+        pass
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        os.close(master)
+    return took
+
+
+# ---dispatch and subprocess, in process
+
+
+def load_shell(workdir):
+    """
+    main.py as a module, pointed at a throwaway config, in batch mode so
+    nothing ever prompts.
+    """
+    env = env_for(workdir, "inprocess")
+    for key in ("YAY_CONFIG_DIR", "XDG_CACHE_HOME", "XDG_RUNTIME_DIR", "YAY_AUDIO_OUT"):
+        os.environ[key] = env[key]
+    import main
+
+    main.batch_mode = True
+    main.settings.clear()
+    main.settings["backend"] = "spawn"
+    # whatever the suite's stdin is, a pipe would push coproc commands back to spawn
+    main.shell.stdin = sub.DEVNULL
+    return main
+
+
+def bench_dispatch(suite):
+    main = load_shell(suite.workdir)
+    with quiet():
+        suite.time("dispatch.builtin", lambda: main.execute_command("whoamiyay"), loops=2000)
+        # the same through engine.Session.run, output captured
+        suite.time("dispatch.session_run", lambda: main.shell.run("whoamiyay"), loops=2000)
+        suite.time("dispatch.builtin_pipeline", lambda: main.execute_command("help | littu-encode"), loops=500)
+        suite.time("dispatch.not_found", lambda: main.execute_command("yay-bench-no-such-command"), loops=2000)
+        suite.time("dispatch.external_spawn", lambda: main.execute_command("true"), loops=50)
+        if main.runner.IS_WINDOWS:
+            return
+        import coproc
+
+        main.settings["backend"] = "coproc"
+        coproc.session().start()
+        try:
+            suite.time("dispatch.external_coproc", lambda: main.execute_command("true"), loops=200)
+        finally:
+            coproc.session().close()
+            main.settings["backend"] = "spawn"
+
+
+def bench_subprocess(suite):
+    main = load_shell(suite.workdir)
+    true = shutil.which("true") or "true"
+    raw = suite.time("subprocess.raw", lambda: sub.run([true]), loops=50)
+    with quiet():
+        direct = suite.time("subprocess.run_subprocess", lambda: main.run_subprocess("true"), loops=50)
+        suite.time("subprocess.run_subprocess_sh", lambda: main.run_subprocess("true && true"), loops=50)
+    # what the shell adds on top of a bare fork+exec+wait
+    suite.record(
+        "subprocess.overhead",
+        {"value": direct["value"] - raw["value"], "unit": "s", "better": "lower", "absolute": True},
+    )
+
+
+# ---ls
+
+
+def make_tree(workdir, count):
+    path = os.path.join(workdir, f"ls-{count}")
+    if os.path.isdir(path) and len(os.listdir(path)) == count:
+        return path
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    for i in range(count):
+        os.close(os.open(os.path.join(path, f"f{i:07d}"), os.O_CREAT | os.O_WRONLY, 0o644))
+    # old enough that listing.py trusts its mtime
+    past = time.time() - 60
+    os.utime(path, (past, past))
+    return path
+
+
+def bench_ls(suite):
+    import commands
+    import listing
+
+    def ls(argv):
+        with quiet():
+            commands.write_stream(listing.ls(argv))
+
+    for count in LS_SIZES_FULL if suite.full else LS_SIZES:
+        path = make_tree(suite.workdir, count)
+        suite.time(f"ls.cold.{count}", lambda: ls([path]), setup=listing.forget, entries=count)
+        ls([path])  # the cached scan from here on
+        suite.time(f"ls.warm.{count}", lambda: ls([path]), entries=count)
+        suite.time(f"ls.long.{count}", lambda: ls(["-l", path]), entries=count)
+
+
+# ---littu
+
+
+def fmt_size(n):
+    for unit in ("B", "K", "M", "G"):
+        if n < 1024 or unit == "G":
+            return f"{n}{unit}"
+        n //= 1024
+
+
+def bench_littu(suite):
+    import littu
+
+    for size in LITTU_SIZES_FULL if suite.full else LITTU_SIZES:
+        raw = os.path.join(suite.workdir, f"littu-{size}.bin")
+        encoded = raw + ".littu"
+        decoded = raw + ".out"
+        with open(raw, "wb") as f:
+            left = size
+            while left:
+                chunk = os.urandom(min(left, 1 << 20))
+                f.write(chunk)
+                left -= len(chunk)
+        loops = max(1, (1 << 20) // size)
+        suite.throughput(f"littu.encode.{fmt_size(size)}", size, lambda: littu.encode_file(raw, encoded), loops=loops)
+        suite.throughput(f"littu.decode.{fmt_size(size)}", size, lambda: littu.decode_file(encoded, decoded), loops=loops)
+        for path in (raw, encoded, decoded):
+            os.remove(path)
+
+
+# ---bcrypt
+
+
+def bench_bcrypt(suite):
+    import auth
+
+    try:
+        auth._bcrypt()
+    except ImportError:
+        suite.skip("bcrypt.hash", "bcrypt is not installed")
+        suite.skip("bcrypt.verify", "bcrypt is not installed")
+        return
+    cost = suite.bcrypt_cost or auth.MIN_COST
+    hashed = auth.hash_password(BENCH_PASSWORD, cost)
+    suite.time("bcrypt.hash", lambda: auth.hash_password(BENCH_PASSWORD, cost), repeat=min(suite.repeat, 10), cost=cost)
+    suite.time("bcrypt.verify", lambda: auth.check_password(BENCH_PASSWORD, hashed), repeat=min(suite.repeat, 10), cost=cost)
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "dispatch": bench_dispatch,
+    "subprocess": bench_subprocess,
+    "ls": bench_ls,
+    "littu": bench_littu,
+    "bcrypt": bench_bcrypt,
+}
+
+
+# ---results
+
+
+def machine():
+    import sysinfo
+
+    info = sysinfo.static()
+    try:
+        commit = sub.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "system": f"{info['system']} {info['kernel']} ({info['arch']})",
+        "distro": info["distro"],
+        "cpu": info["cpu"],
+        "cores": info["cores"],
+        "memory_total": info["memory_total"],
+        "commit": commit or None,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(baseline, current, threshold, groups=None):
+    """
+    Lines comparing current against baseline, plus the names that got
+    worse by more than threshold percent. groups limits which baseline
+    entries count as missing (for --only).
+    """
+    lines = [f"{'BENCHMARK':<40} {'BASELINE':>13} {'NOW':>13} {'CHANGE':>8}"]
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if "skipped" in now:
+            continue
+        if before is None or "skipped" in before:
+            lines.append(f"{name:<40} {'-':>13} {fmt_result(now)} {'new':>8}")
+            continue
+        if now.get("absolute"):
+            # a difference of two timings, a ratio of it is mostly noise
+            lines.append(f"{name:<40} {fmt_result(before)} {fmt_result(now)} {'':>8}")
+            continue
+        old, new = before["value"], now["value"]
+        if old <= 0 or new <= 0:
+            continue
+        # > 0 means worse, whichever way "better" points
+        worse = (new / old - 1) if now["better"] == "lower" else (old / new - 1)
+        flag = ""
+        if worse * 100 > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        elif -worse * 100 > threshold:
+            flag = "  faster"
+        lines.append(f"{name:<40} {fmt_result(before)} {fmt_result(now)} {worse * 100:+7.1f}%{flag}")
+    for name in baseline:
+        if groups is not None and name.split(".", 1)[0] not in groups:
+            continue
+        if name not in current and "skipped" not in baseline[name]:
+            lines.append(f"{name:<40} {fmt_result(baseline[name])} {'-':>13} {'gone':>8}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark the shell: startup, dispatch, subprocesses, ls, littu, bcrypt")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write the results here as json (- for stdout)")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against an earlier -o file, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=10.0, metavar="PCT", help="how much worse counts as a regression (default 10%%)")
+    parser.add_argument("--only", metavar="NAMES", help="comma separated: " + ",".join(BENCHMARKS))
+    parser.add_argument("-r", "--repeat", type=int, default=15, help="samples per benchmark (default 15)")
+    parser.add_argument("--full", action="store_true", help="add the big sizes: ls on 10^6 entries, littu on 256 MiB")
+    parser.add_argument("--bcrypt-cost", type=int, metavar="N", help="bcrypt cost to measure (default: auth.MIN_COST)")
+    parser.add_argument("--workdir", metavar="DIR", help="scratch space (default: a temp dir, removed afterwards)")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmark: " + ", ".join(unknown))
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"can't read the baseline {args.baseline}: {e}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="yaybench-")
+    os.makedirs(workdir, exist_ok=True)
+    suite = Suite(workdir, args.repeat, full=args.full, bcrypt_cost=args.bcrypt_cost)
+    try:
+        for name in names:
+            print(f"{name}:", file=sys.stderr)
+            BENCHMARKS[name](suite)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"machine": machine(), "threshold": args.threshold, "results": suite.results}
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline is None:
+        return 0
+    lines, regressions = compare(baseline, suite.results, args.threshold, set(names))
+    # stdout might be busy with the json
+    out = sys.stderr if args.output == "-" else sys.stdout
+    print("\n".join(lines), file=out)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:g}%: " + ", ".join(regressions), file=out)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
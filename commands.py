@@ -0,0 +1,396 @@
+import io
+import os
+import glob
+import shlex
+import sys
+import time
+import importlib.util
+from contextlib import contextmanager
+
+import runner
+
+# the command table for YAYLinux
+#
+# builtins register themselves here and execute_command looks the first word
+# up in one dict instead of walking an if/elif chain. site specific builtins
+# can live in their own files:
+#
+#   from commands import command
+#
+#   @command("hello", help="Say hi", usage="hello [name]")
+#   def hello(argv):
+#       print("hi", *argv)
+#
+# and get picked up with load_plugins("some/dir") (or plugins_dir= in yay.conf)
+
+
+class Command:
+    __slots__ = ("name", "func", "help", "usage", "aliases", "hidden", "stream")
+
+    def __init__(self, name, func, help="", usage="", aliases=(), hidden=False, stream=False):
+        self.name = name
+        self.func = func
+        self.help = help
+        self.usage = usage or name
+        self.aliases = tuple(aliases)
+        self.hidden = hidden
+        # stream builtins are generators: func(argv, stdin) yields lines/bytes
+        # and can sit anywhere in a pipeline (see pipeline.py)
+        self.stream = stream
+
+
+# name (and alias) -> Command, in registration order
+COMMANDS = {}
+_tracers = []
+
+
+def register(name, func, help="", usage="", aliases=(), hidden=False, stream=False):
+    """
+    Adds (or replaces) a builtin. func gets the argument list and returns an exit code (None = 0).
+    With stream=True func(argv, stdin) is a generator instead, stdin being an
+    iterator of bytes (None when it's the first thing on the line).
+    """
+    cmd = Command(name, func, help=help, usage=usage, aliases=aliases, hidden=hidden, stream=stream)
+    COMMANDS[name] = cmd
+    for alias in cmd.aliases:
+        COMMANDS[alias] = cmd
+    return cmd
+
+
+def command(name, help="", usage="", aliases=(), hidden=False, stream=False):
+    """
+    Decorator version of register().
+    """
+    def deco(func):
+        register(name, func, help=help, usage=usage, aliases=aliases, hidden=hidden, stream=stream)
+        return func
+
+    return deco
+
+
+def unregister(name):
+    cmd = COMMANDS.pop(name, None)
+    if cmd is not None:
+        for key in [k for k, v in COMMANDS.items() if v is cmd]:
+            del COMMANDS[key]
+    return cmd
+
+
+def lookup(name):
+    return COMMANDS.get(name)
+
+
+def unique_commands():
+    seen = set()
+    for cmd in COMMANDS.values():
+        if id(cmd) not in seen:
+            seen.add(id(cmd))
+            yield cmd
+
+
+def help_text():
+    """
+    Builds the help listing from whatever is registered right now.
+    """
+    lines = ["LIST OF COMMANDS:"]
+    for cmd in unique_commands():
+        if cmd.hidden:
+            continue
+        label = cmd.usage
+        if cmd.aliases:
+            label += " (" + ", ".join(cmd.aliases) + ")"
+        lines.append(f"{label}: {cmd.help}")
+    return "\n".join(lines)
+
+
+def split_args(text):
+    parsed = parse_args(text)
+    if parsed is not None and not parsed[1]:
+        return parsed[0]
+    try:
+        return shlex.split(text)
+    except ValueError:
+        # unbalanced quotes, just hand over the words
+        return text.split()
+
+
+# what only sh can make sense of after a builtin's name: sequences,
+# background jobs, input redirection, command substitution
+_SH_ONLY = ";&|<`"
+_GLOB = "*?["
+
+
+def parse_args(text):
+    """
+    Splits a builtin's arguments the way sh would: quotes and backslashes,
+    unquoted globs expanded (left alone when nothing matches), and
+    >, >>, 2>, 2>>, N>&M pulled out as redirections.
+    Returns (argv, [(fd, mode, target)...]), mode "w"/"a" with a path or
+    "dup" with an fd, or None when the line needs a real shell.
+    """
+    words = []
+    redirects = []
+    literal = pattern = None  # the word being built, pattern with the quoted parts escaped
+    globbing = False
+    quote = None
+    pending = None  # (fd, mode) waiting for its target word
+    i, n = 0, len(text)
+
+    def finish():
+        nonlocal literal, pattern, globbing, pending
+        if literal is None:
+            return
+        if pending is not None:
+            redirects.append((pending[0], pending[1], literal))
+            pending = None
+        elif globbing:
+            words.extend(sorted(glob.glob(pattern)) or [literal])
+        else:
+            words.append(literal)
+        literal = pattern = None
+        globbing = False
+
+    def add(ch, quoted):
+        nonlocal literal, pattern
+        if literal is None:
+            literal = pattern = ""
+        literal += ch
+        pattern += glob.escape(ch) if quoted else ch
+
+    while i < n:
+        ch = text[i]
+        if quote == "'":
+            if ch == "'":
+                quote = None
+            else:
+                add(ch, True)
+        elif quote == '"':
+            if ch == '"':
+                quote = None
+            elif ch == "`" or text.startswith("$(", i):
+                return None
+            elif ch == "\\" and i + 1 < n and text[i + 1] in '"\\$`':
+                i += 1
+                add(text[i], True)
+            else:
+                add(ch, True)
+        elif ch in "'\"":
+            quote = ch
+            if literal is None:
+                literal = pattern = ""
+        elif ch == "\\":
+            if i + 1 < n:
+                i += 1
+                add(text[i], True)
+        elif ch.isspace():
+            finish()
+        elif ch == ">":
+            fd = 1
+            if literal is not None and literal.isdigit() and literal == pattern:
+                fd = int(literal)
+                literal = pattern = None
+            else:
+                finish()
+            if pending is not None:
+                return None
+            mode = "w"
+            if text.startswith(">", i + 1):
+                mode = "a"
+                i += 1
+            elif text.startswith("&", i + 1):
+                j = i + 2
+                while j < n and text[j].isdigit():
+                    j += 1
+                if j == i + 2:
+                    return None
+                redirects.append((fd, "dup", int(text[i + 2:j])))
+                i = j
+                continue
+            pending = (fd, mode)
+        elif ch in _SH_ONLY or text.startswith("$(", i):
+            return None
+        else:
+            if ch in _GLOB:
+                globbing = True
+            add(ch, False)
+        i += 1
+    if quote is not None:
+        return None
+    finish()
+    if pending is not None:
+        return None
+    return words, redirects
+
+
+@contextmanager
+def redirected(redirects):
+    """
+    Points sys.stdout/sys.stderr where parse_args' redirections say while
+    a builtin runs.
+    """
+    if not redirects:
+        yield
+        return
+    saved = sys.stdout, sys.stderr
+    opened = []
+    try:
+        for fd, mode, target in redirects:
+            if mode == "dup":
+                stream = {1: sys.stdout, 2: sys.stderr}.get(target)
+                if stream is None:
+                    raise OSError(f"{target}: bad file descriptor")
+            else:
+                # write_through so write_chunk's raw writes and print()s stay in order
+                raw = open(os.path.expanduser(target), mode + "b")
+                stream = io.TextIOWrapper(raw, encoding="utf-8", errors="replace", write_through=True)
+                opened.append(stream)
+            if fd == 1:
+                sys.stdout = stream
+            elif fd == 2:
+                sys.stderr = stream
+            else:
+                raise OSError(f"{fd}: only 1 and 2 can be redirected")
+        yield
+    finally:
+        sys.stdout, sys.stderr = saved
+        for stream in opened:
+            stream.close()
+
+
+def as_bytes(item):
+    if isinstance(item, str):
+        return item.encode("utf-8")
+    return bytes(item)
+
+
+def write_stream(gen, out=None):
+    """
+    Drains a stream builtin into out (sys.stdout by default) in big batches
+    instead of one write per line. Returns the generator's return value.
+    """
+    out = out or sys.stdout
+    batch = []
+    size = 0
+    try:
+        while True:
+            data = as_bytes(next(gen))
+            batch.append(data)
+            size += len(data)
+            if size >= runner.CHUNK:
+                runner.write_chunk(out, b"".join(batch))
+                batch = []
+                size = 0
+    except StopIteration as stop:
+        return stop.value
+    finally:
+        if batch:
+            runner.write_chunk(out, b"".join(batch))
+
+
+def call(cmd, argv):
+    if cmd.stream:
+        return write_stream(cmd.func(argv, None))
+    return cmd.func(argv)
+
+
+def add_tracer(func, before=None):
+    """
+    func(name, argv, seconds, result) runs after every dispatched command, builtin or not.
+    before(name, argv), if given, runs right before it starts.
+    """
+    _tracers.append((before, func))
+    return func
+
+
+def remove_tracer(func):
+    for pair in _tracers:
+        if pair[1] is func:
+            _tracers.remove(pair)
+            break
+
+
+def traced(name, argv, run):
+    """
+    Calls run() with the tracers around it, reported under name/argv.
+    Without tracers that's just run().
+    """
+    if not _tracers:
+        return run()
+    tracers = list(_tracers)
+    for before, _ in tracers:
+        if before is not None:
+            before(name, argv)
+    t0 = time.perf_counter()
+    result = None
+    try:
+        result = run()
+        return result
+    finally:
+        took = time.perf_counter() - t0
+        for _, after in reversed(tracers):
+            after(name, argv, took, result)
+
+
+def dispatch(line, fallback):
+    """
+    Runs one command line. Builtins are found by their first word, everything
+    else goes to fallback(line) (the external command runner). A builtin line
+    with syntax parse_args can't handle (;, &&, <, $(...)) goes to fallback too.
+    """
+    parts = line.split(None, 1)
+    name = parts[0]
+    cmd = COMMANDS.get(name)
+    redirects = ()
+    if cmd is None:
+        argv = None
+    else:
+        parsed = parse_args(parts[1]) if len(parts) > 1 else ([], [])
+        if parsed is None:
+            cmd = argv = None
+        else:
+            argv, redirects = parsed
+    if not _tracers:
+        if cmd is None:
+            return fallback(line)
+        return _call_redirected(cmd, argv, redirects)
+
+    if argv is None:
+        argv = split_args(parts[1]) if len(parts) > 1 else []
+    return traced(name, argv, lambda: fallback(line) if cmd is None else _call_redirected(cmd, argv, redirects))
+
+
+def _call_redirected(cmd, argv, redirects):
+    if not redirects:
+        return call(cmd, argv)
+    try:
+        with redirected(redirects):
+            return call(cmd, argv)
+    except OSError as e:
+        print(f"yay: {cmd.name}: {e}", file=sys.stderr)
+        return 1
+
+
+def load_plugins(directory):
+    """
+    Imports every .py file in directory so its @command builtins get registered.
+    Returns a list of (filename, error) for the ones that blew up.
+    """
+    errors = []
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError as e:
+        return [(directory, e)]
+    for filename in names:
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        path = os.path.join(directory, filename)
+        modname = "yayplugin_" + filename[:-3]
+        try:
+            spec = importlib.util.spec_from_file_location(modname, path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[modname] = module
+            spec.loader.exec_module(module)
+        except Exception as e:
+            sys.modules.pop(modname, None)
+            errors.append((filename, e))
+    return errors
@@ -0,0 +1,255 @@
+import os
+import json
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# everything the shell remembers about you (user, hostname, password hash,
+# the calibrated bcrypt cost...) lives in one json file in your config dir:
+#
+#   linux/mac  $XDG_CONFIG_HOME/yaylinux/config.json (~/.config/yaylinux/...)
+#   windows    %APPDATA%\yaylinux\config.json
+#
+# it is read once at startup and kept in memory. writes take a lock, re-read
+# the file (another session might have changed it), apply the change and put
+# the new file in place with a rename, so a crash or two shells saving at the
+# same time can't leave half a file behind.
+#
+# before this there were four loose files in whatever directory you launched
+# from (user, hostname, password, dontdeletethis.file). if those are around
+# and there's no config.json yet they get migrated (and removed) the first time.
+
+VERSION = 1
+LEGACY_FILES = ("user", "hostname", "password", "dontdeletethis.file")
+
+
+def config_dir():
+    if os.environ.get("YAY_CONFIG_DIR"):
+        return os.environ["YAY_CONFIG_DIR"]
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "yaylinux")
+
+
+def _read_legacy(directory):
+    """
+    The old loose files as a version 0 dict, None if there's no old setup here.
+    """
+    if not os.path.exists(os.path.join(directory, "dontdeletethis.file")):
+        return None
+    data = {"version": 0}
+    for name in ("user", "hostname", "password"):
+        try:
+            with open(os.path.join(directory, name), "r") as f:
+                data[name] = f.read().strip()
+        except OSError:
+            pass
+    return data
+
+
+def _from_v0(data):
+    # v0 is the loose files: setup only counted as done if it got as far as a password
+    return {
+        "version": 1,
+        "user": data.get("user") or None,
+        "hostname": data.get("hostname") or None,
+        "password": data.get("password") or None,
+        "state": {},
+    }
+
+
+# version n -> n + 1
+MIGRATIONS = {0: _from_v0}
+
+
+def migrate(data):
+    version = data.get("version", 0)
+    if version > VERSION:
+        raise ValueError(f"config is version {version}, this shell only knows up to {VERSION}")
+    while version < VERSION:
+        data = MIGRATIONS[version](data)
+        version = data["version"]
+    return data
+
+
+def empty():
+    return {"version": VERSION, "user": None, "hostname": None, "password": None, "state": {}}
+
+
+@contextlib.contextmanager
+def locked(lock_path):
+    """
+    Exclusive lock between processes, held for the with block. The lock is
+    a separate file because the files it protects get replaced by rename.
+    """
+    os.makedirs(os.path.dirname(lock_path), mode=0o700, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            import msvcrt
+
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        if fcntl is None:
+            import msvcrt
+
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+        os.close(fd)
+
+
+class View:
+    """
+    Read-only snapshot of the bits the prompt and login need, rebuilt only
+    when the store changes.
+    """
+
+    __slots__ = ("user", "hostname", "password", "prompt")
+
+    def __init__(self, data):
+        self.user = data.get("user") or "User"
+        self.hostname = data.get("hostname") or "localhost"
+        password = data.get("password")
+        self.password = password.encode("ascii") if password else None
+        self.prompt = f"{self.user}@{self.hostname} $ ~/"
+
+
+class ConfigStore:
+    def __init__(self, directory=None):
+        self.directory = directory or config_dir()
+        self.path = os.path.join(self.directory, "config.json")
+        self.lock_path = os.path.join(self.directory, "config.lock")
+        self.data = empty()
+        self.migrated_from = None
+        self._view = None
+
+    # -- reading --
+
+    def load(self, legacy_dir=None):
+        """
+        Reads config.json (one open, one read). With no config.json yet,
+        migrates the old loose files from legacy_dir (default: the cwd).
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            legacy_dir = legacy_dir or os.getcwd()
+            legacy = _read_legacy(legacy_dir)
+            if legacy is None:
+                self._set(empty())
+                return self
+            with self.edit() as data:
+                # another session may have migrated in the meantime
+                if data.get("user") is None and data.get("password") is None:
+                    data.clear()
+                    data.update(migrate(legacy))
+                    self.migrated_from = legacy_dir
+            if self.migrated_from:
+                # config.json is safely on disk, the old files would only
+                # come back to life after a --facreset from somewhere else
+                for name in LEGACY_FILES:
+                    with contextlib.suppress(OSError):
+                        os.remove(os.path.join(legacy_dir, name))
+            return self
+        except ValueError as e:
+            raise ValueError(f"{self.path} is broken ({e}), fix it or run with --facreset") from None
+        self._set(migrate(data))
+        return self
+
+    def _set(self, data):
+        self.data = data
+        self._view = None
+
+    def view(self):
+        if self._view is None:
+            self._view = View(self.data)
+        return self._view
+
+    def is_setup(self):
+        return bool(self.data.get("user") and self.data.get("password"))
+
+    def get(self, key, default=None):
+        return self.data.get("state", {}).get(key, default)
+
+    # -- writing --
+
+    def _locked(self):
+        return locked(self.lock_path)
+
+    def _write(self, data):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+                f.write("\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+    @contextlib.contextmanager
+    def edit(self):
+        """
+        with store.edit() as data: ... -- read-modify-write under the lock,
+        starting from what's on disk right now, not from our cached copy.
+        """
+        with self._locked():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = migrate(json.load(f))
+            except FileNotFoundError:
+                data = empty()
+            yield data
+            self._write(data)
+            self._set(data)
+
+    def update(self, **fields):
+        with self.edit() as data:
+            data.update(fields)
+
+    def set(self, key, value):
+        with self.edit() as data:
+            data.setdefault("state", {})[key] = value
+
+    def reset(self, legacy_dir=None):
+        """
+        Forgets everything: config.json and any old loose files. Whatever is
+        already gone is fine.
+        """
+        legacy_dir = legacy_dir or os.getcwd()
+        removed = []
+        with self._locked():
+            for path in [self.path] + [os.path.join(legacy_dir, name) for name in LEGACY_FILES]:
+                try:
+                    os.remove(path)
+                    removed.append(path)
+                except FileNotFoundError:
+                    pass
+            self._set(empty())
+        return removed
+
+
+_store = None
+
+
+def store():
+    global _store
+    if _store is None:
+        _store = ConfigStore()
+    return _store
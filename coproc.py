@@ -0,0 +1,234 @@
+import os
+import sys
+import shlex
+import signal
+import secrets
+import selectors
+import threading
+import subprocess as sub
+
+# one long lived /bin/sh per session instead of a fresh `sh -c` per command
+#
+# commands are written to the shell's stdin and followed by a sentinel line
+# (random token + exit code + $PWD) on stdout and a token on stderr. we read
+# both pipes until the sentinels show up, so a command costs a pipe round
+# trip instead of a fork/exec of sh, and exported variables, functions and
+# `cd` inside compound commands stick around for the next command.
+#
+# the shell's own stdin is the command pipe, so a command's stdin has to be
+# given by name: /dev/null, or our terminal by its path so cat, read and
+# anything that prompts still work at the prompt. a pipe or a file on our
+# stdin has no name to pass, stdin_source() says None and those commands
+# have to be spawned (main.run_subprocess does that).
+
+CHUNK = 64 * 1024
+
+
+class CoprocResult:
+    __slots__ = ("returncode", "stdout", "stderr")
+
+    def __init__(self, returncode, stdout, stderr):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class ShellCoprocess:
+    def __init__(self, shell="/bin/sh"):
+        self.shell = shell
+        self.proc = None
+        self.cwd = None
+        self.lock = threading.Lock()
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        self.token = "__YAY_" + secrets.token_hex(8) + "__"
+        self.proc = sub.Popen(
+            [self.shell],
+            stdin=sub.PIPE,
+            stdout=sub.PIPE,
+            stderr=sub.PIPE,
+            bufsize=0,
+            # own process group: ctrl-c at the prompt should not take the shell down with it
+            start_new_session=True,
+        )
+        self.cwd = None
+
+    def close(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=1)
+        except sub.TimeoutExpired:
+            self.kill()
+        self.proc = None
+
+    def kill(self):
+        if self.proc is None:
+            return
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        self.proc = None
+
+    def _script(self, command, stdin=os.devnull):
+        token = self.token
+        lines = []
+        here = os.getcwd()
+        if here != self.cwd:
+            # a builtin cd moved us, take the shell along
+            lines.append(f"cd -- {shlex.quote(here)}")
+        # `command eval` so a syntax error in the line fails that line instead of killing the shell
+        lines.append(f"command eval {shlex.quote(command)} <{shlex.quote(stdin)}")
+        lines.append("__yay_rc=$?")
+        lines.append(f"printf '%s\\n' '{token}' >&2")
+        lines.append(f"printf '{token}%d %s\\n' \"$__yay_rc\" \"$PWD\"")
+        return ("\n".join(lines) + "\n").encode()
+
+    def run(self, command, on_stdout=None, on_stderr=None, stdin=os.devnull):
+        """
+        Runs command in the shell and returns a CoprocResult.
+        With on_stdout/on_stderr the output is handed over in chunks as it
+        arrives instead of being collected (the result then has b"" for it).
+        stdin is a path the command reads from, see stdin_source().
+        """
+        with self.lock:
+            if not self.alive():
+                self.start()
+            try:
+                return self._run(command, on_stdout, on_stderr, stdin)
+            except BaseException:
+                # interrupted half way, the shell is in an unknown state
+                self.kill()
+                raise
+
+    def _run(self, command, on_stdout, on_stderr, stdin):
+        proc = self.proc
+        token = self.token.encode()
+        try:
+            proc.stdin.write(self._script(command, stdin))
+        except BrokenPipeError:
+            self.kill()
+            return CoprocResult(127, b"", b"yay: shell coprocess died\n")
+
+        out_fd = proc.stdout.fileno()
+        err_fd = proc.stderr.fileno()
+        pending = {out_fd: b"", err_fd: b""}
+        collected = {out_fd: [], err_fd: []}
+        sinks = {out_fd: on_stdout, err_fd: on_stderr}
+        done = {}
+        sel = selectors.DefaultSelector()
+        sel.register(out_fd, selectors.EVENT_READ)
+        sel.register(err_fd, selectors.EVENT_READ)
+        keep = len(token) - 1
+
+        def emit(fd, data):
+            if not data:
+                return
+            if sinks[fd] is not None:
+                sinks[fd](data)
+            else:
+                collected[fd].append(data)
+
+        try:
+            while len(done) < 2:
+                for key, _ in sel.select():
+                    fd = key.fd
+                    data = os.read(fd, CHUNK)
+                    if not data:
+                        # the shell went away (someone typed `exit`)
+                        sel.unregister(fd)
+                        emit(fd, pending[fd])
+                        pending[fd] = b""
+                        done[fd] = None
+                        continue
+                    buf = pending[fd] + data
+                    at = buf.find(token)
+                    if at < 0:
+                        # hold back a possible partial token at the end
+                        cut = max(len(buf) - keep, 0)
+                        emit(fd, buf[:cut])
+                        pending[fd] = buf[cut:]
+                        continue
+                    emit(fd, buf[:at])
+                    rest = buf[at + len(token):]
+                    if fd == out_fd:
+                        # sentinel line is "<rc> <pwd>\n", it can still be arriving
+                        while not rest.endswith(b"\n"):
+                            more = os.read(fd, CHUNK)
+                            if not more:
+                                break
+                            rest += more
+                    done[fd] = rest
+                    pending[fd] = b""
+                    sel.unregister(fd)
+        finally:
+            sel.close()
+
+        status = done.get(out_fd)
+        if status is None:
+            # no sentinel: the command exited the shell
+            code = proc.wait()
+            self.kill()
+            return CoprocResult(code, b"".join(collected[out_fd]), b"".join(collected[err_fd]))
+
+        rc, _, pwd = status.decode("utf-8", "replace").rstrip("\n").partition(" ")
+        self.cwd = pwd
+        if pwd and pwd != os.getcwd():
+            # `cd` inside the command: follow it so builtins see the same directory
+            try:
+                os.chdir(pwd)
+            except OSError:
+                pass
+        return CoprocResult(int(rc), b"".join(collected[out_fd]), b"".join(collected[err_fd]))
+
+
+def stdin_source(stdin=None):
+    """
+    The path for run(stdin=) that gives a command what it would read as our
+    own child: stdin None means our stdin, else sub.DEVNULL or a file.
+    None when it can't be named (a pipe, a file), the command needs spawning.
+    """
+    if stdin == sub.DEVNULL:
+        return os.devnull
+    if stdin is not None:
+        return None
+    try:
+        fd = sys.stdin.fileno()
+    except (AttributeError, ValueError, OSError):
+        # no stdin at all
+        return os.devnull
+    try:
+        if os.isatty(fd):
+            return os.ttyname(fd)
+        if os.path.samestat(os.fstat(fd), os.stat(os.devnull)):
+            return os.devnull
+    except OSError:
+        pass
+    return None
+
+
+_session = None
+
+
+def session():
+    """
+    The coprocess shared by the whole shell session, started on first use.
+    """
+    global _session
+    if _session is None:
+        _session = ShellCoprocess()
+    return _session
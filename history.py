@@ -0,0 +1,325 @@
+import os
+import time
+import array
+import threading
+import contextlib
+import collections
+
+import config
+
+# command history
+#
+# every command goes to the end of <config dir>/history as "time<TAB>command",
+# appended under a lock with the file opened fresh each time, so any number
+# of shells can share it. when it grows past a quarter over the cap it gets
+# compacted (re-read under the lock, the newest max_entries kept, renamed
+# into place).
+#
+# readline starts with only the newest READLINE_ENTRIES so startup doesn't
+# depend on how big the history is. the full history is loaded on a thread,
+# handed to readline at the next prompt after that (sync_readline), so ctrl-r
+# reaches all of it, and indexed by trigram for `history grep`: every distinct command is listed under each 3-character piece
+# of it, so a search only has to look at the commands that contain the
+# rarest piece of what you typed instead of every line ever entered.
+
+MAX_ENTRIES = 100000
+READLINE_ENTRIES = 2000
+TAIL_BYTES = 256 * 1024
+
+
+def _escape(command):
+    return command.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _unescape(text):
+    if "\\" not in text:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        if text[i] == "\\" and i + 1 < len(text):
+            out.append("\n" if text[i + 1] == "n" else text[i + 1])
+            i += 2
+        else:
+            out.append(text[i])
+            i += 1
+    return "".join(out)
+
+
+def _parse(line):
+    stamp, sep, command = line.partition("\t")
+    if not sep:
+        return 0, _unescape(line)
+    try:
+        return int(stamp), _unescape(command)
+    except ValueError:
+        return 0, _unescape(line)
+
+
+class TrigramIndex:
+    """
+    Distinct commands, each with the position of its newest use, findable by substring.
+    """
+
+    def __init__(self):
+        self.texts = []
+        self.ids = {}
+        self.last = array.array("q")  # newest history position per text
+        self.postings = collections.defaultdict(lambda: array.array("I"))
+
+    def add(self, text, position):
+        tid = self.ids.get(text)
+        if tid is not None:
+            self.last[tid] = position
+            return
+        tid = len(self.texts)
+        self.ids[text] = tid
+        self.texts.append(text)
+        self.last.append(position)
+        lowered = text.lower()
+        for gram in {lowered[i:i + 3] for i in range(len(lowered) - 2)}:
+            self.postings[gram].append(tid)
+
+    def search(self, query, limit=None):
+        """
+        Commands containing query (case-insensitive), newest first.
+        """
+        query = query.lower()
+        if len(query) < 3:
+            # too short for a trigram, but short queries match half the history anyway
+            candidates = range(len(self.texts))
+        else:
+            grams = {query[i:i + 3] for i in range(len(query) - 2)}
+            if any(gram not in self.postings for gram in grams):
+                return []
+            candidates = min((self.postings[gram] for gram in grams), key=len)
+        texts = self.texts
+        hits = [tid for tid in candidates if query in texts[tid].lower()]
+        hits.sort(key=self.last.__getitem__, reverse=True)
+        if limit is not None:
+            hits = hits[:limit]
+        return [(self.last[tid], texts[tid]) for tid in hits]
+
+
+class History:
+    def __init__(self, path=None, max_entries=MAX_ENTRIES):
+        directory = config.config_dir()
+        self.path = path or os.path.join(directory, "history")
+        self.lock_path = self.path + ".lock"
+        self.max_entries = max_entries
+        self.entries = None  # [(time, command)] once load() ran
+        self.index = None
+        self.loaded = threading.Event()
+        self.lock = threading.Lock()
+        self.pending = None  # adds that came in while load() was indexing
+        self.loading = False
+        self.previous = None
+        self.synced = False  # readline has the full history
+
+    # -- reading --
+
+    def tail(self, count=READLINE_ENTRIES):
+        """
+        The newest count commands, read from the end of the file only.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - TAIL_BYTES))
+                data = f.read()
+        except OSError:
+            return []
+        lines = data.decode("utf-8", "replace").split("\n")
+        if size > TAIL_BYTES:
+            lines = lines[1:]  # probably cut in half
+        commands = [_parse(line)[1] for line in lines if line]
+        return commands[-count:]
+
+    def _read_all(self):
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace", newline="\n") as f:
+                data = f.read()
+        except OSError:
+            return []
+        return [_parse(line) for line in data.split("\n") if line]
+
+    def load(self):
+        """
+        Reads the whole history and builds the index. Fine to run on a thread.
+        """
+        with config.locked(self.lock_path):
+            entries = self._read_all()
+            with self.lock:
+                self.pending = []
+        index = TrigramIndex()
+        for position, (_, command) in enumerate(entries):
+            index.add(command, position)
+        with self.lock:
+            for entry in self.pending:
+                entries.append(entry)
+                index.add(entry[1], len(entries) - 1)
+            self.pending = None
+            self.entries = entries
+            self.index = index
+            if entries and self.previous is None:
+                self.previous = entries[-1][1]
+        self.loaded.set()
+        if len(entries) > self.max_entries * 5 // 4:
+            self.compact()
+        return self
+
+    def load_in_background(self):
+        self.loading = True
+        threading.Thread(target=self.load, name="yay-history", daemon=True).start()
+
+    def _ready(self):
+        if self.loading:
+            self.loaded.wait()
+        elif not self.loaded.is_set():
+            self.load()
+
+    # -- writing --
+
+    def add(self, command):
+        """
+        Remembers command. Blank ones, ones starting with a space (a way to keep
+        something out of the history) and repeats of the last one are skipped.
+        """
+        if not command.strip() or command[0].isspace() or command == self.previous:
+            return False
+        self.previous = command
+        stamp = int(time.time())
+        grown = False
+        try:
+            with config.locked(self.lock_path):
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                try:
+                    os.write(fd, f"{stamp}\t{_escape(command)}\n".encode("utf-8"))
+                finally:
+                    os.close(fd)
+                # still under the file lock, so load() sees this either in the file or in pending
+                with self.lock:
+                    if self.entries is not None:
+                        self.entries.append((stamp, command))
+                        self.index.add(command, len(self.entries) - 1)
+                        grown = len(self.entries) > self.max_entries * 5 // 4
+                    elif self.pending is not None:
+                        self.pending.append((stamp, command))
+        except OSError:
+            # no history beats no shell
+            return False
+        if grown:
+            self.compact()
+        return True
+
+    def remember(self, command):
+        """
+        add() plus readline, for what's typed at the prompt.
+        """
+        if self.add(command) and _readline is not None:
+            _readline.add_history(command)
+
+    def sync_readline(self):
+        """
+        Swaps readline's tail for the whole history once load() is done.
+        Only between prompts: readline can't be touched while it reads a line.
+        """
+        if self.synced or _readline is None or not self.loaded.is_set():
+            return False
+        with self.lock:
+            # what readline hands back has to be one line
+            commands = [command.replace("\n", " ") for _, command in self.entries]
+        _readline.clear_history()
+        _readline.set_history_length(max(self.max_entries, READLINE_ENTRIES))
+        self.synced = True
+        if "libedit" not in (_readline.__doc__ or ""):
+            # readline reads a plain file of lines ~6x faster than add_history() one at a time
+            tmp = f"{self.path}.{os.getpid()}.readline"
+            try:
+                with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+                    f.writelines(command + "\n" for command in commands)
+                _readline.read_history_file(tmp)
+                return True
+            except OSError:
+                _readline.clear_history()
+            finally:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp)
+        for command in commands:
+            _readline.add_history(command)
+        return True
+
+    def compact(self):
+        """
+        Keeps the newest max_entries, everyone's appends included.
+        """
+        with config.locked(self.lock_path):
+            entries = self._read_all()[-self.max_entries:]
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+                f.writelines(f"{stamp}\t{_escape(command)}\n" for stamp, command in entries)
+            os.replace(tmp, self.path)
+        index = TrigramIndex()
+        for position, (_, command) in enumerate(entries):
+            index.add(command, position)
+        with self.lock:
+            self.entries = entries
+            self.index = index
+
+    def clear(self):
+        with config.locked(self.lock_path):
+            open(self.path, "w").close()
+        with self.lock:
+            self.entries = []
+            self.index = TrigramIndex()
+            self.previous = None
+
+    # -- queries --
+
+    def search(self, query, limit=None):
+        """
+        [(number, command)] for commands containing query, newest first (1-based numbers).
+        """
+        self._ready()
+        with self.lock:
+            return [(position + 1, command) for position, command in self.index.search(query, limit)]
+
+    def last(self, count=None):
+        self._ready()
+        with self.lock:
+            entries = self.entries if count is None else self.entries[-count:]
+            start = len(self.entries) - len(entries)
+            return [(start + i + 1, command) for i, (_, command) in enumerate(entries)]
+
+
+_readline = None
+
+
+def setup_readline(hist):
+    """
+    Arrow keys, ctrl-r and line editing, where readline exists. It gets the
+    newest entries now and the rest through sync_readline(). Returns the
+    module or None.
+    """
+    global _readline
+    try:
+        import readline
+    except ImportError:
+        return None
+    readline.set_auto_history(False)
+    readline.set_history_length(max(hist.max_entries, READLINE_ENTRIES))
+    for command in hist.tail():
+        readline.add_history(command)
+    _readline = readline
+    return readline
+
+
+_history = None
+
+
+def history(create=True):
+    global _history
+    if _history is None and create:
+        _history = History()
+    return _history
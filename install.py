@@ -1,36 +1,588 @@
 import subprocess as sub
 import os
+import re
+import json
+import hashlib
 import platform
+import contextlib
 
-def install(app):
-    system_os = platform.system()
-    if system_os == 'Windows':
-        look4choco = sub.run(["where", "choco"], capture_output=True)
-        if look4choco.returncode == 0:
-            print(f"Installing {app} via Chocolatey...")
-            # choco install -y requires administrative privileges usually.
-            installation = sub.run(["choco", "install", app, "-y"])
-            if installation.returncode == 0:
-                print(f"{app} installed successfully.")
-            else:
-                print("Installation failed.")
-        else:
-            print("Chocolatey (choco) not found.")
-            print("Please install Chocolatey manually or run this script as Administrator to attempt auto-installation.")
-            # Auto-installing choco is risky and complex to get right in a script without explicit permission interaction.
-            # Simplified for safety.
-    elif system_os == 'Linux':
-        distro = platform.linux_distribution()[0].lower() if hasattr(platform, 'linux_distribution') else ''
-        # Modern python might not have linux_distribution, use distro package or /etc/os-release if needed. 
-        # But assuming generic pacman usage as per original code context (Arch-like):
-        print(f"Attempting to install {app}. You might be prompted for sudo password.")
+# packages for the launcher
+#
+# one Backend class per package manager (pacman, apt, dnf, zypper, apk, choco)
+# with the same four operations: search, install, remove and query. which one
+# this machine uses is worked out once: /etc/os-release says what distro it
+# is (ID, then ID_LIKE), and the binary is looked up in completion.py's PATH
+# index, so nothing gets probed twice.
+#
+# install() takes any number of packages. the list is deduplicated, whatever
+# is installed already gets dropped and the rest is installed in one
+# transaction, so it's one sudo prompt and one confirmation instead of one
+# per package. the downloads happen in there, in parallel where the package
+# manager does that (pacman's ParallelDownloads, dnf's max_parallel_downloads).
+#
+# the installed list and the list of everything the repos have are each
+# fetched once and cached, in memory and on disk, until the package manager's
+# database (or repo metadata) changes mtime. searching is then a scan over a
+# list we already have instead of a run of the package manager.
+#
+# to try all of this without root: put stub binaries called pacman/apt-get/...
+# on PATH and point YAY_PKG_ROOT at a fake / (for etc/os-release and the
+# databases), or set YAY_PKG_BACKEND to a backend name or to a stub script
+# that answers `query`, `list`, `install PKG...` and `remove PKG...`.
+
+
+def cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "yaylinux", "packages")
+
+
+def which(name):
+    import completion
+
+    return completion.path_index().which(name)
+
+
+def _sudo():
+    if os.name == "nt" or os.geteuid() == 0 or not which("sudo"):
+        return []
+    return ["sudo"]
+
+
+def _lines(argv):
+    try:
+        return sub.run(argv, capture_output=True, text=True).stdout.splitlines()
+    except OSError:
+        return None
+
+
+class Backend:
+    """
+    A package manager. Subclasses say which commands to run and how to read
+    their output; caching and the install plan live here.
+    """
+
+    name = None
+    binary = None
+    db = ()  # paths (under the root) that change when packages get installed/removed
+    sync_db = ()  # paths that change when the repo metadata is refreshed
+    needs_root = True
+
+    def __init__(self, exe=None, root=None):
+        self.exe = exe or self.binary
+        self.root = root if root is not None else os.environ.get("YAY_PKG_ROOT", "/")
+        self._memory = {}  # kind -> (stamp, value)
+
+    # -- what to run (override) --
+
+    def install_cmd(self, packages):
+        raise NotImplementedError
+
+    def remove_cmd(self, packages):
+        raise NotImplementedError
+
+    def installed_cmd(self):
+        raise NotImplementedError
+
+    def parse_installed(self, line):
+        """
+        (name, version) for one line of installed_cmd's output, None to skip it.
+        """
+        parts = line.split()
+        return (parts[0], parts[1] if len(parts) > 1 else "") if parts else None
+
+    def available_cmd(self):
+        # None: the repos are too big to list, search_cmd per term instead
+        return None
+
+    def parse_available(self, line):
+        return line.strip() or None
+
+    def search_cmd(self, term):
+        return None
+
+    # -- caching --
+
+    def _paths(self, paths):
+        return [os.path.join(self.root, path.lstrip("/")) for path in paths]
+
+    def _stamp(self, paths):
+        stamps = []
+        for path in paths:
+            try:
+                stamps.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        return stamps if any(s is not None for s in stamps) else None
+
+    def stamp(self):
+        return self._stamp(self._paths(self.db))
+
+    def sync_stamp(self):
+        return self._stamp(self._paths(self.sync_db))
+
+    def _cache_file(self, kind):
+        return os.path.join(cache_dir(), f"{kind}-{self.name}.json")
+
+    def _cached(self, kind, stamp, produce):
+        """
+        produce()'s value, reused while stamp stays the same: from memory, or
+        from the last launch's file. With no stamp it only lives in memory
+        until forget().
+        """
+        hit = self._memory.get(kind)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        if stamp is not None:
+            try:
+                with open(self._cache_file(kind), "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if cached.get("stamp") == stamp and cached.get("exe") == self.exe:
+                    self._memory[kind] = (stamp, cached["value"])
+                    return cached["value"]
+            except (OSError, ValueError, KeyError):
+                pass
+        value = produce()
+        if value is None:
+            # the package manager didn't run, don't remember that
+            return None
+        self._memory[kind] = (stamp, value)
+        if stamp is not None:
+            self._save(kind, {"stamp": stamp, "exe": self.exe, "value": value})
+        return value
+
+    def _save(self, kind, data):
+        path = self._cache_file(kind)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+    def forget(self):
+        self._memory.clear()
+
+    # -- the operations --
+
+    def installed(self):
+        """
+        {name: version} of everything installed.
+        """
+
+        def produce():
+            lines = _lines(self.installed_cmd())
+            if lines is None:
+                return None
+            found = {}
+            for line in lines:
+                parsed = self.parse_installed(line)
+                if parsed:
+                    found[parsed[0]] = parsed[1]
+            return found
+
+        return self._cached("installed", self.stamp(), produce) or {}
+
+    def available(self):
+        """
+        Every package name the repos have, None if this backend can't list them.
+        """
+        if self.available_cmd() is None:
+            return None
+
+        def produce():
+            lines = _lines(self.available_cmd())
+            if lines is None:
+                return None
+            return list(dict.fromkeys(name for name in map(self.parse_available, lines) if name))
+
+        return self._cached("available", self.sync_stamp(), produce)
+
+    def search(self, term, limit=None):
+        """
+        [(name, installed)] for packages whose name contains term: exact match
+        first, then the ones starting with it, then the rest.
+        """
+        term = term.lower()
+        names = self.available()
+        if names is None:
+            argv = self.search_cmd(term)
+            # the term ends up in a file name, so it goes in hashed
+            key = "search-" + hashlib.sha1(term.encode("utf-8")).hexdigest()[:16]
+            names = self._cached(key, self.sync_stamp(), lambda: _names(self, argv)) if argv else None
+        if not names:
+            return []
+        hits = [name for name in names if term in name.lower()]
+        hits.sort(key=lambda name: (name.lower() != term, not name.lower().startswith(term), name))
+        if limit is not None:
+            hits = hits[:limit]
+        have = self.installed()
+        return [(name, name in have) for name in hits]
+
+    def query(self, packages=None):
+        """
+        {name: version or None} for packages (None = not installed), or all of
+        them with no packages given.
+        """
+        have = self.installed()
+        if packages is None:
+            return dict(sorted(have.items()))
+        return {name: have.get(name) for name in packages}
+
+    def _transaction(self, argv):
+        if self.needs_root:
+            argv = _sudo() + argv
         try:
-             # Removing -S for sudo to avoid hanging if no password provided via stdin. 
-             # Let it use terminal if interactive, or fail.
-            sub.run(["sudo", "pacman", "-S", app])
-        except Exception as e:
+            return sub.run(argv).returncode
+        except OSError as e:
             print(f"Error executing installation command: {e}")
+            return 127
+        finally:
+            # whatever happened, the database may have moved
+            self.forget()
+
+    def install(self, packages):
+        return self._transaction(self.install_cmd(list(packages)))
+
+    def remove(self, packages):
+        return self._transaction(self.remove_cmd(list(packages)))
+
+
+def _names(backend, argv):
+    lines = _lines(argv)
+    if lines is None:
+        return None
+    return list(dict.fromkeys(name for name in map(backend.parse_available, lines) if name))
+
+
+class Pacman(Backend):
+    # pacman downloads in parallel by itself (ParallelDownloads in pacman.conf)
+    name = "pacman"
+    binary = "pacman"
+    db = ("/var/lib/pacman/local",)
+    sync_db = ("/var/lib/pacman/sync",)
+
+    def install_cmd(self, packages):
+        return [self.exe, "-S", "--needed"] + packages
+
+    def remove_cmd(self, packages):
+        return [self.exe, "-R"] + packages
+
+    def installed_cmd(self):
+        return [self.exe, "-Q"]
+
+    def available_cmd(self):
+        return [self.exe, "-Slq"]
+
+
+class Apt(Backend):
+    name = "apt"
+    binary = "apt-get"
+    db = ("/var/lib/dpkg/status",)
+    sync_db = ("/var/lib/apt/lists",)
+
+    def install_cmd(self, packages):
+        return [self.exe, "install"] + packages
+
+    def remove_cmd(self, packages):
+        return [self.exe, "remove"] + packages
+
+    def installed_cmd(self):
+        return [which("dpkg-query") or "dpkg-query", "-W", "-f=${db:Status-Abbrev}\t${Package}\t${Version}\n"]
+
+    def parse_installed(self, line):
+        # removed packages whose config is still around show up as "rc"
+        status, _, rest = line.partition("\t")
+        if not status.startswith("ii"):
+            return None
+        name, _, version = rest.partition("\t")
+        return name, version
+
+    def available_cmd(self):
+        return [which("apt-cache") or "apt-cache", "pkgnames"]
+
+
+class Dnf(Backend):
+    name = "dnf"
+    binary = "dnf"
+    db = ("/var/lib/rpm/rpmdb.sqlite", "/var/lib/rpm/Packages")
+    sync_db = ("/var/cache/dnf",)
+
+    def install_cmd(self, packages):
+        return [self.exe, "install"] + packages
+
+    def remove_cmd(self, packages):
+        return [self.exe, "remove"] + packages
+
+    def installed_cmd(self):
+        return [which("rpm") or "rpm", "-qa", "--qf", "%{NAME}\t%{VERSION}-%{RELEASE}\n"]
+
+    def available_cmd(self):
+        return [self.exe, "-q", "repoquery", "--qf", "%{name}"]
+
+
+class Zypper(Dnf):
+    name = "zypper"
+    binary = "zypper"
+    sync_db = ("/var/cache/zypp/solv",)
+
+    def available_cmd(self):
+        return [self.exe, "--quiet", "--non-interactive", "search"]
+
+    def parse_available(self, line):
+        # S | Name | Summary | Type
+        cols = [col.strip() for col in line.split("|")]
+        if len(cols) < 3 or cols[1] in ("", "Name") or set(cols[1]) <= set("-+"):
+            return None
+        return cols[1]
+
+
+class Apk(Backend):
+    name = "apk"
+    binary = "apk"
+    db = ("/lib/apk/db/installed",)
+    sync_db = ("/var/cache/apk",)
+    VERSIONED = re.compile(r"^(.+)-([^-]+-r\d+)$")
+
+    def install_cmd(self, packages):
+        return [self.exe, "add"] + packages
+
+    def remove_cmd(self, packages):
+        return [self.exe, "del"] + packages
+
+    def installed_cmd(self):
+        return [self.exe, "info", "-v"]
+
+    def parse_installed(self, line):
+        m = self.VERSIONED.match(line.strip())
+        return (m.group(1), m.group(2)) if m else None
+
+    def available_cmd(self):
+        return [self.exe, "search"]
+
+    def parse_available(self, line):
+        m = self.VERSIONED.match(line.strip())
+        return m.group(1) if m else None
+
+
+class Choco(Backend):
+    # the community repo is far too big to list, so choco searches per term
+    name = "choco"
+    binary = "choco"
+    needs_root = False  # wants an admin shell instead
+
+    @property
+    def db(self):
+        return (os.path.join(os.environ.get("ChocolateyInstall") or r"C:\ProgramData\chocolatey", "lib"),)
+
+    def _paths(self, paths):
+        return list(paths)
+
+    def install_cmd(self, packages):
+        return [self.exe, "install", "-y"] + packages
+
+    def remove_cmd(self, packages):
+        return [self.exe, "uninstall", "-y"] + packages
+
+    def installed_cmd(self):
+        return [self.exe, "list", "--limit-output"]
+
+    def parse_installed(self, line):
+        name, sep, version = line.strip().partition("|")
+        return (name, version) if sep else None
+
+    def search_cmd(self, term):
+        return [self.exe, "search", term, "--limit-output"]
+
+    def parse_available(self, line):
+        name, sep, _ = line.strip().partition("|")
+        return name if sep else None
+
+
+class Stub(Backend):
+    """
+    A fake package manager script, see the top of the file. YAY_PKG_DB is its
+    database, if it has one.
+    """
+
+    name = "stub"
+    needs_root = False
+
+    def _paths(self, paths):
+        return [os.environ["YAY_PKG_DB"]] if os.environ.get("YAY_PKG_DB") else []
+
+    def install_cmd(self, packages):
+        return [self.exe, "install"] + packages
+
+    def remove_cmd(self, packages):
+        return [self.exe, "remove"] + packages
+
+    def installed_cmd(self):
+        return [self.exe, "query"]
+
+    def available_cmd(self):
+        return [self.exe, "list"]
+
+
+BACKENDS = {cls.name: cls for cls in (Pacman, Apt, Dnf, Zypper, Apk, Choco)}
+
+# os-release ID / ID_LIKE -> backend
+DISTROS = {
+    "arch": "pacman",
+    "manjaro": "pacman",
+    "endeavouros": "pacman",
+    "debian": "apt",
+    "ubuntu": "apt",
+    "fedora": "dnf",
+    "rhel": "dnf",
+    "centos": "dnf",
+    "suse": "zypper",
+    "opensuse": "zypper",
+    "sles": "zypper",
+    "alpine": "apk",
+}
+
+
+def os_release(root=None):
+    """
+    /etc/os-release as a dict, {} when there isn't one.
+    """
+    import sysinfo
+
+    return sysinfo.os_release(root if root is not None else os.environ.get("YAY_PKG_ROOT", "/"))
+
+
+def detect(root=None):
+    """
+    The Backend for this machine: the distro's own package manager if it's
+    installed, otherwise the first one we know that is. None if there's none.
+    """
+    if platform.system() == 'Windows':
+        exe = which("choco")
+        return Choco(exe) if exe else None
+    info = os_release(root)
+    order = []
+    for distro in [info.get("ID", "")] + info.get("ID_LIKE", "").split():
+        name = DISTROS.get(distro) or DISTROS.get(distro.split("-")[0])  # opensuse-tumbleweed
+        if name and name not in order:
+            order.append(name)
+    order += [name for name in BACKENDS if name not in order and name != "choco"]
+    for name in order:
+        exe = which(BACKENDS[name].binary)
+        if exe:
+            return BACKENDS[name](exe, root)
+    return None
+
+
+def stub(path):
+    return Stub(path)
+
+
+_backend = False
+
+
+def default_backend():
+    """
+    The package manager for this machine, worked out once. None if there
+    isn't one we know. YAY_PKG_BACKEND=apt (or =/path/to/stub) overrides it.
+    """
+    global _backend
+    if _backend is not False:
+        return _backend
+    forced = os.environ.get("YAY_PKG_BACKEND")
+    if forced in BACKENDS:
+        exe = which(BACKENDS[forced].binary)
+        _backend = BACKENDS[forced](exe) if exe else None
+    elif forced:
+        _backend = stub(forced)
+    else:
+        _backend = detect()
+    return _backend
+
+
+def _no_backend():
+    system_os = platform.system()
+    if system_os == 'Windows':
+        print("Chocolatey (choco) not found.")
+        print("Please install Chocolatey manually or run this script as Administrator to attempt auto-installation.")
     elif system_os == 'Darwin': # macOS
         print("ts aint gon work.")
+    elif system_os == 'Linux':
+        print(f"no package manager we know about here ({', '.join(name for name in BACKENDS if name != 'choco')})")
     else:
         print(f"how do you even use {system_os}")
+    return 1
+
+
+def _unique(apps):
+    return list(dict.fromkeys(app.strip() for app in apps if app.strip()))
+
+
+def plan(apps, backend):
+    """
+    (to install, already there) out of apps, duplicates dropped, order kept.
+    """
+    wanted = _unique(apps)
+    have = backend.installed()
+    return [app for app in wanted if app not in have], [app for app in wanted if app in have]
+
+
+def install(apps, backend=None):
+    """
+    Installs apps (a list, or one name like before). Returns the exit code.
+    """
+    if isinstance(apps, str):
+        apps = [apps]
+    backend = backend or default_backend()
+    if backend is None:
+        return _no_backend()
+
+    todo, have = plan(apps, backend)
+    if have:
+        print(f"already installed: {' '.join(have)}")
+    if not todo:
+        print("nothing to do")
+        return 0
+    print(f"Installing {' '.join(todo)} via {backend.name}. You might be prompted for sudo password.")
+    code = backend.install(todo)
+    if code == 0:
+        print(f"{', '.join(todo)} installed successfully.")
+    else:
+        print("Installation failed.")
+    return code
+
+
+def remove(apps, backend=None):
+    backend = backend or default_backend()
+    if backend is None:
+        return _no_backend()
+    wanted = _unique(apps)
+    have = backend.installed()
+    todo = [app for app in wanted if app in have]
+    missing = [app for app in wanted if app not in have]
+    if missing:
+        print(f"not installed: {' '.join(missing)}")
+    if not todo:
+        return 0 if not missing else 1
+    print(f"Removing {' '.join(todo)} via {backend.name}...")
+    code = backend.remove(todo)
+    print("Removed." if code == 0 else "Removal failed.")
+    return code
+
+
+def search(term, backend=None, limit=None):
+    backend = backend or default_backend()
+    if backend is None:
+        _no_backend()
+        return []
+    return backend.search(term, limit)
+
+
+def query(apps=None, backend=None):
+    backend = backend or default_backend()
+    if backend is None:
+        _no_backend()
+        return {}
+    return backend.query(_unique(apps) if apps else None)
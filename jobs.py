@@ -0,0 +1,249 @@
+import os
+import sys
+import signal
+import threading
+import collections
+import subprocess as sub
+
+import runner
+
+# background jobs: `cmd &` hands the command to an asyncio loop running in its
+# own thread, so the prompt comes straight back. the loop reads each job's
+# output into a bounded buffer (oldest output gets dropped) until someone
+# brings the job to the foreground with fg.
+
+MAX_JOB_OUTPUT = 256 * 1024
+
+
+class BoundedBuffer:
+    """
+    Keeps the last max_bytes of output, counting what fell off the front.
+    """
+
+    def __init__(self, max_bytes=MAX_JOB_OUTPUT):
+        self.max_bytes = max_bytes
+        self.chunks = collections.deque()
+        self.size = 0
+        self.dropped = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.size += len(data)
+        while self.size > self.max_bytes and len(self.chunks) > 1:
+            old = self.chunks.popleft()
+            self.size -= len(old)
+            self.dropped += len(old)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+
+class Job:
+    __slots__ = ("id", "command", "proc", "output", "status", "returncode", "sink", "done")
+
+    def __init__(self, job_id, command, proc):
+        self.id = job_id
+        self.command = command
+        self.proc = proc
+        self.output = BoundedBuffer()
+        self.status = "Running"
+        self.returncode = None
+        self.sink = None  # set while the job is in the foreground
+        self.done = threading.Event()
+
+    def describe(self):
+        if self.status == "Done" and self.returncode and self.returncode < 0:
+            try:
+                state = signal.Signals(-self.returncode).name
+            except ValueError:
+                state = f"Signal {-self.returncode}"
+        elif self.status == "Done" and self.returncode:
+            state = f"Exit {self.returncode}"
+        else:
+            state = self.status
+        return f"[{self.id}]  {state:<10} {self.command}"
+
+
+class JobSupervisor:
+    def __init__(self):
+        # asyncio costs more to import than the rest of the shell put together,
+        # only pay for it once there is a job (see fast boot in main.py)
+        import asyncio
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="yay-jobs", daemon=True)
+        self.thread.start()
+        self.jobs = {}
+        self.next_id = 1
+        self.finished = []
+        self.lock = threading.Lock()
+
+    # -- loop side --
+
+    async def _spawn(self, command):
+        kwargs = {"stdin": sub.DEVNULL, "stdout": sub.PIPE, "stderr": sub.STDOUT}
+        import asyncio
+
+        if runner.IS_WINDOWS:
+            proc = await asyncio.create_subprocess_exec(*runner.shell_argv(command), **kwargs)
+        else:
+            # own process group so kill/fg signals hit the whole pipeline
+            proc = await asyncio.create_subprocess_shell(command, start_new_session=True, **kwargs)
+        with self.lock:
+            job = Job(self.next_id, command, proc)
+            self.next_id += 1
+            self.jobs[job.id] = job
+        self.loop.create_task(self._supervise(job))
+        return job
+
+    async def _supervise(self, job):
+        while True:
+            data = await job.proc.stdout.read(runner.CHUNK)
+            if not data:
+                break
+            if job.sink is not None:
+                job.sink(data)
+            else:
+                job.output.write(data)
+        job.returncode = await job.proc.wait()
+        job.status = "Done"
+        with self.lock:
+            if job.sink is None:
+                self.finished.append(job)
+            else:
+                # it finished in the foreground, nothing to announce
+                self.jobs.pop(job.id, None)
+        job.done.set()
+
+    def _attach(self, job, sink):
+        if job.output.dropped:
+            sink(f"[{job.id}] ... {job.output.dropped} bytes of earlier output dropped\n".encode())
+        data = job.output.drain()
+        if data:
+            sink(data)
+        job.sink = sink
+
+    # -- shell side --
+
+    def start(self, command):
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(self._spawn(command), self.loop).result()
+
+    def get(self, spec=None):
+        """
+        %n, n, %% / %+ (or nothing) for the newest job. None when there's no such job.
+        """
+        with self.lock:
+            if not self.jobs:
+                return None
+            if spec in (None, "%", "%%", "%+"):
+                return self.jobs[max(self.jobs)]
+            try:
+                return self.jobs.get(int(spec.lstrip("%")))
+            except ValueError:
+                return None
+
+    def notifications(self):
+        """
+        Finished jobs since the last call, each with whatever output it left behind.
+        """
+        with self.lock:
+            done, self.finished = self.finished, []
+            for job in done:
+                self.jobs.pop(job.id, None)
+        notes = []
+        for job in done:
+            data = job.output.drain()
+            if job.output.dropped:
+                notes.append(f"[{job.id}] ... {job.output.dropped} bytes of earlier output dropped")
+            if data:
+                notes.append(data.decode("utf-8", "replace").rstrip("\n"))
+            notes.append(job.describe())
+        return notes
+
+    def signal(self, job, sig):
+        if job.done.is_set():
+            return
+        try:
+            if runner.IS_WINDOWS:
+                job.proc.terminate()
+            else:
+                os.killpg(job.proc.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def foreground(self, job, sink):
+        """
+        Streams the job's output to sink until it exits. ctrl-c interrupts the job.
+        """
+        if job.status == "Stopped":
+            self.resume(job)
+        with self.lock:
+            # finished before we got here: it shouldn't also show up as a notification
+            if job in self.finished:
+                self.finished.remove(job)
+        self.loop.call_soon_threadsafe(self._attach, job, sink)
+        try:
+            while not job.done.wait(0.2):
+                pass
+        except KeyboardInterrupt:
+            self.signal(job, signal.SIGINT)
+            job.done.wait(2)
+        with self.lock:
+            self.jobs.pop(job.id, None)
+            if job in self.finished:
+                self.finished.remove(job)
+        # anything that arrived after the job exited but before the attach ran
+        data = job.output.drain()
+        if data:
+            sink(data)
+        return job.returncode
+
+    def resume(self, job):
+        if not runner.IS_WINDOWS:
+            self.signal(job, signal.SIGCONT)
+        job.status = "Running"
+
+    def stop(self, job):
+        if not runner.IS_WINDOWS:
+            self.signal(job, signal.SIGSTOP)
+            job.status = "Stopped"
+
+    def running(self):
+        with self.lock:
+            return [job for job in self.jobs.values() if not job.done.is_set()]
+
+    def listing(self):
+        with self.lock:
+            return [job.describe() for job in sorted(self.jobs.values(), key=lambda j: j.id)]
+
+
+_supervisor = None
+
+
+def supervisor(create=True):
+    """
+    The session's job supervisor; the event loop thread only starts once a job does.
+    """
+    global _supervisor
+    if _supervisor is None and create:
+        _supervisor = JobSupervisor()
+    return _supervisor
+
+
+def notifications():
+    sup = supervisor(create=False)
+    return sup.notifications() if sup is not None else []
+
+
+def is_background(command):
+    # `cmd &` but not `a && b`
+    return command.endswith("&") and not command.endswith("&&")
+
+
+def stdout_sink(data):
+    runner.write_chunk(sys.stdout, data)
@@ -1,4 +1,10 @@
+import os
+import sys
+import mmap
+import zlib
 import base64
+import binascii
+import itertools
 
 
 
@@ -9,47 +15,346 @@ import base64
 #Translator
 #To
 #Understand Base64
-def crypt(inp, fileee):
+
+# big files are streamed in chunks: 3 bytes of input are exactly 4 base64
+# characters, so encoding in multiples of 3 (and decoding in multiples of 4)
+# means every chunk stands on its own and memory stays the same no matter
+# how big the file is. (base85 works in 4 -> 5 blocks, same idea)
+ENCODE_CHUNK = 3 * 1024 * 1024
+DECODE_CHUNK = 4 * 1024 * 1024
+# files at least this big get memory mapped instead of read()
+MMAP_MIN = 16 * 1024 * 1024
+
+_WHITESPACE = b" \t\r\n\v\f"
+_WHITESPACE_CHARS = [bytes([c]) for c in _WHITESPACE]
+
+
+# ---codecs
+#
+# a codec is an optional compression stage plus a text encoding, named like
+# "zlib+b64". everything except plain b64 gets a one line header
+#
+#   #littu:zlib+b64
+#
+# so decrypt/decode_file can tell what they're looking at. '#' is not a
+# base64 character, so a file without the header is an old plain base64 one
+HEADER = b"#littu:"
+DEFAULT_CODEC = "b64"
+
+
+class Encoding:
+    __slots__ = ("name", "in_block", "out_block", "encode", "decode", "description")
+
+    def __init__(self, name, in_block, out_block, encode, decode, description=""):
+        self.name = name
+        self.in_block = in_block  # raw bytes per encoded block
+        self.out_block = out_block  # characters per encoded block
+        self.encode = encode
+        self.decode = decode
+        self.description = description
+
+
+class Compressor:
+    __slots__ = ("name", "compressor", "decompressor", "description")
+
+    def __init__(self, name, compressor, decompressor, description=""):
+        self.name = name
+        self.compressor = compressor  # () -> object with compress()/flush()
+        self.decompressor = decompressor  # () -> object with decompress()
+        self.description = description
+
+
+ENCODINGS = {}
+COMPRESSORS = {}
+
+
+def register_encoding(name, in_block, out_block, encode, decode, description=""):
+    ENCODINGS[name] = Encoding(name, in_block, out_block, encode, decode, description)
+
+
+def register_compressor(name, compressor, decompressor, description=""):
+    COMPRESSORS[name] = Compressor(name, compressor, decompressor, description)
+
+
+register_encoding("b64", 3, 4, lambda d: binascii.b2a_base64(d, newline=False), binascii.a2b_base64,
+                  "standard base64 (the classic littu format)")
+register_encoding("urlsafe", 3, 4, base64.urlsafe_b64encode, base64.urlsafe_b64decode,
+                  "base64 with - and _ instead of + and /")
+register_encoding("b85", 4, 5, lambda d: base64.b85encode(d), base64.b85decode,
+                  "base85, 25% overhead instead of 33%")
+register_encoding("b32", 5, 8, base64.b32encode, base64.b32decode,
+                  "base32, case insensitive, 60% overhead")
+register_compressor("zlib", lambda: zlib.compressobj(6), zlib.decompressobj, "deflate, fast")
+try:
+    import bz2
+
+    register_compressor("bz2", lambda: bz2.BZ2Compressor(9), bz2.BZ2Decompressor, "bzip2, slower, smaller")
+except ImportError:
+    pass
+try:
+    import lzma
+
+    register_compressor("lzma", lambda: lzma.LZMACompressor(preset=6), lzma.LZMADecompressor, "xz, slowest, smallest")
+except ImportError:
+    pass
+
+
+def parse_codec(name):
     """
-    Base64 encodes the given input string and saves it to a file.
+    "zlib+b64" -> (Compressor or None, Encoding). Raises ValueError for unknown names.
     """
+    compress_name, _, encoding_name = name.rpartition("+")
+    if encoding_name not in ENCODINGS:
+        raise ValueError(f"unknown encoding {encoding_name!r} (have: {', '.join(ENCODINGS)})")
+    if compress_name and compress_name not in COMPRESSORS:
+        raise ValueError(f"unknown compression {compress_name!r} (have: {', '.join(COMPRESSORS)})")
+    return (COMPRESSORS[compress_name] if compress_name else None), ENCODINGS[encoding_name]
 
 
-    # The input to b64encode must be bytes. We encode the string to bytes using UTF-8.
-    input_bytes = inp.encode('utf-8')
-    encoded_bytes = base64.b64encode(input_bytes)
+def codec_names():
+    for encoding in ENCODINGS:
+        yield encoding
+    for compressor in COMPRESSORS:
+        for encoding in ENCODINGS:
+            yield f"{compressor}+{encoding}"
+
+
+def header_for(codec):
+    if codec == DEFAULT_CODEC:
+        return b""
+    return HEADER + codec.encode() + b"\n"
+
+
+def _blocks(chunks, block):
+    # re-chunk a byte stream so every piece is a whole number of blocks
+    carry = b""
+    for data in chunks:
+        if carry:
+            data = carry + data
+        cut = len(data) - len(data) % block
+        carry = bytes(data[cut:])
+        if cut:
+            yield data[:cut]
+    if carry:
+        yield carry
+
+
+def _as_bytes(chunks):
+    for chunk in chunks:
+        yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def _compressed(chunks, compressor):
+    c = compressor.compressor()
+    for chunk in chunks:
+        out = c.compress(chunk)
+        if out:
+            yield out
+    yield c.flush()
+
+
+def _decompressed(chunks, compressor):
+    d = compressor.decompressor()
+    for chunk in chunks:
+        out = d.decompress(chunk)
+        if out:
+            yield out
+    flush = getattr(d, "flush", None)
+    if flush is not None:
+        out = flush()
+        if out:
+            yield out
+
+
+def encode_chunks(chunks, codec=DEFAULT_CODEC):
+    """
+    Encodes a stream of byte chunks with codec, yielding encoded bytes as it
+    goes (header first). Leftover bytes wait for the next chunk so every piece
+    is a whole number of blocks (multiples of 3 for base64).
+    """
+    compressor, encoding = parse_codec(codec)
+    header = header_for(codec)
+    if header:
+        yield header
+    chunks = _as_bytes(chunks)
+    if compressor is not None:
+        chunks = _compressed(chunks, compressor)
+    for data in _blocks(chunks, encoding.in_block):
+        yield encoding.encode(data)
+
+
+def _stripped(chunks):
+    for chunk in chunks:
+        data = bytes(chunk)
+        # memchr is a lot cheaper than translate, most files have no line breaks anyway
+        if any(ws in data for ws in _WHITESPACE_CHARS):
+            data = data.translate(None, _WHITESPACE)
+        yield data
+
+
+def detect_codec(chunks):
+    """
+    Looks at the start of an encoded stream: returns (codec name, chunks with the header taken off).
+    """
+    chunks = iter(_as_bytes(chunks))
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= len(HEADER) or not HEADER.startswith(head):
+            break
+    if not head.startswith(HEADER):
+        return DEFAULT_CODEC, itertools.chain([head], chunks)
+    while b"\n" not in head:
+        more = next(chunks, None)
+        if more is None:
+            break
+        head += more
+    line, _, rest = head.partition(b"\n")
+    name = line[len(HEADER):].strip().decode('ascii', 'replace')
+    parse_codec(name)  # unknown codec: say so now, not halfway through
+    return name, itertools.chain([rest], chunks)
+
+
+def decode_chunks(chunks, codec=None):
+    """
+    The other way around: encoded text in (any chunking, newlines are fine),
+    raw bytes out. codec=None reads it from the header (plain base64 if there's none).
+    """
+    if codec is None:
+        codec, chunks = detect_codec(chunks)
+    compressor, encoding = parse_codec(codec)
+    blocks = _blocks(_stripped(_as_bytes(chunks)), encoding.out_block)
+    decoded = (encoding.decode(data) for data in blocks if data)
+    if compressor is not None:
+        decoded = _decompressed(decoded, compressor)
+    for data in decoded:
+        if data:
+            yield data
+
+
+def _read_chunks(f, size):
+    """
+    Chunks of an open binary file, memory mapped when it's a big regular file.
+    """
+    try:
+        length = os.fstat(f.fileno()).st_size
+    except (OSError, AttributeError, ValueError):
+        length = 0
+    if length >= MMAP_MIN:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            if hasattr(m, "madvise"):
+                m.madvise(mmap.MADV_SEQUENTIAL)
+            for start in range(0, length, size):
+                yield m[start:start + size]
+                # done with those pages, don't let them pile up in our RSS
+                if hasattr(m, "madvise") and start % mmap.PAGESIZE == 0:
+                    m.madvise(mmap.MADV_DONTNEED, start, min(size, length - start))
+        return
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def _chunk_size(size, block):
+    return max(block, size - size % block)
+
+
+def encode_stream(src, dst, chunk_size=ENCODE_CHUNK, codec=DEFAULT_CODEC):
+    """
+    Encodes everything from the binary file object src into dst. Returns bytes written.
+    """
+    _, encoding = parse_codec(codec)
+    written = 0
+    for piece in encode_chunks(_read_chunks(src, _chunk_size(chunk_size, encoding.in_block)), codec):
+        dst.write(piece)
+        written += len(piece)
+    return written
+
+
+def decode_stream(src, dst, chunk_size=DECODE_CHUNK, codec=None):
+    """
+    Decodes from the binary file object src into dst (codec from the header
+    unless given). Returns bytes written.
+    """
+    written = 0
+    # chunk alignment is sorted out in decode_chunks, any size works here
+    for piece in decode_chunks(_read_chunks(src, chunk_size), codec):
+        dst.write(piece)
+        written += len(piece)
+    return written
+
+
+def _open(path, mode):
+    # "-" is stdin/stdout, like every other cli tool
+    if path == "-":
+        stream = sys.stdin if "r" in mode else sys.stdout
+        return os.fdopen(os.dup(stream.fileno()), mode)
+    return open(path, mode)
+
 
-    # To write the encoded data to a file in text mode, we must decode it back to a string.
-    encoded_string = encoded_bytes.decode('utf-8')
+def encode_file(src_path, dst_path, codec=DEFAULT_CODEC):
+    """
+    Encodes any file (binary is fine) into dst_path, in constant memory.
+    """
+    with _open(src_path, 'rb') as src, _open(dst_path, 'wb') as dst:
+        return encode_stream(src, dst, codec=codec)
+
+
+def decode_file(src_path, dst_path, codec=None):
+    """
+    Decodes an encoded file back into the original bytes at dst_path.
+    """
+    with _open(src_path, 'rb') as src, _open(dst_path, 'wb') as dst:
+        return decode_stream(src, dst, codec=codec)
+
+
+def encode_bytes(data, codec=DEFAULT_CODEC):
+    return b"".join(encode_chunks([data], codec))
+
+
+def decode_bytes(data, codec=None):
+    return b"".join(decode_chunks([data], codec))
+
+
+def crypt(inp, fileee, codec=DEFAULT_CODEC):
+    """
+    Base64 encodes the given input string (or bytes) and saves it to a file.
+    Pass codec (like "zlib+b64") for anything other than plain base64.
+    """
+
+
+    # The input to b64encode must be bytes. We encode the string to bytes using UTF-8.
+    input_bytes = inp.encode('utf-8') if isinstance(inp, str) else inp
+    encoded_bytes = encode_bytes(input_bytes, codec)
 
-    with open(fileee, 'w') as f:
-        f.write(encoded_string)
+    with open(fileee, 'wb') as f:
+        f.write(encoded_bytes)
 
-def cryptfile(filepath):
+def cryptfile(filepath, output=None, codec=DEFAULT_CODEC):
     """
-    Reads the content of a text file and 'encrypts' it using the crypt function.
+    Encodes the content of a file (text or binary) into output, filepath + ".b64" by default.
     """
+    if output is None:
+        output = filepath + ".b64"
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        crypt(content)
-        print(f"Successfully encoded the content of '{filepath}'.")
+        encode_file(filepath, output, codec)
+        print(f"Successfully encoded the content of '{filepath}' into '{output}'.")
+        return output
     except FileNotFoundError:
         print(f"Error: The file '{filepath}' was not found.")
     except Exception as e:
         print(f"An error occurred: {e}")
+    return None
 
 def decrypt(fileuwant):
     """
-    Reads a Base64 encoded file, decodes it, and returns the original string.
+    Reads an encoded file (plain base64 or anything with a #littu: header), decodes it, and returns the original string.
     """
     try:
-        with open(fileuwant, 'r', encoding='utf-8') as f:
-            encoded_string = f.read()
-
-        # The input to b64decode must be bytes. We encode the string to bytes using UTF-8.
-        encoded_bytes = encoded_string.encode('utf-8')
-        decoded_bytes = base64.b64decode(encoded_bytes)
+        with open(fileuwant, 'rb') as f:
+            decoded_bytes = b"".join(decode_chunks(_read_chunks(f, DECODE_CHUNK)))
 
         # Decode the bytes back to a string.
         original_string = decoded_bytes.decode('utf-8')
@@ -61,15 +366,326 @@ def decrypt(fileuwant):
         print(f"An error occurred during decryption: {e}")
         return None
 
+
+# ---batch mode: whole directory trees across all cores
+
+# small files get bundled together so the pool isn't all pickling overhead
+BUNDLE_BYTES = 8 * 1024 * 1024
+
+
+class BatchResult:
+    __slots__ = ("done", "skipped", "errors", "bytes_in", "elapsed")
+
+    def __init__(self):
+        self.done = []
+        self.skipped = []
+        self.errors = []  # (path, "what went wrong")
+        self.bytes_in = 0
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return (f"<BatchResult done={len(self.done)} skipped={len(self.skipped)} "
+                f"errors={len(self.errors)} bytes_in={self.bytes_in} elapsed={self.elapsed:.2f}s>")
+
+
+def output_path(path, action, out_dir=None, root=None):
+    """
+    Where batch() writes path: FILE.b64 when encoding, FILE without .b64 when decoding.
+    """
+    if action == "encode":
+        name = path + ".b64"
+    elif path.endswith(".b64"):
+        name = path[:-4]
+    else:
+        name = path + ".out"
+    if out_dir:
+        name = os.path.join(out_dir, os.path.relpath(name, root or os.getcwd()))
+    return name
+
+
+def expand_targets(targets, action):
+    """
+    (path, root) for every file matched by the given files, globs and directories.
+    Directories are walked: encoding skips .b64 files in them, decoding only takes .b64 files.
+    """
+    import glob
+
+    seen = set()
+    for target in targets:
+        if os.path.isdir(target):
+            for dirpath, _, filenames in os.walk(target):
+                for filename in filenames:
+                    if filename.endswith(".b64") != (action == "decode"):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    if path not in seen:
+                        seen.add(path)
+                        yield path, target
+            continue
+        matches = glob.glob(target, recursive=True) if glob.has_magic(target) else [target]
+        for path in matches:
+            if os.path.isdir(path) or path in seen:
+                continue
+            seen.add(path)
+            yield path, None
+
+
+def _convert(action, src, dst, codec):
+    parent = os.path.dirname(dst)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    # write next to it and rename, so a half written file never looks up to date
+    part = dst + ".part"
+    try:
+        if action == "encode":
+            encode_file(src, part, codec)
+        else:
+            decode_file(src, part)
+        os.replace(part, dst)
+    except BaseException:
+        try:
+            os.remove(part)
+        except OSError:
+            pass
+        raise
+
+
+def _run_bundle(action, pairs, codec):
+    # runs in the worker processes
+    results = []
+    for src, dst, size in pairs:
+        try:
+            _convert(action, src, dst, codec)
+            results.append((src, size, None))
+        except Exception as e:
+            results.append((src, size, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _bundles(jobs):
+    # biggest files first so the last worker isn't stuck with a huge one at the end
+    jobs = sorted(jobs, key=lambda job: job[2], reverse=True)
+    bundle = []
+    size = 0
+    for job in jobs:
+        bundle.append(job)
+        size += job[2]
+        if size >= BUNDLE_BYTES:
+            yield bundle
+            bundle = []
+            size = 0
+    if bundle:
+        yield bundle
+
+
+def batch(targets, action="encode", out_dir=None, workers=None, force=False, progress=None, codec=DEFAULT_CODEC):
+    """
+    Encodes (or decodes) every file matched by targets (files, globs, directories)
+    on a process pool. Files whose output is already newer than the input are
+    skipped unless force. Errors are collected per file in the result, not printed.
+    progress(files_done, files_total, bytes_done, bytes_total) is called as work completes.
+    codec only matters for encoding, decoding reads it from each file.
+    """
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if action not in ("encode", "decode"):
+        raise ValueError(f"action should be encode or decode, not {action!r}")
+    parse_codec(codec)
+    started = time.perf_counter()
+    result = BatchResult()
+    jobs = []
+    for path, root in expand_targets(targets, action):
+        dst = output_path(path, action, out_dir, root)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            result.errors.append((path, f"{type(e).__name__}: {e}"))
+            continue
+        if not force:
+            try:
+                if os.stat(dst).st_mtime_ns >= st.st_mtime_ns:
+                    result.skipped.append(path)
+                    continue
+            except OSError:
+                pass
+        jobs.append((path, dst, st.st_size))
+
+    total_files = len(jobs)
+    total_bytes = sum(job[2] for job in jobs)
+    files_done = 0
+
+    def collect(results):
+        nonlocal files_done
+        for src, size, error in results:
+            files_done += 1
+            result.bytes_in += size
+            if error is None:
+                result.done.append(src)
+            else:
+                result.errors.append((src, error))
+        if progress is not None:
+            progress(files_done, total_files, result.bytes_in, total_bytes)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or total_files <= 1:
+        for bundle in _bundles(jobs):
+            collect(_run_bundle(action, bundle, codec))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_bundle, action, bundle, codec): bundle for bundle in _bundles(jobs)}
+            for future in as_completed(futures):
+                try:
+                    collect(future.result())
+                except Exception as e:
+                    # the worker itself died, blame every file it had
+                    collect([(src, size, f"{type(e).__name__}: {e}") for src, _, size in futures[future]])
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _print_progress(files_done, files_total, bytes_done, bytes_total):
+    pct = 100.0 * bytes_done / bytes_total if bytes_total else 100.0
+    end = "\n" if files_done == files_total else ""
+    print(f"\r{files_done}/{files_total} files, {bytes_done / 1e6:.1f}/{bytes_total / 1e6:.1f} MB ({pct:.0f}%)",
+          end=end, file=sys.stderr, flush=True)
+
+
+# ---benchmark: which codec for this kind of data?
+
+class BenchRow:
+    __slots__ = ("codec", "encode_seconds", "decode_seconds", "size", "input_size")
+
+    def __init__(self, codec, encode_seconds, decode_seconds, size, input_size):
+        self.codec = codec
+        self.encode_seconds = encode_seconds
+        self.decode_seconds = decode_seconds
+        self.size = size
+        self.input_size = input_size
+
+    def mbps(self, seconds):
+        return self.input_size / seconds / 1e6 if seconds else float("inf")
+
+    @property
+    def ratio(self):
+        return self.size / self.input_size if self.input_size else 0.0
+
+
+def bench(sample_path, codecs=None, max_bytes=64 * 1024 * 1024, repeat=3):
+    """
+    Encodes and decodes (up to max_bytes of) sample_path with every codec, in
+    memory, best of repeat runs. Returns (rows, fastest, smallest).
+    """
+    import time
+
+    with open(sample_path, 'rb') as f:
+        sample = f.read(max_bytes)
+    pieces = [sample[i:i + ENCODE_CHUNK] for i in range(0, len(sample), ENCODE_CHUNK)] or [b""]
+    rows = []
+    for codec in codecs or list(codec_names()):
+        enc_best = dec_best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            encoded = list(encode_chunks(pieces, codec))
+            t1 = time.perf_counter()
+            decoded = b"".join(decode_chunks(encoded))
+            t2 = time.perf_counter()
+            enc_best = min(enc_best, t1 - t0)
+            dec_best = min(dec_best, t2 - t1)
+        if decoded != sample:
+            raise ValueError(f"{codec} did not round trip, that's a bug")
+        rows.append(BenchRow(codec, enc_best, dec_best, sum(len(p) for p in encoded), len(sample)))
+    fastest = min(rows, key=lambda r: r.encode_seconds + r.decode_seconds)
+    smallest = min(rows, key=lambda r: (r.size, r.encode_seconds + r.decode_seconds))
+    return rows, fastest, smallest
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="littu", description="streaming base64 for files of any size")
+    sub = parser.add_subparsers(dest="action", required=True)
+    for action in ("encode", "decode"):
+        p = sub.add_parser(action, help=f"{action} a file ('-' for stdin/stdout)")
+        p.add_argument("input")
+        p.add_argument("output", nargs="?", default="-")
+        p.add_argument("-c", "--codec", default=DEFAULT_CODEC if action == "encode" else None,
+                       help="codec, e.g. b64, b85, urlsafe, zlib+b64 (decode reads it from the file)")
+    sub.add_parser("codecs", help="list the available codecs")
+    p = sub.add_parser("bench", help="time every codec on a sample file and recommend one")
+    p.add_argument("sample")
+    p.add_argument("--max-mb", type=float, default=64, help="only use the first N MB of the sample (default 64)")
+    p.add_argument("-c", "--codec", action="append", help="only these codecs (repeatable)")
+    p = sub.add_parser("batch", help="encode/decode many files (globs, directories) on all cores")
+    p.add_argument("mode", choices=["encode", "decode"])
+    p.add_argument("targets", nargs="+", help="files, globs ('logs/**/*.txt') or directories")
+    p.add_argument("-o", "--out-dir", help="write outputs under this directory instead of next to the inputs")
+    p.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per core)")
+    p.add_argument("-f", "--force", action="store_true", help="redo files whose output is already up to date")
+    p.add_argument("-q", "--quiet", action="store_true", help="no progress line")
+    p.add_argument("-c", "--codec", default=DEFAULT_CODEC, help="codec to encode with (default b64)")
+    args = parser.parse_args(argv)
+    if args.action == "codecs":
+        for name, encoding in ENCODINGS.items():
+            print(f"{name:<10} {encoding.description}")
+        for name, compressor in COMPRESSORS.items():
+            print(f"{name + '+':<10} {compressor.description} (put in front of an encoding)")
+        return 0
+    if args.action == "bench":
+        try:
+            rows, fastest, smallest = bench(args.sample, args.codec, int(args.max_mb * 1024 * 1024))
+        except (OSError, ValueError) as e:
+            print(f"littu: {e}", file=sys.stderr)
+            return 1
+        print(f"{'codec':<14} {'encode MB/s':>12} {'decode MB/s':>12} {'size':>12} {'ratio':>7}")
+        for r in rows:
+            print(f"{r.codec:<14} {r.mbps(r.encode_seconds):>12.1f} {r.mbps(r.decode_seconds):>12.1f} "
+                  f"{r.size:>12} {r.ratio:>7.3f}")
+        print(f"fastest: {fastest.codec}   smallest: {smallest.codec}")
+        return 0
+    if args.action == "batch":
+        try:
+            result = batch(args.targets, args.mode, out_dir=args.out_dir, workers=args.jobs, force=args.force,
+                           progress=None if args.quiet else _print_progress, codec=args.codec)
+        except ValueError as e:
+            print(f"littu: {e}", file=sys.stderr)
+            return 2
+        print(f"{len(result.done)} {args.mode}d, {len(result.skipped)} up to date, "
+              f"{len(result.errors)} failed in {result.elapsed:.2f}s", file=sys.stderr)
+        for path, error in result.errors:
+            print(f"  {path}: {error}", file=sys.stderr)
+        return 1 if result.errors else 0
+    try:
+        if args.action == "encode":
+            encode_file(args.input, args.output, args.codec)
+        else:
+            decode_file(args.input, args.output, args.codec)
+    except (OSError, ValueError, zlib.error, EOFError) as e:
+        print(f"littu: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
 # ---How 2 Use
 # littu.crypt(the text you want to encrypt, the file u want to save it to)
 # littu.decrypt(the file u gon decrypt)
-# littu.cryptfile(the file u want to encrypt)
+# littu.cryptfile(the file u want to encrypt, where to put it (optional))
+# littu.encode_file(in, out) / littu.decode_file(in, out) for big or binary files
 #ex:
 #
 #littu.crypt("i miss my ex", file.txt)
 #that is going to encrypt the text into base64,and save it into an file
 #
+#from the terminal:
+#python littu.py encode movie.mkv movie.b64
+#python littu.py decode movie.b64 movie.mkv
+#python littu.py batch encode logs/ 'dumps/**/*.bin' -j 8
+#python littu.py encode -c zlib+b64 app.log app.log.b64   (decode figures the codec out by itself)
+#python littu.py bench app.log    <- which codec is fastest/smallest for this kind of file
+#(or littu.batch(["logs/"], "encode") from python, it hands back a BatchResult)
 #
 #
 # writtn by hyuuwu, AkA Luiz
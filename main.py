@@ -1,41 +1,125 @@
-import os
-import webbrowser as wb
 import time
+
+# everything before this line is interpreter startup, everything after counts
+# towards the time-to-prompt we report in fast boot
+BOOT_T0 = time.perf_counter()
+
+import os
 import subprocess as sub
 import sys
 import platform
 import threading
-import littu as lil
-import pyfiglet
 import argparse
-import install
 import getpass
-import bcrypt
+import signal
+
+import jobs
+import runner
+import auth
+import config
+import engine
+import pipeline
+from commands import command, load_plugins, lookup
+
+# the heavy stuff (webbrowser, pyfiglet, bcrypt, install, littu, the audio) is
+# imported inside the commands that need it so launching the shell stays cheap
+
+# lives next to config.json (config.config_dir()), see settings_file()
+SETTINGS_FILE = "yay.conf"
+
+# yay.conf contents (plus whatever the command line overrides), loaded in main()
+settings = {}
+
+# runner.Limits for external commands (timeout, limit_cpu, limit_mem_mb), None = no guards
+limits = None
+
+
+def settings_file():
+    """
+    Where yay.conf lives. One left in the launch directory by older versions
+    gets moved there the first time, like the old loose config files.
+    """
+    path = os.path.join(config.config_dir(), SETTINGS_FILE)
+    if not os.path.exists(path) and os.path.isfile(SETTINGS_FILE):
+        import shutil
+
+        try:
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            shutil.move(SETTINGS_FILE, path)
+        except OSError:
+            # can't move it, keep reading the old one
+            return SETTINGS_FILE
+    return path
+
+
+def load_settings():
+    """
+    Reads yay.conf (key=value per line, # for comments). Missing file = defaults.
+    """
+    settings = {}
+    try:
+        with open(settings_file(), "r") as f:
+            for line in f:
+                key, sep, value = line.partition("=")
+                key = key.strip()
+                if sep and key and not key.startswith("#"):
+                    settings[key] = value.strip()
+    except OSError:
+        pass
+    return settings
+
+
+def setting_on(settings, key):
+    return settings.get(key, "").lower() in ("1", "true", "yes", "on")
+
 
-parser = argparse.ArgumentParser(
-    description="Deletes all the old config files. its like a factory reset"
-)
-parser.add_argument("--facreset", "-f", action="store_true", help="factory resets")
-args = parser.parse_args()
-if args.facreset:
-    os.remove("password")
-    os.remove("hostname")
-    os.remove("dontdeletethis.file")
-    os.remove("user")
-    print("facresetted")
+def load_limits():
+    """
+    The guards against runaway commands from yay.conf: timeout (seconds of
+    wall time), limit_cpu (seconds of cpu) and limit_mem_mb. None when none
+    are set.
+    """
+    values = {}
+    for key, field, scale in (("timeout", "timeout", 1), ("limit_cpu", "cpu", 1), ("limit_mem_mb", "memory", 1024 * 1024)):
+        if not settings.get(key):
+            continue
+        try:
+            values[field] = float(settings[key]) * scale
+        except ValueError:
+            print(f"yay.conf: {key} should be a number", file=sys.stderr)
+    return runner.Limits(**values) if values else None
 
 
-try:
-    from playsound3 import playsound
-except ImportError:
-    print("Warning: playsound not installed. Audio will be disabled.")
-    playsound = None
+# time spent blocked on the user (Enter, passwords...) so it can be taken out
+# of the time-to-prompt number
+input_wait = 0.0
+
+
+def ask(prompt, secret=False):
+    global input_wait
+    t0 = time.perf_counter()
+    try:
+        if secret:
+            return getpass.getpass(prompt)
+        return input(prompt)
+    finally:
+        input_wait += time.perf_counter() - t0
+
+
+def background(target, *args):
+    t = threading.Thread(target=target, args=args, daemon=True)
+    t.start()
+    return t
 
 
 def play_audio(filename):
-    if playsound and os.path.exists(filename):
-        # Run in a separate thread so it doesn't block execution
-        threading.Thread(target=playsound, args=(filename,), daemon=True).start()
+    """
+    Queues filename on the audio mixer and returns how long it plays for
+    (0 when there's no sound on this machine).
+    """
+    import audio
+
+    return audio.play(filename)
 
 
 chime = ""
@@ -45,216 +129,1019 @@ def run(app):
     sub.run([app])
 #variables...?
 
-CONFIG_FILE = "dontdeletethis.file"
+# user, hostname and password live in config.json now (see config.py)
+store = config.store()
 
-def is_first_run():
-    if not os.path.exists(CONFIG_FILE):
-        # This is the first run
-        with open(CONFIG_FILE, "w") as f:
-            f.write(
-                "hi,this is a file to check if the user ran this file. ever. if you want to delete it,its yo choice,but you gon redo the setup"
-            )
-        return True
-    else:
-        # Not the first run
-        return False
+ihateicks = "User"
+hostnameeee = "localhost"
 
 
-def list_files():
-    directory_path = os.getcwd()  # Default to current directory
-    try:
-        contents = os.listdir(directory_path)
-        print(directory_path)
-        for item in contents:
-            print(item)
-    except OSError as error:
-        print("Error listing directory:", error)
+def is_first_run():
+    return not store.is_setup()
 
 
 def audi0(filx):
     # im kms today fahhhhhh
-    pyfiglet.figlet_format("SUPER AUDIO PLAYER 2000", font="slant")
-    time.sleep(5)
-    blyat = playsound(filx, block=False)
-    while True:
-        asap = input("say stop to exit")
-        if asap == "stop":
-            blyat.stop()
-            break
-        else:
-            print("bet")
+    try:
+        import pyfiglet
 
+        print(pyfiglet.figlet_format("SUPER AUDIO PLAYER 2000", font="slant"))
+    except ImportError:
+        print("SUPER AUDIO PLAYER 2000")
+    audioplayer(["play", filx])
+    print("it plays in the background, `audioplayer stop` to stop it (audioplayer help for the rest)")
 
-def cd(new_path):
-    try:
-        os.chdir(new_path)
-        print(f"Directory changed to: {os.getcwd()}")
-    except OSError as error:
-        print("Error changing directory:", error)
+
+AUDIOPLAYER_HELP = """audioplayer play [file.wav ...]   play (a new playlist, if files are given)
+audioplayer add file.wav ...      queue more
+audioplayer pause / resume / stop
+audioplayer next / prev
+audioplayer seek 1:30 | +10 | -10
+audioplayer vol 0..2
+audioplayer list / clear
+audioplayer status                what's playing
+audioplayer                       asks for a file, like it always did"""
+
+
+def audioplayer(argv):
+    import player
+
+    p = player.player()
+    if not p.engine.available:
+        print("no sound output on this machine (install sounddevice or alsa-utils, or set YAY_AUDIO_OUT=file.wav)")
+        return 1
+    action = argv[0] if argv else "status"
+    args = argv[1:]
+    if action == "play":
+        if not p.play(*args):
+            print("nothing to play, give it some .wav files")
+            return 1
+    elif action == "add" and args:
+        p.add(*args)
+    elif action == "pause":
+        p.pause()
+    elif action == "resume":
+        p.resume()
+    elif action == "stop":
+        p.stop()
+    elif action in ("next", "prev"):
+        p.skip(1 if action == "next" else -1)
+    elif action == "seek" and args:
+        try:
+            p.seek(*player.parse_time(args[0]))
+        except ValueError:
+            print("seek: use seconds or m:ss, +N/-N to jump")
+            return 1
+    elif action == "vol" and args:
+        try:
+            p.set_volume(float(args[0]))
+        except ValueError:
+            print("vol: a number, 1 is normal")
+            return 1
+    elif action == "list":
+        print("\n".join(p.listing()) or "playlist is empty")
+        return 0
+    elif action == "clear":
+        p.clear()
+    elif action == "status":
+        pass
+    else:
+        print(AUDIOPLAYER_HELP)
+        return 0 if action == "help" else 2
+    if p.error:
+        print("skipped", p.error)
+        p.error = None
+    print(p.status())
+    return 0
 
 
 def run_subprocess(shell_cmd):
     try:
-        # prefer shell=False style when possible; allow shell-like string for convenience
-        if platform.system() == "Windows":
-            completed = sub.run(
-                ["powershell", "-Command", shell_cmd], capture_output=True, text=True
-            )
-        else:
-            completed = sub.run(shell_cmd, shell=True, capture_output=True, text=True)
-        if completed.returncode == 0:
-            print(completed.stdout.strip())
+        argv = None
+        # the guards and `time` need the command as our own child, coproc's sh can't give that
+        use_coproc = (
+            settings.get("backend") == "coproc"
+            and not runner.IS_WINDOWS
+            and not setting_on(settings, "pty")
+            and not limits
+            and not engine.current().timing
+        )
+        if use_coproc:
+            import coproc
+
+            # what the command reads, by name, or None: our stdin is a pipe
+            # or a file only a child of ours can inherit
+            source = coproc.stdin_source(engine.current().stdin)
+            use_coproc = source is not None
+        if not use_coproc and not runner.IS_WINDOWS:
+            # a fresh sh only knows the commands on PATH, so the PATH index
+            # can say "not found" without starting one, and a plain
+            # `program args` doesn't need the sh at all
+            import completion
+
+            argv = completion.simple_argv(shell_cmd)
+            if argv is not None:
+                program = completion.path_index().which(argv[0])
+                if program is None:
+                    print(f"yay: {argv[0]}: command not found", file=sys.stderr)
+                    return 127
+                argv = [program] + argv[1:]
+        if setting_on(settings, "capture_output"):
+            # old behaviour: wait for the command, then print what it said
+            completed = runner.run_captured(shell_cmd)
+            if completed.returncode == 0:
+                print(completed.stdout.strip())
+            else:
+                print("Command returned nonzero status.")
+                print(completed.stderr.strip())
+            return completed.returncode
+        if use_coproc:
+            # one long lived sh for the whole session, see coproc.py
+            code = coproc.session().run(
+                shell_cmd,
+                on_stdout=lambda data: runner.write_chunk(sys.stdout, data),
+                on_stderr=lambda data: runner.write_chunk(sys.stderr, data),
+                stdin=source,
+            ).returncode
         else:
-            print("Command returned nonzero status.")
-            print(completed.stderr.strip())
-        return completed.returncode
+            # the session says what they read: /dev/null when the script itself
+            # comes in on stdin (they mustn't eat it) or under Session.run
+            stdin = engine.current().stdin
+            code = runner.run_streaming(argv or shell_cmd, use_pty=setting_on(settings, "pty"), stdin=stdin, limits=limits)
+            if code == runner.TIMED_OUT and limits and limits.timeout is not None:
+                print(f"yay: timed out after {limits.timeout:g}s", file=sys.stderr)
+                return code
+        # a failing `if`/`while` condition is an answer, not an error
+        if code != 0 and not (_script is not None and _script.conditions):
+            print("Command returned nonzero status.", file=sys.stderr if batch_mode else sys.stdout)
+        return code
     except Exception as e:
         print("Error running command:", e)
         return -1
 
 
+# the command engine (engine.py) runs the lines and owns the builtins yaydroid
+# has too, the desktop brings its external runner and its way of asking
+shell = engine.session()
+shell.fallback = run_subprocess
+shell.ask = ask
+
+
+@command("kanye", help="Play Kanye song")
+def cmd_kanye(argv):
+    import webbrowser as wb
+    wb.open("https://www.youtube.com/watch?v=wuO4_P_8p-Q")
+    print("peak")
+
+
+@command("spaghetto", help="Secret video")
+def cmd_spaghetto(argv):
+    import webbrowser as wb
+    wb.open("https://www.youtube.com/watch?v=DgxPNW2iPQM")
+    print("spaghetto smosh")
+
+
+@command("exit", help="Exit YAYLinux", usage="exit [code] [--now]")
+def cmd_exit(argv):
+    code = 0
+    for arg in argv:
+        if arg.lstrip("-").isdigit():
+            code = int(arg)
+    if batch_mode:
+        # no goodbyes in scripts
+        sys.exit(code)
+    print("Exiting YAYLinux...")
+    if "player" in sys.modules:
+        sys.modules["player"].player().stop()
+    if "--now" not in argv and "-n" not in argv and play_audio("qq.wav"):
+        import audio
+
+        # the goodbye sound, for as long as it lasts but no more than exit_wait
+        try:
+            limit = float(settings.get("exit_wait", 4))
+        except ValueError:
+            limit = 4
+        audio.engine().wait(limit)
+    sys.exit(code)
+
+
+@command("set", help="set -e: stop at the first failing command, set +e: keep going", usage="set [-e|+e]")
+def cmd_set(argv):
+    global errexit
+    for arg in argv:
+        if arg in ("-e", "+e"):
+            errexit = arg == "-e"
+        else:
+            print(f"set: only -e / +e for now, not {arg}")
+            return 2
+    if not argv:
+        print("set -e" if errexit else "set +e")
+    return 0
+
+
+@command("vim", help="Text editor (Joke)")
+def cmd_vim(argv):
+    print("imagine vim in the big 26 😭")
+
+
+@command("ytb", help="YouTube downloader placeholder")
+def cmd_ytb(argv):
+    print("YouTube downloader placeholder")
+
+
+@command("opnytb", help="Opens YouTube")
+def cmd_opnytb(argv):
+    import webbrowser as wb
+    wb.open("https://www.youtube.com")
+
+
+@command("launcher", help="Install apps (-s search, -r remove, -q what's installed)", usage="launcher [app ... | -s TERM | -r app ... | -q [app ...]]")
+def cmd_launcher(argv):
+    import install
+    if not argv:
+        # as many as you like, spaces or commas in between
+        argv = input("What app do you want to install?\n:").replace(",", " ").split()
+    action, rest = argv[0], argv[1:]
+    if action == "-s" and rest:
+        found = install.search(" ".join(rest), limit=50)
+        for name, have in found:
+            print(f"{name} [installed]" if have else name)
+        return 0 if found else 1
+    if action == "-r" and rest:
+        return install.remove(rest)
+    if action == "-q":
+        versions = install.query(rest or None)
+        for name, version in versions.items():
+            print(f"{name} {version}" if version is not None else f"{name}: not installed")
+        return 0 if all(v is not None for v in versions.values()) else 1
+    return install.install(argv)
+
+
+@command("calc", help="Calculator")
+def cmd_calc(argv):
+    try:
+        firstn = float(input("first number: "))
+        secondn = float(input("second number: "))
+        print(firstn + secondn)
+        print("thanks 4 using")
+    except ValueError:
+        print("why u using letters instead of numbers?")
+        sys.exit("dont repeat that again >:( ")
+
+
+@command("source", help="View source code, or run a yayscript file", usage="source [file.yay [args]]")
+def cmd_source(argv):
+    if argv:
+        import yayscript
+
+        try:
+            return script().source(argv[0], argv[1:])
+        except OSError as e:
+            print(f"source: {argv[0]}: {e.strerror}")
+            return 1
+        except (yayscript.ScriptError, yayscript.ScriptExit) as e:
+            print(e)
+            return getattr(e, "status", 2)
+    import webbrowser as wb
+    print("you can view our source code here!")
+    wb.open("https://github.com/hyuuwu/yaylinux")
+
+
+@command("test", help="Check a condition, for if/while", usage="test EXPR  or  [ EXPR ]", aliases=["["])
+def cmd_test(argv):
+    import yayscript
+
+    return yayscript.test(argv)
+
+
+@command("audioplayer", help="plays audio files", usage="audioplayer [play|add|pause|resume|stop|next|prev|seek|vol|list|clear|status] ...")
+def cmd_audioplayer(argv):
+    if argv:
+        return audioplayer(argv)
+    graduation = input(
+        "whats the audio file you want to play?\n(insert the full path,or, if its in the same folder,just use the file name)\n> "
+    )
+    audi0(graduation)
+
+
+@command("neofetch", help="Displays computer information", usage="neofetch [--json]", stream=True)
+def cmd_neofetch(argv, stdin):
+    import sysinfo
+
+    info = sysinfo.collect()
+    if "--json" in argv:
+        import json
+
+        yield json.dumps(info, indent=2) + "\n"
+        return
+    yield sysinfo.neofetch(info, ihateicks)
+
+
+@command("top", help="Live process monitor (-b: print a snapshot instead)", usage="top [-b] [-n N] [-d SECS] [-s cpu|mem|pid|name|time] [-r] [-u USER] [-p PID,...] [-l LINES] [NAME]", stream=True)
+def cmd_top(argv, stdin):
+    if not os.path.isdir("/proc/self"):
+        yield "top: needs /proc, so linux only for now\n"
+        return 1
+    import top
+
+    try:
+        opts = top.parse_args(argv)
+    except ValueError as e:
+        yield f"{e}\n"
+        return 2
+    # in `top | grep x` stdout is still the terminal, but grep is the one reading
+    if opts.batch or batch_mode or pipeline.running() or not sys.stdin.isatty() or not sys.stdout.isatty():
+        return (yield from top.snapshot(opts))
+    top.interactive(opts)
+    return 0
+
+
+@command("dfjk", hidden=True)
+def cmd_dfjk(argv):
+    print("OSU Player be like")
+
+
+def job_or_complain(argv, name):
+    job = jobs.supervisor().get(argv[0] if argv else None)
+    if job is None:
+        print(f"{name}: no such job")
+    return job
+
+
+@command("jobs", help="List background jobs", stream=True)
+def cmd_jobs(argv, stdin):
+    sup = jobs.supervisor(create=False)
+    for line in sup.listing() if sup else []:
+        yield line + "\n"
+
+
+@command("littu-encode", help="base64 encode stdin (or the arguments)", usage="... | littu-encode [-c codec]", stream=True)
+def cmd_littu_encode(argv, stdin):
+    import littu as lil
+
+    codec = lil.DEFAULT_CODEC
+    if argv[:1] == ["-c"] and len(argv) > 1:
+        codec = argv[1]
+        argv = argv[2:]
+    try:
+        lil.parse_codec(codec)
+    except ValueError as e:
+        yield f"littu-encode: {e}\n"
+        return 2
+    yield from lil.encode_chunks(stdin if stdin is not None else [" ".join(argv)], codec)
+    yield b"\n"
+
+
+@command("littu-decode", help="decode littu output from stdin (or the arguments)", usage="... | littu-decode", stream=True)
+def cmd_littu_decode(argv, stdin):
+    import littu as lil
+
+    try:
+        yield from lil.decode_chunks(stdin if stdin is not None else argv)
+    except (ValueError, EOFError, OSError) as e:
+        yield f"littu-decode: {e}\n"
+        return 1
+
+
+@command("history", help="Show or search the command history", usage="history [N | all | grep TEXT | -c | compact]", stream=True)
+def cmd_history(argv, stdin):
+    import history
+
+    hist = history.history()
+    if argv[:1] in (["grep"], ["-s"]) and len(argv) > 1:
+        # indexed, newest first
+        found = hist.search(" ".join(argv[1:]))
+        for number, text in found:
+            yield f"{number:>6}  {text}\n"
+        return 0 if found else 1
+    if argv == ["-c"]:
+        hist.clear()
+        return 0
+    if argv == ["compact"]:
+        hist.compact()
+        yield f"history: kept the newest {hist.max_entries}\n"
+        return 0
+    if argv in (["all"], ["-a"]):
+        entries = hist.last()
+    else:
+        try:
+            entries = hist.last(int(argv[0]) if argv else 20)
+        except ValueError:
+            yield "usage: history [N | all | grep TEXT | -c | compact]\n"
+            return 2
+    block = []
+    for number, text in entries:
+        block.append(f"{number:>6}  {text}\n")
+        if len(block) >= 1024:
+            yield "".join(block)
+            block = []
+    yield "".join(block)
+    return 0
+
+
+@command("fg", help="Bring a background job to the foreground", usage="fg [%n]")
+def cmd_fg(argv):
+    job = job_or_complain(argv, "fg")
+    if job is None:
+        return 1
+    print(job.command)
+    code = jobs.supervisor().foreground(job, jobs.stdout_sink)
+    return code if code is not None else 130
+
+
+@command("bg", help="Resume a stopped job in the background", usage="bg [%n]")
+def cmd_bg(argv):
+    job = job_or_complain(argv, "bg")
+    if job is None:
+        return 1
+    jobs.supervisor().resume(job)
+    print(f"[{job.id}] {job.command} &")
+
+
+@command("kill", help="Signal a job (%n) or process", usage="kill [-SIG] %n|pid")
+def cmd_kill(argv):
+    sig = signal.SIGTERM
+    targets = list(argv)
+    if targets and targets[0].startswith("-") and len(targets) > 1:
+        name = targets.pop(0)[1:].upper()
+        try:
+            sig = signal.Signals(int(name)) if name.isdigit() else signal.Signals[name if name.startswith("SIG") else "SIG" + name]
+        except (KeyError, ValueError):
+            print(f"kill: unknown signal {name}")
+            return 1
+    if not targets or not all(t.startswith("%") for t in targets):
+        # plain pids, let the real kill deal with them
+        return run_subprocess("kill " + " ".join(argv))
+    sup = jobs.supervisor()
+    for spec in targets:
+        job = sup.get(spec)
+        if job is None:
+            print(f"kill: {spec}: no such job")
+            return 1
+        if sig == getattr(signal, "SIGSTOP", None):
+            sup.stop(job)
+        elif sig == getattr(signal, "SIGCONT", None):
+            sup.resume(job)
+        else:
+            sup.signal(job, sig)
+
+
+@command("wait", help="Wait for background jobs to finish", usage="wait [%n]")
+def cmd_wait(argv):
+    sup = jobs.supervisor(create=False)
+    if sup is None:
+        return 0
+    waiting = [job_or_complain(argv, "wait")] if argv else sup.running()
+    code = 0
+    for job in waiting:
+        if job is None:
+            return 127
+        job.done.wait()
+        code = job.returncode or 0
+    return code
+
+
+@command("stats", help="Per-command timings and resource use", usage="stats [on | off | reset | NAME]", stream=True)
+def cmd_stats(argv, stdin):
+    import stats
+
+    action = argv[0] if argv else None
+    if action == "on":
+        stats.enable()
+        yield "recording command stats (stats off to stop)\n"
+        return 0
+    if action == "off":
+        stats.disable()
+        return 0
+    rec = stats.recorder(create=False)
+    if rec is None:
+        yield "stats are off, `stats on` (or --stats, stats=on in yay.conf) to record\n"
+        return 1
+    if action == "reset":
+        rec.reset()
+        return 0
+    if action is None:
+        yield stats.table(rec.summary())
+        if not stats.enabled():
+            yield "(not recording right now)\n"
+        return 0
+    entry = rec.entries.get(action)
+    if entry is None:
+        yield f"stats: nothing recorded for {action}\n"
+        return 1
+    yield f"{action}: {entry.count} runs, last {len(entry.times)} shown\n"
+    yield stats.histogram(entry.times)
+    return 0
+
+
 def execute_command(command):
     command = command.strip()
     if not command:
-        return
+        return 0
+    # `time` is a keyword and times the whole line, & included
+    if jobs.is_background(command) and command.split(None, 1)[0] != "time":
+        command = command[:-1].rstrip()
+        if lookup(command.split(None, 1)[0]) is None:
+            job = jobs.supervisor().start(command)
+            print(f"[{job.id}] {job.proc.pid}")
+            return 0
+        print("builtins can't run in the background, running it now")
+    return shell.execute(command)
 
-    if command == "kanye":
-        wb.open("https://www.youtube.com/watch?v=wuO4_P_8p-Q")
-        print("peak")
-    elif command == "spaghetto":
-        wb.open("https://www.youtube.com/watch?v=DgxPNW2iPQM")
-        print("spaghetto smosh")
-    elif command == "ytb":
-        print("YouTube downloader placeholder")
-    elif command == "ls":
-        list_files()
-    elif command.startswith("cd"):
-        parts = command.split(" ", 1)
-        if len(parts) > 1:
-            directory = parts[1].strip()
-        else:
-            directory = input("Enter the directory path: ").strip()
-        cd(directory)
-    elif command == "exit":
-        print("Exiting YAYLinux...")
-        play_audio("qq.wav")
-        time.sleep(4)
-        sys.exit(0)
-    elif command == "launcher":
-        app = input("What app do you want to install?\n:")
-        install.install(app)
-    elif command == "help":
-        print(
-            "LIST OF COMMANDS:\nhelp: Show this help.\nkanye: Play Kanye song\nspaghetto: Secret video\nexit: Exit YAYLinux\ncd: Change directory\nls: List files\nvim: Text editor (Joke)\nytb: YouTube downloader placeholder\nopnytb: Opens YouTube\nlauncher: Install apps\ncalc: Calculator\nsource: View source code\nwhoamiyay: Show current user\n audioplayer: plays audio files\nneofetch: Displays computer information"
-        )
-    elif command == "vim":
-        print("imagine vim in the big 26 😭")
-    elif command == "source":
-        print("you can view our source code here!")
-        wb.open("https://github.com/hyuuwu/yaylinux")
-    elif command == "whoamiyay":
-        print(ihateicks)
-    elif command == "calc":
+
+def bcrypt_cost():
+    """
+    The bcrypt cost for this host: calibrated once against bcrypt_target_ms
+    (250 by default) and remembered in the config store along with the host it
+    was measured on.
+    """
+    host = platform.node()
+    if store.get("bcrypt_host") == host:
         try:
-            firstn = float(input("first number: "))
-            secondn = float(input("second number: "))
-            print(firstn + secondn)
-            print("thanks 4 using")
-        except ValueError:
-            print("why u using letters instead of numbers?")
-            sys.exit("dont repeat that again >:( ")
-    elif command == "opnytb":
-        wb.open("https://www.youtube.com")
-    elif command == "dfjk":
-        print("OSU Player be like")
-
-    elif command == "audioplayer":
-        graduation = input(
-            "whats the audio file you want to play?\n(insert the full path,or, if its in the same folder,just use the file name)\n> "
-        )
-        audi0(graduation)
-    elif command == "neofetch":
-        print(f"Distro: YayLinux v2.5\nUser: {ihateicks}\nHost System: {platform.system()}\nTerminal: YayTerm\nCpu: Intel 8080 With OC\nRam: 512Mb\n(-_-)zzz")
-    else:
-        run_subprocess(command)
+            return int(store.get("bcrypt_cost"))
+        except (TypeError, ValueError):
+            pass
+    try:
+        target = float(settings.get("bcrypt_target_ms", auth.DEFAULT_TARGET_MS))
+    except ValueError:
+        target = auth.DEFAULT_TARGET_MS
+    cost = auth.calibrate(target)
+    with store.edit() as data:
+        data["state"].update(bcrypt_cost=cost, bcrypt_host=host)
+    return cost
+
+
+def unlock_ttl():
+    try:
+        return float(settings.get("unlock_ttl", 0))
+    except ValueError:
+        return 0
 
 
-play_audio("q.wav")
+def preload_bcrypt():
+    # importing bcrypt pulls in the native extension, do it while the user types
+    try:
+        import bcrypt  # noqa: F401
+    except ImportError:
+        pass
 
-print(
-    "IBH (c)2010-2026 \nAll rights reserved ;)\n512 mb RAM : ok \n2.00ghz CPU: ok \n1000mb HDD : ok"
-)
-print(".")
-time.sleep(0.5)
-print(".")
-time.sleep(0.5)
-print(".")
 
-input("press Enter to continue...")
+def boot_chime():
+    # picking a sink and decoding happen off the boot path; qq.wav gets
+    # decoded now too so exit doesn't have to
+    play_audio("q.wav")
+    import audio
 
-print("welcome to YAY pyth-linux.\nY = yolo\nA= autism\nY = yeet")
+    audio.engine().preload("qq.wav")
 
-ihateicks = "User"
-hostnameeee = "localhost"
 
-if is_first_run():
-    # Clear/Create files
-    open("user", "w").close()
-    open("hostname", "w").close()
-    open("password", "w").close()
+def boot_sequence(fast):
+    background(boot_chime)
+
+    print(
+        "IBH (c)2010-2026 \nAll rights reserved ;)\n512 mb RAM : ok \n2.00ghz CPU: ok \n1000mb HDD : ok"
+    )
+    if fast:
+        return
+    print(".")
+    time.sleep(0.5)
+    print(".")
+    time.sleep(0.5)
+    print(".")
+
+    ask("press Enter to continue...")
+
 
-    ihateicks = input(
+def first_run_setup():
+    global ihateicks, hostnameeee
+    ihateicks = ask(
         "Hello user, we will kindly ask you to say your username \nInsert here: "
     )
-    with open("user", "w") as f:
-        f.write(ihateicks)
 
     print("HEYYYY", ihateicks, "WE MISSED YOU SO MUCH")
-    ikendrick = getpass.getpass("create a password: ")
-    password_bytes = ikendrick.encode('utf-8')
-    hash = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
-    with open ("password", "wb") as f:
-        f.write(hash)
+    ikendrick = ask("create a password: ", secret=True)
+    hash = auth.hash_password(ikendrick, bcrypt_cost())
 
-    heyhelp = getpass.getpass("confirm password: ")
+    heyhelp = ask("confirm password: ", secret=True)
     if heyhelp == ikendrick:
         print("Right pass twin")
     else:
         print("Passoprd wrong fam")
         print(f"FYI, the password you set is {ikendrick}.")
 
-    hostnameeee = input("what hostname you want to use \n")
-    with open("hostname", "w") as f:
-        f.write(hostnameeee)
-else:
-    if os.path.exists("hostname"):
-        with open("hostname", "r") as h_file:
-            hostnameeee = h_file.read().strip()
+    hostnameeee = ask("what hostname you want to use \n")
+    # all in one write at the end, quitting half way just means doing setup again
+    store.update(user=ihateicks, hostname=hostnameeee, password=hash.decode("ascii"))
+    shell.user, shell.hostname = ihateicks, hostnameeee
+
+
+def login(bcrypt_ready=None):
+    """
+    Reads who we are and asks for the password. The bcrypt check itself is
+    left running on a thread: returns (verifier, hash) for finish_login, or
+    (None, None) when there's nothing left to check.
+    """
+    global ihateicks, hostnameeee
+    view = store.view()
+    hostnameeee = view.hostname
+    ihateicks = view.user
+    shell.user, shell.hostname = ihateicks, hostnameeee
+    passwd = view.password
+    if passwd:
+        if unlock_ttl() and auth.check_token(passwd, ihateicks):
+            print(f"Welcome back {ihateicks}! (still unlocked)")
+            return None, None
+
+        verifypass = ask(
+            f"Hello {ihateicks}, Welcome back to YAYLinux! whats your password?\n",
+            secret=True,
+        )
+        if bcrypt_ready is not None:
+            bcrypt_ready.join()
+        verifier = auth.Verifier(verifypass, passwd)
+        verifier.start()
+        return verifier, passwd
+    return None, None
+
+
+def finish_login(verifier, passwd):
+    if verifier is None:
+        return
+    verifier.join()
+    if isinstance(verifier.error, ImportError):
+        sys.exit("bcrypt is not installed, run RUNBEFOREAPP.py first")
+    if not verifier.ok:
+        print("Wrong password.")
+        sys.exit("lmao imagine forgetting the pass")
+    print("Welcome back!")
+
+    ttl = unlock_ttl()
+    if ttl:
+        try:
+            auth.issue_token(passwd, ihateicks, ttl)
+        except OSError as e:
+            print("couldn't save the unlock token:", e)
+
+    def rehash():
+        # the hash was made with a different cost than this host calls for
+        cost = bcrypt_cost()
+        if auth.needs_rehash(passwd, cost):
+            hashed = auth.hash_password(verifier.password, cost).decode("ascii")
+            with store.edit() as data:
+                # unless another session changed the password meanwhile
+                if data.get("password") == passwd.decode("ascii"):
+                    data["password"] = hashed
+
+    # the password is only around right now, so this is the moment to upgrade it
+    background(rehash)
+
+
+# ---batch mode: `main.py -c "cmd"`, `main.py script.yay` or `... | main.py`
+#
+# no boot screen, no sounds, no prompts: log in without asking, run the lines
+# back to back and exit with the last command's code (or the first failing
+# one's, under set -e / -e)
+
+AUTH_FAILED = 77  # EX_NOPERM, like sysexits.h
+
+batch_mode = False
+errexit = False
+
+
+def batch_login():
+    """
+    Non-interactive login. Passes when nobody has been set up yet, when
+    there's a valid unlock token (see --unlock-ttl) or when YAY_PASSWORD
+    holds the password.
+    """
+    global ihateicks, hostnameeee
+    view = store.view()
+    ihateicks = view.user
+    hostnameeee = view.hostname
+    shell.user, shell.hostname = ihateicks, hostnameeee
+    # read it and drop it, the commands we run don't get to see it
+    password = os.environ.pop("YAY_PASSWORD", None)
+    if not view.password:
+        return True
+    if auth.check_token(view.password, view.user):
+        return True
+    if password is None:
+        return False
+    try:
+        return auth.check_password(password, view.password)
+    except ImportError:
+        print("bcrypt is not installed, run RUNBEFOREAPP.py first", file=sys.stderr)
+        return False
+
+
+def script_command(line):
+    # what yayscript runs for every plain command line
+    try:
+        return execute_command(line)
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except Exception as e:
+        print(f"yay: {e}", file=sys.stderr)
+        return 1
+
 
-    if os.path.exists("user"):
-        with open("user", "r") as u_file:
-            ihateicks = u_file.read().strip()
+def export_to_shell(name, value):
+    # the coproc sh got its environment when it started, a later export has
+    # to be passed on (a sh started after this inherits os.environ anyway)
+    if "coproc" not in sys.modules:
+        return
+    import shlex
+
+    coproc_shell = sys.modules["coproc"].session()
+    if coproc_shell.alive():
+        coproc_shell.run(f"export {name}={shlex.quote(value)}")
+
+
+_script = None
 
-    if os.path.exists("password"):
-        with open("password", "rb") as p_file:
-            passwd = p_file.read().strip()
 
+def script():
+    """
+    The session's yayscript interpreter: variables and functions live here.
+    """
+    global _script
+    if _script is None:
+        import yayscript
 
-        verifypass = getpass.getpass(
-            f"Hello {ihateicks}, Welcome back to YAYLinux! whats your password?\n"
+        _script = yayscript.Interpreter(
+            script_command,
+            lambda: errexit,
+            is_builtin=lambda name: lookup(name) is not None,
+            on_export=export_to_shell,
         )
-        pas = verifypass.encode('utf-8')
-        if bcrypt.checkpw(pas, passwd):
-            print("Welcome back!")
-        else:
-            print("Wrong password.")
-            sys.exit("lmao imagine forgetting the pass")
+    return _script
+
 
-while True:
+def run_batch(args):
+    """
+    Runs -c / the script file / stdin. Returns the exit code for the whole thing.
+    """
+    import yayscript
+
+    interp = script()
     try:
-        terminal = input(f"{ihateicks}@{hostnameeee} $ ~/")
-        execute_command(terminal)
+        if args.command is not None:
+            code = interp.run_lines(args.command.splitlines(), "-c")
+        elif args.script and args.script != "-":
+            try:
+                code = interp.run_file(args.script, args.script_args)
+            except OSError as e:
+                print(f"yay: can't read {args.script}: {e.strerror}", file=sys.stderr)
+                return 127
+        else:
+            # the script comes in on stdin, the commands in it mustn't eat it
+            shell.stdin = sub.DEVNULL
+            # line by line, so a producer on the other end of the pipe doesn't have to finish first
+            code = interp.run_lines(sys.stdin, "<stdin>")
     except KeyboardInterrupt:
-        print("\nUse 'exit' to quit.")
-    except EOFError:
-        sys.exit(0)
+        return 130
+    except yayscript.ScriptExit as e:
+        print(f"yay: {e}", file=sys.stderr)
+        return e.status
+    except yayscript.ScriptError as e:
+        print(f"yay: {e}", file=sys.stderr)
+        return 2
+    for note in jobs.notifications():
+        print(note)
+    return code
+
+
+def batch_main(args):
+    global batch_mode, errexit
+    batch_mode = True
+    errexit = args.errexit
+    # a new sh per command is most of the cost of a script full of externals,
+    # one sh for the whole run is ~20x cheaper (--backend spawn for the old way).
+    # commands that get piped input are still spawned, see run_subprocess
+    settings.setdefault("backend", "coproc")
+    if not batch_login():
+        print("yay: not logged in (set YAY_PASSWORD, or log in once with --unlock-ttl)", file=sys.stderr)
+        return AUTH_FAILED
+    if settings.get("plugins_dir"):
+        for filename, error in load_plugins(settings["plugins_dir"]):
+            print(f"plugin {filename} failed to load: {error}", file=sys.stderr)
+    return run_batch(args)
+
+
+def report_boot_time(budget_ms):
+    took = (time.perf_counter() - BOOT_T0 - input_wait) * 1000
+    if budget_ms and took > budget_ms:
+        print(f"[fastboot] time-to-prompt {took:.1f} ms, over the {budget_ms:g} ms budget")
+    elif budget_ms:
+        print(f"[fastboot] time-to-prompt {took:.1f} ms (budget {budget_ms:g} ms)")
+    else:
+        print(f"[fastboot] time-to-prompt {took:.1f} ms")
+    return took
+
+
+def start_history():
+    if settings.get("history", "on").lower() in ("0", "false", "no", "off"):
+        return None
+    import history
+
+    try:
+        size = int(settings.get("history_size", history.MAX_ENTRIES))
+    except ValueError:
+        size = history.MAX_ENTRIES
+    hist = history.history()
+    hist.max_entries = size
+    history.setup_readline(hist)
+    hist.load_in_background()
+    return hist
+
+
+def repl():
+    import yayscript
+
+    hist = start_history()
+    interp = script()
+    import completion
+
+    completion.setup_readline(extra=lambda: interp.functions)
+    interp.name = "yay"
+    more = False
+    while True:
+        try:
+            if not more:
+                for note in jobs.notifications():
+                    print(note)
+            if hist is not None:
+                # the full history for ctrl-r, once the loader thread is done
+                hist.sync_readline()
+            # yayscript works at the prompt too, "> " while a block is open
+            terminal = input("> " if more else store.view().prompt)
+            if hist is not None:
+                hist.remember(terminal)
+            more = interp.feed(terminal)
+        except (yayscript.ScriptError, yayscript.ScriptExit) as e:
+            print(e)
+            more = False
+        except KeyboardInterrupt:
+            interp.top = None
+            more = False
+            print("\nUse 'exit' to quit.")
+        except EOFError:
+            sys.exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Deletes all the old config files. its like a factory reset"
+    )
+    parser.add_argument("--facreset", "-f", action="store_true", help="factory resets")
+    parser.add_argument("-c", dest="command", metavar="COMMANDS", help="run COMMANDS (one per line) and exit, no prompts")
+    parser.add_argument("script", nargs="?", help="run this yayscript file and exit (- for stdin)")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    parser.add_argument("-e", "--errexit", action="store_true", help="batch mode: stop at the first failing command")
+    parser.add_argument(
+        "-i",
+        "--interactive",
+        action="store_true",
+        help="the normal shell even when stdin isn't a terminal",
+    )
+    parser.add_argument(
+        "--fast",
+        "-F",
+        action="store_true",
+        help="fast boot: skip the boot delays and the Enter prompt (or set fastboot=on in yay.conf)",
+    )
+    parser.add_argument(
+        "--boot-budget",
+        type=float,
+        metavar="MS",
+        help="warn when time-to-prompt goes over MS milliseconds (or boot_budget_ms in yay.conf)",
+    )
+    parser.add_argument(
+        "--pty",
+        action="store_true",
+        help="run external commands on a pseudo terminal so interactive programs work (or pty=on in yay.conf)",
+    )
+    parser.add_argument(
+        "--unlock-ttl",
+        type=float,
+        metavar="SECONDS",
+        help="after a good login, skip the password for relaunches within SECONDS (or unlock_ttl in yay.conf)",
+    )
+    parser.add_argument(
+        "--recalibrate",
+        action="store_true",
+        help="re-measure the bcrypt cost for this machine (bcrypt_target_ms in yay.conf, default 250)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["spawn", "coproc"],
+        help="spawn: new sh per command (default), coproc: one persistent sh per session (or backend= in yay.conf)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="kill external commands that run longer than SECONDS (or timeout= in yay.conf, see also limit_cpu/limit_mem_mb)",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="record per-command timings from the start, see the stats builtin (or stats=on in yay.conf)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="yay.prof",
+        metavar="FILE",
+        help="run the session under cProfile, save to FILE (yay.prof) and print the top calls at exit",
+    )
+    args = parser.parse_args()
+    if args.profile:
+        import stats
+
+        with stats.profiled(args.profile):
+            session(args)
+    else:
+        session(args)
+
+
+def session(args):
+    global limits
+    if args.facreset:
+        try:
+            auth.revoke_token(store.load().view().user)
+        except ValueError:
+            pass
+        store.reset()
+        print("facresetted")
+    try:
+        store.load()
+    except (OSError, ValueError) as e:
+        sys.exit(f"couldn't read the config: {e}")
+    if store.migrated_from:
+        print(f"moved your setup from {store.migrated_from} to {store.path}")
+
+    settings.update(load_settings())
+    if args.pty:
+        settings["pty"] = "on"
+    if args.backend:
+        settings["backend"] = args.backend
+    if args.unlock_ttl is not None:
+        settings["unlock_ttl"] = str(args.unlock_ttl)
+    if args.timeout is not None:
+        settings["timeout"] = str(args.timeout)
+    if args.stats:
+        settings["stats"] = "on"
+    limits = load_limits()
+    if setting_on(settings, "stats"):
+        import stats
+
+        stats.enable()
+    if args.command is not None or args.script is not None or (
+        not args.interactive and sys.stdin is not None and not sys.stdin.isatty()
+    ):
+        sys.exit(batch_main(args))
+
+    fast = args.fast or setting_on(settings, "fastboot")
+    budget = args.boot_budget
+    if budget is None and settings.get("boot_budget_ms"):
+        try:
+            budget = float(settings["boot_budget_ms"])
+        except ValueError:
+            print("yay.conf: boot_budget_ms should be a number")
+
+    # in fast boot the bcrypt import runs alongside the boot screen and prompts
+    bcrypt_ready = background(preload_bcrypt) if fast else None
+
+    boot_sequence(fast)
+
+    print("welcome to YAY pyth-linux.\nY = yolo\nA= autism\nY = yeet")
+
+    if args.recalibrate:
+        # forget the stored cost, the next hash or rehash measures a new one
+        store.set("bcrypt_host", None)
+    verifier = passwd = None
+    if is_first_run():
+        first_run_setup()
+    else:
+        verifier, passwd = login(bcrypt_ready)
+
+    # the rest of startup happens while bcrypt checks the password
+    if settings.get("plugins_dir"):
+        for filename, error in load_plugins(settings["plugins_dir"]):
+            print(f"plugin {filename} failed to load: {error}")
+    if settings.get("backend") == "coproc" and not runner.IS_WINDOWS:
+        import coproc
+
+        coproc_shell = coproc.session()
+        if not coproc_shell.alive():
+            coproc_shell.start()
+    finish_login(verifier, passwd)
+
+    if fast or budget:
+        report_boot_time(budget)
+    repl()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import io
+import sys
+import threading
+import contextlib
+import subprocess as sub
+
+import runner
+import commands
+
+# `a | b | c` where any of the stages can be a builtin
+#
+# stream builtins are generators over bytes, so a builtin feeding a builtin is
+# just one generator pulling from the other. external commands get real pipes:
+# two externals in a row are wired fd to fd, a builtin feeding an external is
+# written into its stdin by a thread (a full pipe blocks the thread, which is
+# the backpressure), and an external feeding a builtin is read lazily off its
+# stdout. nothing gets collected in between.
+
+
+def split_pipeline(line):
+    """
+    Splits line on unquoted single `|`. Returns None when there is no pipe or
+    when the line does things only sh understands (`$(...)`, backticks).
+    """
+    if "|" not in line or "$(" in line or "`" in line:
+        return None
+    stages = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        if quote:
+            if ch == "\\" and quote == '"' and i + 1 < len(line):
+                current.append(line[i:i + 2])
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+        elif ch == "\\" and i + 1 < len(line):
+            current.append(line[i:i + 2])
+            i += 2
+            continue
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "|":
+            if line[i + 1:i + 2] in ("|", "&"):
+                # || and |& are sh's business
+                return None
+            stages.append("".join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    stages.append("".join(current).strip())
+    if len(stages) < 2 or not all(stages):
+        return None
+    return stages
+
+
+def has_builtin(stages):
+    return any(commands.lookup(stage.split(None, 1)[0]) is not None for stage in stages)
+
+
+def _lines(pipe):
+    # an external's stdout as a lazy stream of lines
+    try:
+        for line in pipe:
+            yield line
+    finally:
+        pipe.close()
+
+
+def _plain_builtin(cmd, argv):
+    # builtins that only know how to print: run them and hand over what they
+    # printed. they're all tiny, so that is fine
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        code = cmd.func(argv)
+    yield buf.getvalue()
+    return code
+
+
+def _guarded(stream, name, codes, index):
+    # a builtin stage blowing up ends its stream with an error line instead
+    # of a traceback from whatever thread happened to be pulling it, and
+    # leaves its exit code in codes[index] either way
+    try:
+        code = yield from stream
+    except Exception as e:
+        print(f"yay: {name}: {e}", file=sys.stderr)
+        code = 1
+    codes[index] = code or 0
+    return code
+
+
+def _feed(stream, pipe):
+    try:
+        for item in stream:
+            pipe.write(commands.as_bytes(item))
+    except (BrokenPipeError, OSError):
+        # the reader quit early (head, grep -m1...), stop producing
+        pass
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+_running = 0  # run_pipeline()s in progress
+
+
+def running():
+    """
+    True while a pipeline runs. A stream builtin is one stage of it then and
+    doesn't own the terminal, even when sys.stdout still is one.
+    """
+    return _running > 0
+
+
+def run_pipeline(stages, stdin=None):
+    """
+    Runs the stages connected by pipes and returns the last stage's exit
+    code, or the last failing builtin stage's when that is 0 (like pipefail,
+    but an external killed by a closed pipe isn't a failure).
+    stdin is what a leading external reads (None: ours).
+    """
+    global _running
+    _running += 1
+    try:
+        return _run(stages, stdin)
+    finally:
+        _running -= 1
+
+
+def _run(stages, stdin):
+    procs = []
+    feeders = []
+    pumps = []
+    # output captured in memory (engine's Session.run) has no fd to hand the
+    # processes, what they write gets pumped over instead
+    pump_out = not runner.has_fd(sys.stdout)
+    pump_err = not runner.has_fd(sys.stderr)
+    first_stdin = stdin
+    upstream = None  # generator or binary file object of the previous stage
+    upstream_is_proc = False
+    read_by_builtins = []
+    codes = [0] * len(stages)  # the builtin stages' exit codes
+    result = 0
+    sys.stdout.flush()
+
+    for index, stage in enumerate(stages):
+        last = index == len(stages) - 1
+        parts = stage.split(None, 1)
+        cmd = commands.lookup(parts[0])
+        if cmd is not None:
+            argv = commands.split_args(parts[1]) if len(parts) > 1 else []
+            stdin = upstream
+            if upstream_is_proc:
+                read_by_builtins.append(upstream)
+                stdin = _lines(upstream)
+            if cmd.stream:
+                upstream = cmd.func(argv, stdin)
+            else:
+                upstream = _plain_builtin(cmd, argv)
+            upstream = _guarded(upstream, parts[0], codes, index)
+            upstream_is_proc = False
+            continue
+
+        if upstream_is_proc:
+            stdin = upstream
+        elif upstream is not None:
+            stdin = sub.PIPE
+        else:
+            stdin = first_stdin
+        proc = sub.Popen(
+            runner.shell_argv(stage),
+            shell=not runner.IS_WINDOWS,
+            stdin=stdin,
+            stdout=None if last and not pump_out else sub.PIPE,
+            stderr=sub.PIPE if pump_err else None,
+        )
+        if last and pump_out:
+            pumps.append(runner.pump(proc.stdout.fileno(), sys.stdout))
+        if pump_err:
+            pumps.append(runner.pump(proc.stderr.fileno(), sys.stderr))
+        if upstream_is_proc:
+            # the previous process owns its end now
+            upstream.close()
+        elif upstream is not None:
+            t = threading.Thread(target=_feed, args=(upstream, proc.stdin), daemon=True)
+            t.start()
+            feeders.append(t)
+        procs.append(proc)
+        upstream = proc.stdout
+        upstream_is_proc = True
+
+    try:
+        if not upstream_is_proc and upstream is not None:
+            # a builtin is last: pull the whole chain through to the terminal
+            try:
+                result = commands.write_stream(upstream)
+            except BrokenPipeError:
+                pass
+            # a builtin that never read its stdin leaves the writer blocked on a
+            # full pipe, closing our end lets it die of SIGPIPE like in sh
+            for pipe in read_by_builtins:
+                pipe.close()
+        for t in feeders:
+            t.join()
+        for proc in procs:
+            proc.wait()
+        for t in pumps:
+            t.join()
+        for proc in procs:
+            if proc.stderr is not None:
+                proc.stderr.close()
+        if pump_out and upstream_is_proc:
+            upstream.close()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.kill()
+        for proc in procs:
+            proc.wait()
+        raise
+    if upstream_is_proc:
+        result = procs[-1].returncode
+    if not result:
+        result = next((code for code in reversed(codes) if code), 0)
+    return result
@@ -0,0 +1,296 @@
+import os
+import array
+import threading
+import wave
+
+import audio
+
+# the audioplayer
+#
+# tracks are streamed: a few thousand frames are read from the wav, converted
+# to the mixer's format (audio.py) and handed over, so a two hour file costs
+# the same memory as a two second one. the player is just another voice on the
+# audio mixer, which means it never blocks the prompt and the system sounds
+# still play over the music. when a track runs out mid-block the rest of the
+# block comes from the next one, so there's no gap between tracks.
+#
+# numpy, if it's there, does the volume and the resampling.
+
+READ_FRAMES = 4096
+
+
+class Track:
+    """
+    One wav file, read a block at a time and converted on the fly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.wav = wave.open(path, "rb")
+        self.channels = self.wav.getnchannels()
+        self.sampwidth = self.wav.getsampwidth()
+        self.rate = self.wav.getframerate()
+        self.frames = self.wav.getnframes()
+        self.src_pos = 0  # source frames read so far
+        self.out_pos = 0  # frames produced so far (at audio.RATE)
+        self.spill = bytearray()
+        if self.sampwidth not in (1, 2, 4):
+            self.wav.close()
+            raise ValueError(f"{self.sampwidth * 8} bit wavs aren't supported")
+
+    @property
+    def duration(self):
+        return self.frames / self.rate
+
+    @property
+    def position(self):
+        # what has been handed to the mixer, minus what's still waiting in spill
+        return max(0.0, (self.out_pos - len(self.spill) // audio.FRAME) / audio.RATE)
+
+    def seek(self, seconds):
+        frame = max(0, min(self.frames, int(seconds * self.rate)))
+        self.wav.setpos(frame)
+        self.src_pos = frame
+        self.out_pos = -(-frame * audio.RATE // self.rate)
+        self.spill.clear()
+
+    def _convert(self, raw, gain):
+        samples = audio._to_int16(raw, self.sampwidth)
+        numpy = audio._np()
+        if numpy is not None:
+            data = numpy.frombuffer(samples.tobytes(), dtype=numpy.int16).reshape(-1, self.channels)
+            if self.channels == 1:
+                data = numpy.repeat(data, 2, axis=1)
+            else:
+                data = data[:, :2]
+            if self.rate != audio.RATE:
+                first, last, base = self._resample_span(len(data))
+                data = data[numpy.arange(first, last) * self.rate // audio.RATE - base]
+            if gain != 1.0:
+                data = numpy.clip(data * gain, -32768, 32767)
+            return data.astype(numpy.int16).tobytes()
+
+        if self.channels == 1:
+            stereo = array.array("h", bytes(len(samples) * 2 * audio.WIDTH))
+            stereo[0::2] = samples
+            stereo[1::2] = samples
+            samples = stereo
+        elif self.channels > 2:
+            samples = array.array("h", (s for i, s in enumerate(samples) if i % self.channels < 2))
+        if self.rate != audio.RATE:
+            first, last, base = self._resample_span(len(samples) // 2)
+            out = array.array("h")
+            for k in range(first, last):
+                j = k * self.rate // audio.RATE - base
+                out.append(samples[2 * j])
+                out.append(samples[2 * j + 1])
+            samples = out
+        if gain != 1.0:
+            samples = array.array("h", (max(-32768, min(32767, int(s * gain))) for s in samples))
+        return samples.tobytes()
+
+    def _resample_span(self, count):
+        # nearest sample: output frame k plays source frame k * rate // RATE.
+        # returns the output frames whose source frame is in this block
+        first = self.out_pos
+        last = -(-(self.src_pos + count) * audio.RATE // self.rate)
+        self.out_pos = last
+        return first, last, self.src_pos
+
+    def read(self, nbytes, gain=1.0):
+        """
+        Up to nbytes of mixer-format pcm, b"" at the end of the track.
+        """
+        while len(self.spill) < nbytes:
+            raw = self.wav.readframes(READ_FRAMES)
+            count = len(raw) // (self.sampwidth * self.channels)
+            if not count:
+                break
+            if self.rate == audio.RATE:
+                self.out_pos += count
+            self.spill += self._convert(raw, gain)
+            self.src_pos += count
+        data = bytes(self.spill[:nbytes])
+        del self.spill[:nbytes]
+        return data
+
+    def close(self):
+        self.wav.close()
+
+
+class Player:
+    """
+    Playlist + transport. Every method returns straight away; the actual
+    reading happens on the mixer thread, through read().
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or audio.engine()
+        self.playlist = []
+        self.index = 0
+        self.track = None
+        self.state = "stopped"  # stopped, playing, paused
+        self.gain = 1.0
+        self.attached = False  # are we one of the mixer's voices right now
+        self.lock = threading.Lock()
+        self.error = None  # last track that couldn't be opened, and why
+
+    # -- mixer side --
+
+    def read(self, nbytes):
+        out = bytearray()
+        with self.lock:
+            while len(out) < nbytes and self.state == "playing":
+                if self.track is None and not self._open(self.index):
+                    self.state = "stopped"
+                    break
+                data = self.track.read(nbytes - len(out), self.gain)
+                if data:
+                    out += data
+                    continue
+                # end of the track, carry on into the next one in the same block
+                self.track.close()
+                self.track = None
+                self.index += 1
+                if self.index >= len(self.playlist):
+                    self.index = 0
+                    self.state = "stopped"
+            if len(out) < nbytes:
+                # short read: the mixer drops us, resume() adds us back
+                self.attached = False
+        return bytes(out)
+
+    def _open(self, index):
+        # skips over files that won't open. caller holds the lock
+        while index < len(self.playlist):
+            try:
+                self.track = Track(self.playlist[index])
+                self.index = index
+                return True
+            except (OSError, EOFError, ValueError, wave.Error) as e:
+                self.error = f"{self.playlist[index]}: {e}"
+                index += 1
+        return False
+
+    def _attach(self):
+        # caller holds the lock
+        if not self.attached:
+            self.attached = self.engine.stream(self)
+
+    # -- shell side --
+
+    def add(self, *paths):
+        with self.lock:
+            self.playlist.extend(paths)
+
+    def clear(self):
+        with self.lock:
+            self._drop_track()
+            self.playlist = []
+            self.index = 0
+            self.state = "stopped"
+
+    def play(self, *paths):
+        """
+        Starts the playlist (replacing it first, if paths are given).
+        """
+        with self.lock:
+            if paths:
+                self._drop_track()
+                self.playlist = list(paths)
+                self.index = 0
+            if not self.playlist:
+                return False
+            self.state = "playing"
+            self._attach()
+            return self.attached
+
+    def pause(self):
+        with self.lock:
+            if self.state == "playing":
+                self.state = "paused"
+
+    def resume(self):
+        with self.lock:
+            if self.state == "paused":
+                self.state = "playing"
+                self._attach()
+
+    def stop(self):
+        with self.lock:
+            self._drop_track()
+            self.index = 0
+            self.state = "stopped"
+
+    def skip(self, step=1):
+        with self.lock:
+            if not self.playlist:
+                return
+            self._drop_track()
+            self.index = (self.index + step) % len(self.playlist)
+            if self.state == "stopped":
+                self.state = "playing"
+                self._attach()
+
+    def seek(self, seconds, relative=False):
+        with self.lock:
+            if self.track is None and not self._open(self.index):
+                return
+            target = self.track.position + seconds if relative else seconds
+            self.track.seek(target)
+
+    def set_volume(self, gain):
+        with self.lock:
+            self.gain = max(0.0, min(2.0, gain))
+
+    def _drop_track(self):
+        if self.track is not None:
+            self.track.close()
+            self.track = None
+
+    def status(self):
+        with self.lock:
+            if not self.playlist:
+                return "nothing queued"
+            name = os.path.basename(self.playlist[self.index])
+            line = f"{self.state}: {name} ({self.index + 1}/{len(self.playlist)})"
+            if self.track is not None:
+                line += f" {_clock(self.track.position)} / {_clock(self.track.duration)}"
+            if self.gain != 1.0:
+                line += f" vol {self.gain:g}"
+            return line
+
+    def listing(self):
+        with self.lock:
+            return [
+                f"{'>' if i == self.index else ' '} {i + 1}. {path}" for i, path in enumerate(self.playlist)
+            ]
+
+
+def _clock(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def parse_time(text):
+    """
+    '90', '1:30', '+10', '-5' -> (seconds, relative)
+    """
+    relative = text[:1] in "+-"
+    sign = -1 if text.startswith("-") else 1
+    text = text.lstrip("+-")
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+    return sign * seconds, relative
+
+
+_player = None
+
+
+def player(create=True):
+    global _player
+    if _player is None and create:
+        _player = Player()
+    return _player
@@ -0,0 +1,251 @@
+import os
+import sys
+import platform
+import threading
+import subprocess as sub
+
+# runs external commands for the shell
+#
+# output is forwarded as it shows up instead of being collected and printed at
+# the end, so `find /` or a build log starts scrolling right away and a chatty
+# command never has more than CHUNK bytes of it sitting in memory
+
+CHUNK = 64 * 1024
+
+IS_WINDOWS = platform.system() == "Windows"
+
+
+def shell_argv(shell_cmd):
+    if IS_WINDOWS:
+        return ["powershell", "-Command", shell_cmd]
+    return shell_cmd
+
+
+def _binary(stream):
+    # sys.stdout can be swapped for something without a .buffer (StringIO etc.)
+    return getattr(stream, "buffer", None)
+
+
+def write_chunk(stream, data):
+    raw = _binary(stream)
+    if raw is not None:
+        raw.write(data)
+        raw.flush()
+    else:
+        stream.write(data.decode("utf-8", "replace"))
+        stream.flush()
+
+
+def _pump(fd, stream):
+    try:
+        while True:
+            data = os.read(fd, CHUNK)
+            if not data:
+                break
+            write_chunk(stream, data)
+    except OSError:
+        pass
+
+
+def pump(fd, stream):
+    """
+    Copies fd into stream on a thread until EOF. Returns the thread.
+    """
+    t = threading.Thread(target=_pump, args=(fd, stream), daemon=True)
+    t.start()
+    return t
+
+
+def has_fd(stream):
+    """
+    False when stream only lives in memory (captured output): a child can't
+    be handed that, its output has to be pumped over instead.
+    """
+    try:
+        stream.fileno()
+        return True
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+# exit code for a command the timeout guard had to kill (same as timeout(1))
+TIMED_OUT = 124
+
+
+class Limits:
+    """
+    Guards for runaway commands: timeout (wall seconds, the whole process
+    group gets killed), cpu (seconds, RLIMIT_CPU) and memory (bytes,
+    RLIMIT_AS). None = no limit.
+    """
+
+    __slots__ = ("timeout", "cpu", "memory")
+
+    def __init__(self, timeout=None, cpu=None, memory=None):
+        self.timeout = timeout
+        self.cpu = cpu
+        self.memory = memory
+
+    def __bool__(self):
+        return any(x is not None for x in (self.timeout, self.cpu, self.memory))
+
+    def apply(self, pid):
+        """
+        Sets the rlimits on an already started process. Doing it from here
+        instead of a preexec_fn keeps fork safe with our threads around; sh
+        execs or forks the real command right after, which inherits them.
+        """
+        try:
+            import resource
+        except ImportError:
+            return
+        if not hasattr(resource, "prlimit"):
+            return
+        try:
+            if self.cpu is not None:
+                resource.prlimit(pid, resource.RLIMIT_CPU, (int(self.cpu), int(self.cpu) + 1))
+            if self.memory is not None:
+                resource.prlimit(pid, resource.RLIMIT_AS, (int(self.memory), int(self.memory)))
+        except (OSError, ValueError):
+            # already gone, or a limit we're not allowed to set
+            pass
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, 15)
+        proc.wait(1)
+    except (OSError, sub.TimeoutExpired):
+        try:
+            os.killpg(proc.pid, 9)
+        except OSError:
+            proc.kill()
+        proc.wait()
+
+
+def run_streaming(shell_cmd, use_pty=False, stdin=None, limits=None):
+    """
+    Runs shell_cmd and forwards its stdout/stderr to ours while it runs.
+    Returns the exit code. use_pty gives the command a pseudo terminal (not on Windows).
+    stdin is passed on to Popen (None: the command shares ours).
+    shell_cmd can also be an argv list, which is run directly without a shell.
+    limits (a Limits) guards against runaways; TIMED_OUT comes back when the
+    timeout hit.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if use_pty and not IS_WINDOWS:
+        return _run_pty(shell_cmd, limits)
+
+    direct = isinstance(shell_cmd, list)
+    timeout = limits.timeout if limits else None
+    proc = sub.Popen(
+        shell_cmd if direct else shell_argv(shell_cmd),
+        shell=not direct and not IS_WINDOWS,
+        stdin=stdin,
+        stdout=sub.PIPE,
+        stderr=sub.PIPE,
+        bufsize=0,
+        # its own group, so a timeout takes out everything it started
+        start_new_session=timeout is not None and not IS_WINDOWS,
+    )
+    if limits:
+        limits.apply(proc.pid)
+    pumps = [pump(proc.stdout.fileno(), sys.stdout), pump(proc.stderr.fileno(), sys.stderr)]
+    try:
+        try:
+            proc.wait(timeout)
+        except sub.TimeoutExpired:
+            if IS_WINDOWS:
+                proc.kill()
+                proc.wait()
+            else:
+                _kill_group(proc)
+            return TIMED_OUT
+    except KeyboardInterrupt:
+        if timeout is not None and not IS_WINDOWS:
+            # ctrl-c doesn't reach another session, pass it on
+            _kill_group(proc)
+        else:
+            proc.kill()
+            proc.wait()
+        raise
+    finally:
+        for t in pumps:
+            t.join()
+        proc.stdout.close()
+        proc.stderr.close()
+    return proc.returncode
+
+
+def _run_pty(shell_cmd, limits=None):
+    import pty
+    import tty
+    import fcntl
+    import select
+    import termios
+
+    master, slave = pty.openpty()
+    stdin_fd = sys.stdin.fileno() if sys.stdin is not None else None
+    interactive = stdin_fd is not None and os.isatty(stdin_fd)
+    if interactive:
+        # same window size as ours so full screen programs draw right
+        try:
+            size = fcntl.ioctl(stdin_fd, termios.TIOCGWINSZ, b"\0" * 8)
+            fcntl.ioctl(slave, termios.TIOCSWINSZ, size)
+        except OSError:
+            pass
+
+    def become_session_leader():
+        os.setsid()
+        fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+    proc = sub.Popen(
+        shell_cmd,
+        shell=not isinstance(shell_cmd, list),
+        stdin=slave,
+        stdout=slave,
+        stderr=slave,
+        preexec_fn=become_session_leader,
+    )
+    os.close(slave)
+    if limits:
+        # rlimits only, a full screen program is yours to quit
+        limits.apply(proc.pid)
+
+    saved = None
+    if interactive:
+        saved = termios.tcgetattr(stdin_fd)
+        tty.setraw(stdin_fd)
+    try:
+        fds = [master, stdin_fd] if interactive else [master]
+        while True:
+            ready, _, _ = select.select(fds, [], [])
+            if master in ready:
+                try:
+                    data = os.read(master, CHUNK)
+                except OSError:
+                    # EIO: the child side is gone
+                    break
+                if not data:
+                    break
+                write_chunk(sys.stdout, data)
+            if interactive and stdin_fd in ready:
+                data = os.read(stdin_fd, CHUNK)
+                if data:
+                    os.write(master, data)
+                else:
+                    fds.remove(stdin_fd)
+    finally:
+        if saved is not None:
+            termios.tcsetattr(stdin_fd, termios.TCSAFLUSH, saved)
+        os.close(master)
+        proc.wait()
+    return proc.returncode
+
+
+def run_captured(shell_cmd):
+    """
+    The old way: wait for the command and hand back a CompletedProcess with text stdout/stderr.
+    """
+    return sub.run(shell_argv(shell_cmd), shell=not IS_WINDOWS, capture_output=True, text=True)
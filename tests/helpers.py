@@ -0,0 +1,49 @@
+import os
+import sys
+import shutil
+import tempfile
+import subprocess as sub
+
+from tests import ROOT
+
+MAIN = os.path.join(ROOT, "main.py")
+
+
+class Sandbox:
+    """
+    A throwaway home for yay: own config, cache and audio output, nobody set
+    up (so batch mode needs no password). Clean up with close().
+    """
+
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix="yaytest-")
+        self.env = dict(os.environ)
+        self.env.update(
+            YAY_CONFIG_DIR=os.path.join(self.dir, "config"),
+            XDG_CACHE_HOME=os.path.join(self.dir, "cache"),
+            XDG_RUNTIME_DIR=self.dir,
+            YAY_AUDIO_OUT=os.path.join(self.dir, "out.wav"),
+        )
+        self.env.pop("YAY_PASSWORD", None)
+
+    def path(self, *parts):
+        return os.path.join(self.dir, *parts)
+
+    def yay(self, *args, input=None, cwd=None, timeout=60):
+        """
+        Runs main.py with args, returns the CompletedProcess (text).
+        """
+        # no input: /dev/null rather than whatever the test runner has on stdin
+        stdin = {"input": input} if input is not None else {"stdin": sub.DEVNULL}
+        return sub.run(
+            [sys.executable, MAIN, *args],
+            **stdin,
+            capture_output=True,
+            text=True,
+            env=self.env,
+            cwd=cwd or self.dir,
+            timeout=timeout,
+        )
+
+    def close(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -0,0 +1,76 @@
+import os
+import unittest
+
+import commands
+from tests.helpers import Sandbox
+
+
+class ParseArgsTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        for name in ("a.wav", "b.wav", "c.txt"):
+            open(self.sandbox.path(name), "w").close()
+        self.cwd = os.getcwd()
+        os.chdir(self.sandbox.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.sandbox.close()
+
+    def test_globs(self):
+        self.assertEqual(commands.parse_args("-l *.wav"), (["-l", "a.wav", "b.wav"], []))
+        self.assertEqual(commands.parse_args("'*.wav' \\*.wav"), (["*.wav", "*.wav"], []))
+        self.assertEqual(commands.parse_args("*.mp3"), (["*.mp3"], []))
+
+    def test_redirections(self):
+        self.assertEqual(commands.parse_args("x > out"), (["x"], [(1, "w", "out")]))
+        self.assertEqual(commands.parse_args("x >>out 2>&1"), (["x"], [(1, "a", "out"), (2, "dup", 1)]))
+        self.assertEqual(commands.parse_args("'>' 2>/dev/null"), ([">"], [(2, "w", "/dev/null")]))
+
+    def test_shell_only_syntax(self):
+        for text in ("a; b", "a && b", "a < in", "$(pwd)", '"`pwd`"', "x >"):
+            self.assertIsNone(commands.parse_args(text), text)
+
+
+class DispatchTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.got = []
+        commands.register("yaytest", lambda argv: print("args", *argv) or self.got.append(argv))
+
+    def tearDown(self):
+        commands.unregister("yaytest")
+        self.sandbox.close()
+
+    def test_redirected_builtin(self):
+        out = self.sandbox.path("out.txt")
+        self.assertEqual(commands.dispatch(f"yaytest 1 > {out}", self.fail), None)
+        commands.dispatch(f"yaytest 2 >> {out}", self.fail)
+        with open(out) as f:
+            self.assertEqual(f.read(), "args 1\nargs 2\n")
+
+    def test_shell_syntax_goes_to_fallback(self):
+        fell = []
+        commands.dispatch("yaytest a && yaytest b", lambda line: fell.append(line) or 0)
+        self.assertEqual(fell, ["yaytest a && yaytest b"])
+        self.assertEqual(self.got, [])
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        for name in ("a.wav", "b.wav", "c.txt"):
+            open(self.sandbox.path(name), "w").close()
+
+    def tearDown(self):
+        self.sandbox.close()
+
+    def test_ls_glob_and_help_redirect(self):
+        r = self.sandbox.yay("-c", "ls *.wav")
+        self.assertEqual(r.stdout.split(), ["a.wav", "b.wav"], r.stderr)
+        r = self.sandbox.yay("-c", "help > help.txt\nls > ls.txt")
+        self.assertEqual(r.stdout, "", r.stderr)
+        with open(self.sandbox.path("help.txt")) as f:
+            self.assertIn("LIST OF COMMANDS", f.read())
+        with open(self.sandbox.path("ls.txt")) as f:
+            self.assertIn("c.txt", f.read())
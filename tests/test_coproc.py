@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+import subprocess as sub
+
+import coproc
+from tests.helpers import Sandbox
+
+
+@unittest.skipIf(sys.platform == "win32", "no coproc backend on windows")
+class StdinTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.shell = coproc.ShellCoprocess()
+
+    def tearDown(self):
+        self.shell.close()
+        self.sandbox.close()
+
+    def test_commands_read_the_given_stdin(self):
+        path = self.sandbox.path("in.txt")
+        with open(path, "w") as f:
+            f.write("from the file\n")
+        self.assertEqual(self.shell.run("cat", stdin=path).stdout, b"from the file\n")
+        self.assertEqual(self.shell.run("cat").stdout, b"")
+
+    def test_stdin_source(self):
+        self.assertEqual(coproc.stdin_source(sub.DEVNULL), os.devnull)
+        with open(os.devnull) as f:
+            self.assertIsNone(coproc.stdin_source(f))
+
+    def test_terminal_is_passed_by_name(self):
+        import pty
+
+        master, slave = pty.openpty()
+        saved = sys.stdin
+        try:
+            sys.stdin = os.fdopen(slave, closefd=False)
+            self.assertEqual(coproc.stdin_source(), os.ttyname(slave))
+            os.write(master, b"typed\n\x04")
+            self.assertEqual(self.shell.run("cat", stdin=os.ttyname(slave)).stdout, b"typed\n")
+        finally:
+            sys.stdin = saved
+            os.close(slave)
+            os.close(master)
+
+    def test_batch_commands_get_piped_input(self):
+        # batch mode defaults to the coproc backend, the pipe has to reach cat anyway
+        r = self.sandbox.yay("-c", "cat\necho done", input="piped\n")
+        self.assertEqual(r.stdout, "piped\ndone\n", r.stderr)
+        r = self.sandbox.yay("-c", "read x; echo got $x", input="abc\n")
+        self.assertEqual(r.stdout, "got abc\n", r.stderr)
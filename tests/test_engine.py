@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+import engine
+import commands
+
+
+@commands.command("yaytest-raise", hidden=True)
+def raising(argv):
+    raise RuntimeError("it broke")
+
+
+@commands.command("yaytest-exit", hidden=True)
+def exiting(argv):
+    sys.exit(int(argv[0]) if argv else None)
+
+
+class RunTest(unittest.TestCase):
+    def setUp(self):
+        self.shell = engine.Session(user="tester")
+
+    def test_builtin_output_is_captured(self):
+        r = self.shell.run("whoamiyay")
+        self.assertEqual((r.stdout, r.stderr, r.code), ("tester\n", "", 0))
+        self.assertEqual(set(r.timings), {"real", "user", "sys"})
+        self.assertTrue(self.shell.run("help").stdout.startswith("LIST OF COMMANDS:"))
+
+    @unittest.skipIf(sys.platform == "win32", "sh syntax")
+    def test_externals(self):
+        r = self.shell.run("echo out; echo err >&2; exit 4")
+        self.assertEqual((r.stdout, r.stderr, r.code), ("out\n", "err\n", 4))
+        # nothing to read, rather than hanging on ours
+        self.assertEqual(self.shell.run("cat").stdout, "")
+        r = self.shell.run("whoamiyay | tr a-z A-Z")
+        self.assertEqual((r.stdout, r.code), ("TESTER\n", 0))
+
+    def test_failures_become_codes(self):
+        r = self.shell.run("yaytest-raise")
+        self.assertEqual((r.code, r.stderr), (1, "yay: it broke\n"))
+        self.assertEqual(self.shell.run("yaytest-exit 5").code, 5)
+        self.assertEqual(self.shell.run("yaytest-exit").code, 0)
+
+    def test_nobody_to_ask(self):
+        self.shell.ask = lambda prompt: self.fail("run() must not ask")
+        here = os.getcwd()
+        r = self.shell.run("cd")
+        self.assertEqual((r.code, r.stdout), (1, "cd: no directory given\n"))
+        self.assertEqual(os.getcwd(), here)
+        # and the session is back to normal afterwards
+        self.assertIsNotNone(self.shell.ask)
+        self.assertIsNone(self.shell.stdin)
+
+    def test_streams_are_restored(self):
+        saved = sys.stdout, sys.stderr, sys.stdin
+        self.shell.run("yaytest-raise")
+        self.assertEqual((sys.stdout, sys.stderr, sys.stdin), saved)
@@ -0,0 +1,49 @@
+import os
+import unittest
+
+import history
+from tests.helpers import Sandbox
+
+try:
+    import readline
+except ImportError:
+    readline = None
+
+
+@unittest.skipIf(readline is None, "no readline")
+class ReadlineTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.hist = history.History(path=self.sandbox.path("history"))
+        with open(self.hist.path, "w") as f:
+            f.writelines(f"{n}\techo {n}\n" for n in range(history.READLINE_ENTRIES + 500))
+            f.write("9\techo one\\ntwo\n")
+        self.saved = history._readline
+
+    def tearDown(self):
+        history._readline = self.saved
+        readline.clear_history()
+        self.sandbox.close()
+
+    def items(self):
+        return [readline.get_history_item(i) for i in range(1, readline.get_current_history_length() + 1)]
+
+    def test_ctrl_r_gets_the_whole_history_once_loaded(self):
+        history.setup_readline(self.hist)
+        self.assertEqual(readline.get_current_history_length(), history.READLINE_ENTRIES)
+        self.assertFalse(self.hist.sync_readline())  # not loaded yet
+        self.hist.load()
+        self.assertTrue(self.hist.sync_readline())
+        items = self.items()
+        self.assertEqual(len(items), history.READLINE_ENTRIES + 501)
+        self.assertEqual(items[0], "echo 0")
+        self.assertEqual(items[-1], "echo one two")
+        self.assertFalse(self.hist.sync_readline())
+        self.assertFalse(any(name.endswith(".readline") for name in os.listdir(self.sandbox.dir)))
+
+    def test_typed_while_loading_is_kept(self):
+        history.setup_readline(self.hist)
+        self.hist.load()
+        self.hist.remember("echo fresh")
+        self.hist.sync_readline()
+        self.assertEqual(self.items()[-1], "echo fresh")
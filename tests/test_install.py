@@ -0,0 +1,171 @@
+import os
+import stat
+import hashlib
+import unittest
+
+import install
+from tests.helpers import Sandbox
+
+
+def script(path, body):
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n" + body)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+@unittest.skipIf(os.name == "nt", "stub binaries are sh scripts")
+class BackendTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.saved = dict(os.environ)
+        os.environ.update(XDG_CACHE_HOME=self.sandbox.env["XDG_CACHE_HOME"])
+        self.log = self.sandbox.path("calls.log")
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.saved)
+        self.sandbox.close()
+
+    def calls(self):
+        try:
+            with open(self.log) as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+    def test_search_term_is_hashed_into_the_cache_key(self):
+        synced = self.sandbox.path("synced")
+        open(synced, "w").close()
+
+        class Searching(install.Choco):
+            sync_db = (synced,)
+
+        exe = script(self.sandbox.path("choco"), f'echo "$@" >> {self.log}\n[ "$1" = search ] && echo "a/../b|1.0"\nexit 0\n')
+        backend = Searching(exe=exe)
+        self.assertEqual(backend.search("a/../b"), [("a/../b", False)])
+        key = hashlib.sha1(b"a/../b").hexdigest()[:16]
+        self.assertEqual(os.listdir(install.cache_dir()), [f"search-{key}-choco.json"])
+        # the second search comes from the cache, in a new instance too
+        Searching(exe=exe).search("a/../b")
+        self.assertEqual(len([c for c in self.calls() if c.startswith("search")]), 1)
+
+
+STUB = """#!/bin/sh
+# a package manager that knows vim, git and curl, installed ones live in $YAY_PKG_DB
+echo "$@" >> "$YAY_PKG_LOG"
+case "$1" in
+query) cat "$YAY_PKG_DB" ;;
+list) printf 'vim\\ngit\\ncurl\\n' ;;
+install) shift; for p; do case "$p" in vim|git|curl) ;; *) exit 1 ;; esac; done
+    for p; do echo "$p 1.0" >> "$YAY_PKG_DB"; done ;;
+remove) exit 0 ;;
+esac
+"""
+
+
+@unittest.skipIf(os.name == "nt", "stub binaries are sh scripts")
+class LauncherTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.db = self.sandbox.path("installed")
+        self.log = self.sandbox.path("calls.log")
+        with open(self.db, "w") as f:
+            f.write("git 2.0\n")
+        self.sandbox.env.update(
+            YAY_PKG_BACKEND=script(self.sandbox.path("pkg"), STUB),
+            YAY_PKG_DB=self.db,
+            YAY_PKG_LOG=self.log,
+        )
+
+    def tearDown(self):
+        self.sandbox.close()
+
+    def calls(self, verb):
+        with open(self.log) as f:
+            return [line.split()[1:] for line in f if line.split()[0] == verb]
+
+    def test_duplicates_and_installed_ones_are_dropped(self):
+        r = self.sandbox.yay("-c", "launcher vim git vim curl")
+        self.assertEqual(r.returncode, 0, r.stdout + r.stderr)
+        self.assertIn("already installed: git", r.stdout)
+        # one transaction, nothing ahead of it
+        self.assertEqual(self.calls("install"), [["vim", "curl"]])
+        with open(self.log) as f:
+            self.assertEqual([line.split()[0] for line in f], ["query", "install"])
+
+    def test_everything_there_is_nothing_to_do(self):
+        self.sandbox.yay("-c", "launcher vim")
+        r = self.sandbox.yay("-c", "launcher vim git")
+        self.assertIn("nothing to do", r.stdout)
+        self.assertEqual(self.calls("install"), [["vim"]])
+
+    def test_failing_transaction(self):
+        r = self.sandbox.yay("-c", "launcher nope curl")
+        self.assertEqual(r.returncode, 1)
+        self.assertIn("Installation failed.", r.stdout)
+        self.assertEqual(self.calls("install"), [["nope", "curl"]])
+
+    def test_installed_list_is_cached_until_the_db_changes(self):
+        self.sandbox.yay("-c", "launcher -q git\nlauncher -q vim")
+        self.assertEqual(len(self.calls("query")), 1)
+        self.sandbox.yay("-c", "launcher -q git")
+        self.assertEqual(len(self.calls("query")), 1)
+        with open(self.db, "a") as f:
+            f.write("vim 1.0\n")
+        os.utime(self.db, ns=(0, os.stat(self.db).st_mtime_ns + 10**9))
+        r = self.sandbox.yay("-c", "launcher -q vim")
+        self.assertEqual(r.stdout, "vim 1.0\n")
+        self.assertEqual(len(self.calls("query")), 2)
+
+
+@unittest.skipIf(os.name == "nt", "stub binaries are sh scripts")
+class DetectTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.root = self.sandbox.path("root")
+        self.bin = self.sandbox.path("bin")
+        os.makedirs(os.path.join(self.root, "etc"))
+        os.makedirs(self.bin)
+        self.saved = dict(os.environ)
+        os.environ.update(PATH=self.bin, XDG_CACHE_HOME=self.sandbox.env["XDG_CACHE_HOME"])
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.saved)
+        self.sandbox.close()
+
+    def machine(self, os_release, *binaries):
+        with open(os.path.join(self.root, "etc", "os-release"), "w") as f:
+            f.write(os_release)
+        for name in binaries:
+            script(os.path.join(self.bin, name), "exit 0\n")
+        return install.detect(self.root)
+
+    def test_id_like_picks_the_distros_manager(self):
+        backend = self.machine('ID=pop\nID_LIKE="ubuntu debian"\n', "pacman", "apt-get")
+        self.assertIsInstance(backend, install.Apt)
+        self.assertEqual(backend.exe, os.path.join(self.bin, "apt-get"))
+        self.assertEqual(backend.root, self.root)
+
+    def test_versioned_id(self):
+        backend = self.machine('ID="opensuse-tumbleweed"\nID_LIKE="opensuse suse"\n', "dnf", "zypper")
+        self.assertIsInstance(backend, install.Zypper)
+
+    def test_falls_back_to_whatever_is_there(self):
+        self.assertIsInstance(self.machine("ID=arch\n", "dnf"), install.Dnf)
+
+    def test_nothing_known(self):
+        self.assertIsNone(self.machine("ID=gentoo\n", "emerge"))
+
+    def test_installed_list_from_the_stub(self):
+        script(
+            os.path.join(self.bin, "dpkg-query"),
+            "printf 'ii \\tvim\\t9.0\\nrc \\told\\t1.0\\nii \\tgit\\t2.4\\n'\n",
+        )
+        status = os.path.join(self.root, "var", "lib", "dpkg", "status")
+        os.makedirs(os.path.dirname(status))
+        open(status, "w").close()
+        backend = self.machine("ID=debian\n", "apt-get")
+        self.assertEqual(backend.installed(), {"vim": "9.0", "git": "2.4"})
+        self.assertEqual(backend.query(["vim", "old"]), {"vim": "9.0", "old": None})
@@ -0,0 +1,57 @@
+import sys
+import unittest
+
+import engine
+import commands
+import pipeline
+
+
+@commands.command("yaytest-boom", hidden=True, stream=True)
+def boom(argv, stdin):
+    yield "partial\n"
+    raise ValueError("kaput")
+
+
+@commands.command("yaytest-fail", hidden=True)
+def fail(argv):
+    print("printed anyway")
+    return 3
+
+
+@commands.command("yaytest-piped", hidden=True, stream=True)
+def piped(argv, stdin):
+    yield f"{pipeline.running()}\n"
+
+
+@unittest.skipIf(sys.platform == "win32", "uses cat")
+class BuiltinStageTest(unittest.TestCase):
+    def setUp(self):
+        self.shell = engine.Session()
+
+    def test_exception_is_reported_and_fails_the_pipeline(self):
+        for line in ("yaytest-boom | cat", "echo hi | yaytest-boom"):
+            r = self.shell.run(line)
+            self.assertEqual(r.code, 1, line)
+            self.assertIn("yay: yaytest-boom: kaput", r.stderr)
+            self.assertNotIn("Traceback", r.stderr)
+        self.assertEqual(self.shell.run("yaytest-boom | cat").stdout, "partial\n")
+
+    def test_plain_builtin_exit_code_is_kept(self):
+        r = self.shell.run("yaytest-fail | cat")
+        self.assertEqual((r.code, r.stdout), (3, "printed anyway\n"))
+        self.assertEqual(self.shell.run("echo hi | yaytest-fail").code, 3)
+
+    def test_last_stage_failing_wins(self):
+        self.assertEqual(self.shell.run("yaytest-fail | false").code, 1)
+        self.assertEqual(self.shell.run("yaytest-fail | true").code, 3)
+
+
+@unittest.skipIf(sys.platform == "win32", "uses cat")
+class RunningTest(unittest.TestCase):
+    # top goes interactive only when it's the whole command line
+    def test_stages_know_they_are_in_a_pipeline(self):
+        shell = engine.Session()
+        self.assertEqual(shell.run("yaytest-piped").stdout, "False\n")
+        self.assertEqual(shell.run("yaytest-piped | cat").stdout, "True\n")
+        self.assertEqual(shell.run("echo | yaytest-piped").stdout, "True\n")
+        self.assertFalse(pipeline.running())
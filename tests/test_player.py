@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+import array
+import unittest
+import wave
+from unittest import mock
+
+import audio
+import player
+from tests.helpers import Sandbox
+
+
+class RecordingSink(audio.NullSink):
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, pcm):
+        super().write(pcm)
+        self.writes.append(len(pcm) // audio.FRAME)
+
+
+def tone(path, frames, rate=audio.RATE, channels=2):
+    samples = array.array("h", ((i * 37) % 2000 - 1000 for i in range(frames * channels)))
+    with wave.open(path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return path
+
+
+class GaplessTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.sink = RecordingSink()
+        self.engine = audio.Engine(self.sink)
+
+    def tearDown(self):
+        self.engine.close()
+        self.sandbox.close()
+
+    def play(self, *paths):
+        p = player.Player(self.engine)
+        self.assertTrue(p.play(*paths))
+        self.assertTrue(self.engine.mixer.wait(10))
+        self.assertEqual(p.state, "stopped")
+        return p
+
+    def test_every_frame_reaches_the_sink(self):
+        paths = [
+            tone(self.sandbox.path("a.wav"), 1500),
+            tone(self.sandbox.path("b.wav"), 700, rate=22050, channels=1),
+            tone(self.sandbox.path("c.wav"), 333, rate=8000),
+        ]
+        self.play(*paths)
+        # resampling is nearest sample: ceil(frames * RATE / rate) frames out
+        self.assertEqual(self.sink.frames, 1500 + 1400 + -(-333 * audio.RATE // 8000))
+
+    def test_no_short_block_between_tracks(self):
+        paths = [tone(self.sandbox.path(f"{n}.wav"), frames) for n, frames in enumerate((1500, 1000, 2100))]
+        self.play(*paths)
+        total = 1500 + 1000 + 2100
+        self.assertEqual(sum(self.sink.writes), total)
+        # the tracks run into each other inside a block, only the very last one is short
+        self.assertEqual(self.sink.writes[:-1], [audio.BLOCK_FRAMES] * (total // audio.BLOCK_FRAMES))
+        self.assertEqual(self.sink.writes[-1], total % audio.BLOCK_FRAMES)
+
+    def test_unreadable_tracks_are_skipped(self):
+        broken = self.sandbox.path("broken.wav")
+        with open(broken, "wb") as f:
+            f.write(b"not a wav")
+        p = self.play(broken, tone(self.sandbox.path("ok.wav"), 500))
+        self.assertEqual(self.sink.frames, 500)
+        self.assertIn("broken.wav", p.error)
+
+
+class DefaultSinkTest(unittest.TestCase):
+    def test_no_sound_is_said_once(self):
+        env = {"PATH": "", "YAY_AUDIO_OUT": ""}
+        with mock.patch.dict(os.environ, env), mock.patch.dict(sys.modules, {"sounddevice": None}), \
+                mock.patch.object(audio, "_warned", False), mock.patch("sys.stderr", new_callable=io.StringIO) as err:
+            self.assertIsNone(audio.default_sink())
+            self.assertIsNone(audio.default_sink())
+        self.assertEqual(err.getvalue().count("no way to play sound"), 1)
@@ -0,0 +1,39 @@
+import os
+import unittest
+
+from tests.helpers import Sandbox
+
+
+class SettingsFileTest(unittest.TestCase):
+    def setUp(self):
+        self.sandbox = Sandbox()
+        self.conf = self.sandbox.path("config", "yay.conf")
+
+    def tearDown(self):
+        self.sandbox.close()
+
+    def stats_on(self, **kw):
+        r = self.sandbox.yay("-c", "stats", **kw)
+        return "stats are off" not in r.stdout
+
+    def test_read_from_the_config_dir(self):
+        self.assertFalse(self.stats_on())
+        os.makedirs(os.path.dirname(self.conf))
+        with open(self.conf, "w") as f:
+            f.write("stats=on\n")
+        self.assertTrue(self.stats_on())
+        # a yay.conf in whatever directory we start from is nothing special anymore
+        os.makedirs(self.sandbox.path("elsewhere"))
+        with open(self.sandbox.path("elsewhere", "yay.conf"), "w") as f:
+            f.write("stats=off\n")
+        with open(self.conf, "w") as f:
+            f.write("stats=on\n")
+        self.assertTrue(self.stats_on(cwd=self.sandbox.path("elsewhere")))
+
+    def test_old_file_in_the_cwd_is_migrated(self):
+        with open(self.sandbox.path("yay.conf"), "w") as f:
+            f.write("# mine\nstats=on\n")
+        self.assertTrue(self.stats_on())
+        self.assertFalse(os.path.exists(self.sandbox.path("yay.conf")))
+        with open(self.conf) as f:
+            self.assertEqual(f.read(), "# mine\nstats=on\n")
@@ -0,0 +1,34 @@
+import os
+import unittest
+
+import top
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+@unittest.skipUnless(resource is not None and os.path.isdir("/proc/self"), "needs /proc and rlimits")
+class FdLimitTest(unittest.TestCase):
+    def setUp(self):
+        self.saved = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    def tearDown(self):
+        resource.setrlimit(resource.RLIMIT_NOFILE, self.saved)
+
+    def test_soft_limit_is_restored_on_close(self):
+        hard = self.saved[1]
+        if hard != resource.RLIM_INFINITY and hard <= 300:
+            self.skipTest("hard limit too low to raise anything")
+        resource.setrlimit(resource.RLIMIT_NOFILE, (300, hard))
+        sampler = top.Sampler()
+        self.assertGreater(resource.getrlimit(resource.RLIMIT_NOFILE)[0], 300)
+        sampler.sample()
+        sampler.close()
+        self.assertEqual(resource.getrlimit(resource.RLIMIT_NOFILE), (300, hard))
+
+    def test_snapshot_leaves_the_limit_alone(self):
+        opts = top.parse_args(["-b", "-n", "1", "-d", "0"])
+        "".join(top.snapshot(opts))
+        self.assertEqual(resource.getrlimit(resource.RLIMIT_NOFILE), self.saved)
@@ -0,0 +1,19 @@
+import os
+import unittest
+
+from tests import ROOT
+
+# yaydroid/ carries copies of the shared modules so buildozer packages them,
+# build.sh refreshes them. this catches a copy that wasn't refreshed
+SHARED = ("commands", "completion", "engine", "install", "listing", "littu", "pipeline", "runner", "stats", "sysinfo")
+
+
+class CopiesTest(unittest.TestCase):
+    def test_copies_match_the_originals(self):
+        for name in SHARED:
+            with self.subTest(name):
+                with open(os.path.join(ROOT, name + ".py"), "rb") as f:
+                    original = f.read()
+                with open(os.path.join(ROOT, "yaydroid", name + ".py"), "rb") as f:
+                    copy = f.read()
+                self.assertEqual(copy, original, f"yaydroid/{name}.py differs from {name}.py, run yaydroid/build.sh or copy it over")
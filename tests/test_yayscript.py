@@ -0,0 +1,120 @@
+import os
+import unittest
+
+import yayscript
+from tests.helpers import Sandbox
+
+
+def recorder(code=0):
+    ran = []
+
+    def execute(line):
+        ran.append(line)
+        return code
+
+    return ran, execute
+
+
+class OneLinerTest(unittest.TestCase):
+    def test_closed_blocks_go_to_sh_unchanged(self):
+        for line in ("for i in 1 2; do echo $i; done", "if true; then echo yes; fi", "while false; do :; done"):
+            self.assertEqual(yayscript.compile_text(line), (("sh", line, 1),))
+
+    def test_open_headers_still_start_blocks(self):
+        code = yayscript.compile_text("for i in 1 2; do\necho $i\ndone")
+        self.assertEqual(code[0][0], "iter")
+        code = yayscript.compile_text("if true; then\necho yes\nfi")
+        self.assertEqual(code[0][0], "if")
+
+    def test_feed_runs_one_liners_without_opening_a_block(self):
+        ran, execute = recorder()
+        interp = yayscript.Interpreter(execute)
+        self.assertFalse(interp.feed("for i in 1 2; do echo $i; done"))
+        self.assertFalse(interp.feed("echo after"))
+        self.assertEqual(ran, ["for i in 1 2; do echo $i; done", "echo after"])
+
+
+class ExpansionTest(unittest.TestCase):
+    def test_unknown_names_are_left_for_sh(self):
+        ran, execute = recorder()
+        interp = yayscript.Interpreter(execute)
+        interp.run_lines(["x=5", "echo $x $Q ${HOME:-x} $((x + 1))"], "-c")
+        self.assertEqual(ran, ["echo 5 $Q ${HOME:-x} 6"])
+
+    def test_builtin_lines_get_the_environment(self):
+        ran, execute = recorder()
+        interp = yayscript.Interpreter(execute, is_builtin=lambda name: name == "cd")
+        os.environ["YAYTEST_DIR"] = "/tmp"
+        try:
+            interp.run_lines(["cd $YAYTEST_DIR"], "-c")
+        finally:
+            del os.environ["YAYTEST_DIR"]
+        self.assertEqual(ran, ["cd /tmp"])
+
+    def test_export_is_passed_on(self):
+        exported = []
+        interp = yayscript.Interpreter(recorder()[1], on_export=lambda name, value: exported.append((name, value)))
+        interp.run_lines(["export A=1"], "-c")
+        self.assertEqual(exported, [("A", "1")])
+
+
+class CompileTest(unittest.TestCase):
+    def test_env_prefixed_commands_are_commands(self):
+        self.assertEqual(yayscript.compile_text("LANG=C date +%Y"), (("cmd", "LANG=C date +%Y", 1),))
+        self.assertEqual(yayscript.compile_text("export A=1 B=2")[0][0], "cmd")
+        for line, value in (("x=1", "1"), ('x="a b"', '"a b"'), ("x=$((y + 1))", "$((y + 1))"), ("x=", "")):
+            self.assertEqual(yayscript.compile_text(line), (("set", "x", value, 1),), line)
+
+    def test_case_goes_to_sh_whole(self):
+        text = "case $x in\na) case y in y) echo n;; esac ;;\n*) echo other ;;\nesac"
+        self.assertEqual(yayscript.compile_text(text + "\necho after"), (("cmd", text, 1), ("cmd", "echo after", 5)))
+        with self.assertRaises(yayscript.ScriptError):
+            yayscript.compile_text("case $x in\na) echo a ;;")
+
+    def test_until(self):
+        ran, execute = recorder()
+        interp = yayscript.Interpreter(lambda line: execute(line) if line != "stop" else int(len(ran) < 3))
+        interp.run_lines(["until stop; do", "echo $n", "done"], "-c")
+        self.assertEqual(ran, ["echo $n"] * 3)
+
+    def test_arithmetic_is_sh_arithmetic(self):
+        lookup = {"x": "-7"}.get
+        self.assertEqual(yayscript.arith("-7/2", lookup), -3)
+        self.assertEqual(yayscript.arith("x % 2", lookup), -1)
+        self.assertEqual(yayscript.arith("2**63", lookup), -(2**63))
+        # 64 bit wraparound instead of a number with 370 million digits
+        self.assertEqual(yayscript.arith("9**9**9", lookup), -2123029214124047543)
+        with self.assertRaises(ValueError):
+            yayscript.arith("2**-1", lookup)
+
+
+class BatchTest(unittest.TestCase):
+    # through main.py -c, with the real sh behind it
+    def setUp(self):
+        self.box = Sandbox()
+
+    def tearDown(self):
+        self.box.close()
+
+    def test_sh_one_liners(self):
+        for backend in ("coproc", "spawn"):
+            r = self.box.yay("--backend", backend, "-c", "for i in 1 2; do echo $i; done\nif true; then echo yes; fi")
+            self.assertEqual((r.returncode, r.stdout), (0, "1\n2\nyes\n"), (backend, r.stderr))
+
+    def test_shell_variables_and_exports(self):
+        # the coproc sh is already running when the export happens
+        r = self.box.yay("--backend", "coproc", "-c", "true\nexport Q=7\necho $Q ${HOME:-x}\nsh -c 'echo A=$Q'")
+        self.assertEqual(r.stdout, f"7 {os.environ.get('HOME') or 'x'}\nA=7\n", r.stderr)
+        # set in the sh itself, only the sh knows it
+        r = self.box.yay("--backend", "coproc", "-c", "eval R=9\necho R=$R")
+        self.assertEqual(r.stdout, "R=9\n", r.stderr)
+
+    def test_env_prefix_until_and_case(self):
+        script = 'LANG=C Y=5 sh -c "echo Y=\\$Y"\necho y=$Y\nx=2\nuntil [ $x -le 0 ]; do\nx=$(($x - 1))\ndone\ncase $x in\n0) echo zero ;;\n*) echo other ;;\nesac'
+        for backend in ("coproc", "spawn"):
+            r = self.box.yay("--backend", backend, "-c", script)
+            self.assertEqual(r.stdout, "Y=5\ny=\nzero\n", (backend, r.stderr))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,476 @@
+import os
+import sys
+import time
+import heapq
+import shutil
+
+import sysinfo
+
+# the top builtin
+#
+# a refresh has to look at every process, so the work per process is what
+# matters. /proc/[pid]/schedstat (time spent on a cpu, in ns) is tiny and
+# cheap for the kernel to produce, and it only moves when the process ran:
+# each process keeps its schedstat open and it's re-read with one pread per
+# refresh. only the processes whose schedstat moved get their (expensive)
+# /proc/[pid]/stat read again, plus a tenth of the rest in turn so memory
+# that shrank while a process slept still shows up. /proc itself is only
+# listed again when the fork counter in /proc/stat says there can be new
+# pids; processes that exit show up as a failed read (the fd belongs to that
+# one process, even if its pid gets reused). records are __slots__ objects,
+# ~100 bytes each, so 10k processes is about a megabyte.
+#
+# on screen only the rows that changed since the last frame get rewritten,
+# and only the processes that fit are formatted (heapq picks them without
+# sorting all 10k).
+
+SORT_KEYS = {
+    "cpu": lambda p: p.cpu,
+    "mem": lambda p: p.rss,
+    "pid": lambda p: -p.pid,  # smallest pid first, like the rest read top-down
+    "name": lambda p: p.name,
+    "time": lambda p: p.ticks,
+}
+# fds we'll keep open at most, past that processes get the slow path
+MAX_OPEN = 16384
+# every process's stat gets re-read at least once in this many refreshes
+FULL_EVERY = 10
+
+
+class Proc:
+    __slots__ = ("pid", "fd", "uid", "name", "state", "ticks", "prev", "rss", "threads", "start", "cpu", "runtime", "seen")
+
+    def __init__(self, pid, fd, uid):
+        self.pid = pid
+        self.fd = fd  # its schedstat, -1 when it isn't kept open
+        self.uid = uid
+        self.name = ""
+        self.state = "?"
+        self.ticks = 0  # utime + stime
+        self.prev = None  # ticks at the previous refresh
+        self.rss = 0  # pages
+        self.threads = 1
+        self.start = 0
+        self.cpu = 0.0
+        self.runtime = None  # ns on a cpu, from schedstat
+        self.seen = 0
+
+
+def _parse(rec, data):
+    # "pid (comm) S ppid ..." -- comm can hold spaces and parens, so split on the last ")"
+    head, _, tail = data.rpartition(b")")
+    fields = tail.split(None, 22)
+    rec.name = head.partition(b"(")[2].decode("utf-8", "replace")
+    rec.state = fields[0].decode()
+    rec.ticks = int(fields[11]) + int(fields[12])
+    rec.threads = int(fields[17])
+    rec.start = int(fields[19])
+    rec.rss = int(fields[21])
+
+
+class Sampler:
+    def __init__(self, proc="/proc"):
+        self.proc = proc
+        self.procs = {}  # pid -> Proc
+        self.hz = os.sysconf("SC_CLK_TCK")
+        self.page = os.sysconf("SC_PAGE_SIZE")
+        self.cpus = os.cpu_count() or 1
+        self.generation = 0
+        self.prev_total = None
+        self.prev_idle = None
+        self.forks = None  # /proc/stat's fork counter at the last listing
+        self.busy = 0.0  # whole machine, % of all cpus
+        self.elapsed = 0  # ticks per cpu since the last refresh
+        self.open_fds = 0
+        # the soft limit to put back in close(), None if we didn't touch it
+        self.max_open, self.saved_limit = _raise_fd_limit(MAX_OPEN)
+        self.stat_reads = 0  # how many stat files the last refresh read
+
+    def _cpu_times(self):
+        with open(os.path.join(self.proc, "stat"), "rb") as f:
+            data = f.read()
+        ticks = [int(x) for x in data[:data.index(b"\n")].split()[1:]]
+        idle = ticks[3] + (ticks[4] if len(ticks) > 4 else 0)
+        at = data.find(b"\nprocesses ")
+        forks = int(data[at + 11:data.index(b"\n", at + 1)]) if at >= 0 else None
+        # guest time is already counted in user
+        return sum(ticks[:8]), idle, forks
+
+    def _stat(self, pid):
+        try:
+            fd = os.open(f"{self.proc}/{pid}/stat", os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            return os.read(fd, 1024)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    def _add(self, pid):
+        try:
+            uid = os.stat(f"{self.proc}/{pid}").st_uid
+        except OSError:
+            return None
+        fd = -1
+        if self.open_fds < self.max_open:
+            try:
+                fd = os.open(f"{self.proc}/{pid}/schedstat", os.O_RDONLY)
+                self.open_fds += 1
+            except OSError:
+                pass  # no schedstat in this kernel, stat every time then
+        rec = Proc(pid, fd, uid)
+        self.procs[pid] = rec
+        return rec
+
+    def _drop(self, rec):
+        if rec.fd >= 0:
+            os.close(rec.fd)
+            self.open_fds -= 1
+        del self.procs[rec.pid]
+
+    def _list(self):
+        pids = {int(name) for name in os.listdir(self.proc) if name.isdigit()}
+        for rec in [r for r in self.procs.values() if r.pid not in pids]:
+            self._drop(rec)
+        for pid in pids:
+            if pid not in self.procs:
+                self._add(pid)
+
+    def sample(self):
+        """
+        One refresh. Returns the Proc records (cpu is % of one cpu since the
+        last refresh, 0 the first time).
+        """
+        self.generation += 1
+        gen = self.generation
+        total, idle, forks = self._cpu_times()
+        if self.prev_total is not None and total > self.prev_total:
+            dtotal = total - self.prev_total
+            self.busy = 100.0 * (1 - (idle - self.prev_idle) / dtotal)
+            self.elapsed = dtotal / self.cpus
+        else:
+            self.elapsed = 0
+        self.prev_total, self.prev_idle = total, idle
+        scale = 100.0 / self.elapsed if self.elapsed else 0.0
+        if forks is None or forks != self.forks:
+            # something forked since last time, there may be new pids
+            self._list()
+            self.forks = forks
+
+        gone = []
+        reads = 0
+        turn = gen % FULL_EVERY
+        for rec in self.procs.values():
+            if rec.fd >= 0:
+                try:
+                    runtime = int(os.pread(rec.fd, 64, 0).split(None, 1)[0])
+                except (OSError, ValueError, IndexError):
+                    # ESRCH: that process is gone, even if its pid is back
+                    gone.append(rec)
+                    continue
+                moved = runtime != rec.runtime
+                rec.runtime = runtime
+                if not moved and rec.pid % FULL_EVERY != turn:
+                    # didn't run, nothing to re-read
+                    rec.cpu = 0.0
+                    rec.prev = rec.ticks
+                    rec.seen = gen
+                    continue
+            data = self._stat(rec.pid)
+            reads += 1
+            if not data:
+                gone.append(rec)
+                continue
+            try:
+                _parse(rec, data)
+            except (IndexError, ValueError):
+                continue
+            rec.cpu = (rec.ticks - rec.prev) * scale if rec.prev is not None and scale else 0.0
+            rec.prev = rec.ticks
+            rec.seen = gen
+        for rec in gone:
+            self._drop(rec)
+        self.stat_reads = reads
+        return self.procs.values()
+
+    def close(self):
+        for rec in list(self.procs.values()):
+            self._drop(rec)
+        if self.saved_limit is not None:
+            # the rest of the shell and what it starts get the limit they had
+            _restore_fd_limit(self.saved_limit)
+            self.saved_limit = None
+
+
+def _raise_fd_limit(wanted):
+    # as many fds as we want within the hard limit, keeping a margin for everything else.
+    # (how many we can keep open, the old soft limit or None when it's unchanged)
+    try:
+        import resource
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        saved = None
+        target = wanted + 256
+        if hard != resource.RLIM_INFINITY:
+            target = min(target, hard)
+        if soft != resource.RLIM_INFINITY and soft < target:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            saved = soft
+            soft = target
+        return max(0, min(wanted, (soft if soft != resource.RLIM_INFINITY else wanted + 256) - 256)), saved
+    except (ImportError, ValueError, OSError):
+        return 0, None
+
+
+def _restore_fd_limit(soft):
+    try:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, resource.getrlimit(resource.RLIMIT_NOFILE)[1]))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+# ---display
+
+_users = {}
+
+
+def user_name(uid):
+    name = _users.get(uid)
+    if name is None:
+        try:
+            import pwd
+
+            name = pwd.getpwuid(uid).pw_name
+        except (ImportError, KeyError):
+            name = str(uid)
+        _users[uid] = name
+    return name
+
+
+def _time(ticks, hz):
+    seconds = ticks / hz
+    return f"{int(seconds // 60)}:{seconds % 60:05.2f}"
+
+
+class Options:
+    __slots__ = ("sort", "reverse", "user", "pids", "name", "delay", "iterations", "batch", "limit")
+
+    def __init__(self):
+        self.sort = "cpu"
+        self.reverse = False
+        self.user = None
+        self.pids = None
+        self.name = None
+        self.delay = 2.0
+        self.iterations = None
+        self.batch = False
+        self.limit = None
+
+
+USAGE = "usage: top [-b] [-n N] [-d SECS] [-s cpu|mem|pid|name|time] [-r] [-u USER] [-p PID,...] [-l LINES] [NAME]"
+
+
+def parse_args(argv):
+    opts = Options()
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        try:
+            if arg == "-b":
+                opts.batch = True
+            elif arg == "-r":
+                opts.reverse = True
+            elif arg in ("-n", "-d", "-s", "-u", "-p", "-l") and args:
+                value = args.pop(0)
+                if arg == "-n":
+                    opts.iterations = int(value)
+                elif arg == "-d":
+                    opts.delay = max(0.1, float(value))
+                elif arg == "-s":
+                    if value not in SORT_KEYS:
+                        raise ValueError
+                    opts.sort = value
+                elif arg == "-u":
+                    opts.user = value
+                elif arg == "-p":
+                    opts.pids = {int(p) for p in value.split(",") if p}
+                else:
+                    opts.limit = int(value)
+            elif arg.startswith("-"):
+                raise ValueError
+            else:
+                opts.name = arg
+        except ValueError:
+            raise ValueError(USAGE) from None
+    return opts
+
+
+def select(procs, opts, count=None):
+    """
+    The records to show, filtered and in display order (count of them at most).
+    """
+    if opts.pids is not None or opts.user is not None or opts.name is not None:
+        name = opts.name.lower() if opts.name else None
+        procs = [
+            p for p in procs
+            if (opts.pids is None or p.pid in opts.pids)
+            and (opts.user is None or user_name(p.uid) == opts.user)
+            and (name is None or name in p.name.lower())
+        ]
+    key = SORT_KEYS[opts.sort]
+    # numbers biggest first, names a-z
+    descending = (opts.sort != "name") != opts.reverse
+    if count is None:
+        return sorted(procs, key=key, reverse=descending)
+    return (heapq.nlargest if descending else heapq.nsmallest)(count, procs, key=key)
+
+
+def header(sampler, procs):
+    live = sysinfo.dynamic()
+    total = sysinfo.static().get("memory_total")
+    states = {}
+    for p in procs:
+        states[p.state] = states.get(p.state, 0) + 1
+    lines = []
+    first = "top"
+    if live["uptime"] is not None:
+        first += f" - up {sysinfo.human_uptime(live['uptime'])}"
+    if live["load"]:
+        first += ", load average: " + ", ".join(f"{x:.2f}" for x in live["load"])
+    lines.append(first)
+    lines.append(
+        f"Tasks: {len(procs)} total, {states.get('R', 0)} running, {states.get('S', 0) + states.get('I', 0)} sleeping, "
+        f"{states.get('T', 0) + states.get('t', 0)} stopped, {states.get('Z', 0)} zombie"
+    )
+    lines.append(f"Cpu: {sampler.busy:5.1f}% busy over {sampler.cpus} cpu(s)")
+    if total and live["memory_used"] is not None:
+        lines.append(f"Mem: {sysinfo.human_bytes(live['memory_used'])} used / {sysinfo.human_bytes(total)}")
+    return lines
+
+
+COLUMNS = f"{'PID':>7} {'USER':<9} S {'%CPU':>5} {'%MEM':>5} {'RSS':>9} {'TIME+':>9}  COMMAND"
+
+
+def row(p, sampler, total):
+    rss = p.rss * sampler.page
+    mem = 100.0 * rss / total if total else 0.0
+    return (
+        f"{p.pid:>7} {user_name(p.uid)[:9]:<9} {p.state} {p.cpu:5.1f} {mem:5.1f} "
+        f"{sysinfo.human_bytes(rss):>9} {_time(p.ticks, sampler.hz):>9}  {p.name}"
+    )
+
+
+def frame(sampler, procs, opts, rows=None, note=None):
+    """
+    The lines of one refresh. rows caps the height (header included), the
+    -l limit caps the process list.
+    """
+    procs = list(procs)
+    total = sysinfo.static().get("memory_total")
+    lines = header(sampler, procs)
+    if note:
+        lines.append(note)
+    lines.append("")
+    lines.append(COLUMNS)
+    count = opts.limit
+    if rows is not None:
+        count = max(0, rows - len(lines)) if count is None else min(count, max(0, rows - len(lines)))
+    lines.extend(row(p, sampler, total) for p in select(procs, opts, count))
+    return lines
+
+
+def snapshot(opts):
+    """
+    Batch mode: frames as text, one per iteration (default one), for scripts
+    and pipes. The first one waits a moment so %CPU means something.
+    """
+    sampler = Sampler()
+    try:
+        sampler.sample()
+        count = opts.iterations or 1
+        for i in range(count):
+            time.sleep(min(opts.delay, 0.5) if i == 0 else opts.delay)
+            lines = frame(sampler, sampler.sample(), opts)
+            yield "\n".join(lines) + "\n"
+            if i + 1 < count:
+                yield "\n"
+    finally:
+        sampler.close()
+
+
+class Screen:
+    """
+    Rewrites only the lines that changed since the last frame.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.previous = []
+
+    def draw(self, lines, width):
+        parts = []
+        for i, line in enumerate(lines):
+            line = line[:width]
+            if i >= len(self.previous) or self.previous[i] != line:
+                parts.append(f"\x1b[{i + 1};1H{line}\x1b[K")
+        if len(lines) < len(self.previous):
+            parts.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+        self.previous = [line[:width] for line in lines]
+        if parts:
+            self.out.write("".join(parts))
+            self.out.flush()
+
+    def reset(self):
+        self.previous = []
+        self.out.write("\x1b[2J")
+
+
+KEYS_HELP = "c/m/p/n/t sort by cpu/mem/pid/name/time, r reverse, q quit"
+SORT_BY_KEY = {"c": "cpu", "m": "mem", "p": "pid", "n": "name", "t": "time"}
+
+
+def interactive(opts):
+    import tty
+    import select as sel
+    import termios
+
+    out = sys.stdout
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    sampler = Sampler()
+    screen = Screen(out)
+    out.write("\x1b[?1049h\x1b[?25l")  # alternate screen, hide the cursor
+    screen.reset()
+    try:
+        tty.setcbreak(fd)
+        sampler.sample()
+        delay = 0.3  # first frame soon, %CPU needs two samples
+        done = 0
+        while opts.iterations is None or done < opts.iterations:
+            ready, _, _ = sel.select([fd], [], [], delay)
+            if ready:
+                key = os.read(fd, 1).decode("utf-8", "replace")
+                if key in ("q", "\x03", "\x04"):
+                    break
+                if key in SORT_BY_KEY:
+                    opts.sort = SORT_BY_KEY[key]
+                elif key == "r":
+                    opts.reverse = not opts.reverse
+                # redraw right away with what we have
+                procs = sampler.procs.values()
+            else:
+                procs = sampler.sample()
+                done += 1
+            delay = opts.delay
+            size = shutil.get_terminal_size()
+            lines = frame(sampler, procs, opts, size.lines - 1, note=KEYS_HELP)
+            screen.draw(lines[: size.lines - 1], size.columns)
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+        out.write("\x1b[?25h\x1b[?1049l")
+        out.flush()
+        sampler.close()
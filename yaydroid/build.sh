@@ -1,5 +1,12 @@
 #!/usr/bin/env bash
 set -e
+cd "$(dirname "$0")"
+
+# the shared modules live one level up, buildozer only packages this
+# directory so refresh the copies first (tests/test_yaydroid.py checks them)
+for mod in commands completion engine install listing littu pipeline runner stats sysinfo; do
+  cp "../$mod.py" "$mod.py"
+done
 
 if ! command -v buildozer >/dev/null 2>&1; then
   echo "buildozer not found. Installing to ~/.local/bin..."
@@ -0,0 +1,255 @@
+import os
+import re
+import time
+import shlex
+import bisect
+import threading
+
+import listing
+import commands
+
+# tab completion, plus the PATH lookup the shell uses to run things
+#
+# every executable on $PATH goes into one sorted index, built once. each PATH
+# directory is remembered with its mtime (installing or removing anything in
+# it bumps that) and only directories whose mtime moved get read again, like
+# bash's `hash` table except it notices by itself. completing a command is a
+# bisect into the sorted names, and "is this a command at all" is one dict
+# lookup, so an unknown command gets its "command not found" without
+# starting a shell to hear it.
+#
+# file names come from listing.scan(), the same mtime-keyed scandir cache ls
+# uses.
+
+# a directory changed this recently might change again within the same mtime
+# tick, scan it but don't trust the result yet (same as listing.py)
+RACY_WINDOW = listing.RACY_WINDOW
+
+IS_WINDOWS = os.name == "nt"
+
+# what makes a line more than "program arg arg": those need a real sh
+SHELL_SYNTAX = re.compile(r"[|&;<>()$`\\*?\[\]{}~#!\n]")
+
+# sh's own builtins and keywords: never on PATH (or not the one sh would run)
+SH_WORDS = frozenset(
+    """
+    . : [ alias bg break case cd command continue do done echo elif else esac
+    eval exec exit export false fc fg fi for function getopts hash if in jobs
+    kill local printf pwd read readonly return select set shift test then
+    times trap true type ulimit umask unalias unset until wait while
+    """.split()
+)
+
+
+def _executables(directory):
+    names = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                if IS_WINDOWS:
+                    if os.path.splitext(entry.name)[1].lower() in _pathext():
+                        names.append(entry.name)
+                elif os.access(entry.path, os.X_OK):
+                    names.append(entry.name)
+    except OSError:
+        pass
+    return names
+
+
+def _pathext():
+    return {ext.lower() for ext in os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(";") if ext}
+
+
+class PathIndex:
+    """
+    name -> full path for everything runnable on $PATH, first directory wins.
+    """
+
+    def __init__(self):
+        self.path = None  # the $PATH the directory list came from
+        self.order = []
+        self.dirs = {}  # directory -> (mtime or None, [names])
+        self.table = {}
+        self.names = []  # sorted keys of table, for prefix search
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Re-reads the PATH directories that changed since last time. With
+        nothing changed that's one stat per directory.
+        """
+        with self.lock:
+            path = os.environ.get("PATH", "")
+            changed = path != self.path
+            if changed:
+                self.path = path
+                self.order = list(dict.fromkeys(d for d in path.split(os.pathsep) if d))
+            now = time.time()
+            for directory in self.order:
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    mtime = -1
+                hit = self.dirs.get(directory)
+                if hit is not None and hit[0] == mtime:
+                    continue
+                names = _executables(directory) if mtime != -1 else []
+                # None never matches, so a racy directory gets read again next time
+                self.dirs[directory] = (mtime if now - mtime / 1e9 > RACY_WINDOW else None, names)
+                changed = True
+            if changed:
+                self._rebuild()
+
+    def _rebuild(self):
+        table = {}
+        for directory in reversed(self.order):
+            names = self.dirs.get(directory, (None, []))[1]
+            table.update((name, os.path.join(directory, name)) for name in names)
+            if IS_WINDOWS:
+                # notepad runs notepad.exe
+                table.update((os.path.splitext(name)[0].lower(), os.path.join(directory, name)) for name in names)
+        self.table = table
+        self.names = sorted(table)
+
+    def which(self, name):
+        """
+        Full path of the program name runs, None if there's no such thing.
+        """
+        if os.sep in name or (os.altsep and os.altsep in name):
+            return name if os.path.isfile(name) and os.access(name, os.X_OK) else None
+        self.refresh()
+        return self.table.get(name.lower() if IS_WINDOWS else name)
+
+    def complete(self, prefix):
+        self.refresh()
+        names = self.names
+        i = bisect.bisect_left(names, prefix)
+        j = bisect.bisect_left(names, prefix + "\U0010ffff")
+        return names[i:j]
+
+    def __len__(self):
+        return len(self.table)
+
+
+_index = None
+
+
+def path_index():
+    global _index
+    if _index is None:
+        _index = PathIndex()
+    return _index
+
+
+def simple_argv(line):
+    """
+    The argv for line if it's just a program and plain (maybe quoted)
+    arguments, None when it needs sh (pipes, redirects, variables, globs,
+    assignments, sh builtins...).
+    """
+    if SHELL_SYNTAX.search(line):
+        return None
+    try:
+        argv = shlex.split(line)
+    except ValueError:
+        return None
+    if not argv or "=" in argv[0] or argv[0] in SH_WORDS:
+        return None
+    return argv
+
+
+# ---completion
+
+
+def complete_path(text):
+    """
+    Files and directories starting with text. Directories come back with a
+    trailing /, files with a space.
+    """
+    directory, base = os.path.split(text)
+    real = os.path.expanduser(directory) if directory else "."
+    try:
+        entries = listing.scan(real).entries
+    except OSError:
+        return []
+    out = []
+    for entry in entries:
+        name = entry.name
+        if not name.startswith(base) or (name.startswith(".") and not base.startswith(".")):
+            continue
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        out.append(os.path.join(directory, name) + ("/" if is_dir else " "))
+    return out
+
+
+class Completer:
+    """
+    readline completer: builtins and PATH programs for the first word,
+    files for the rest (and for anything with a / in it).
+    """
+
+    def __init__(self, index=None, extra=None):
+        self.index = index or path_index()
+        self.extra = extra  # callable giving more command names (script functions...)
+        self.matches = []
+
+    def command_names(self, text):
+        found = self.index.complete(text)  # sorted already, and maybe huge
+        table = self.index.table
+        own = {name for name, cmd in commands.COMMANDS.items() if not cmd.hidden and name.startswith(text)}
+        if self.extra is not None:
+            own.update(name for name in self.extra() if name.startswith(text))
+        found.extend(name for name in own if name not in table)
+        # two sorted runs, timsort just merges them
+        found.sort()
+        return [name + " " for name in found]
+
+    def candidates(self, line, begidx, text):
+        before = line[:begidx].rstrip()
+        first = not before or before[-1] in "|;&"
+        if first and "/" not in text and not text.startswith(("~", ".")):
+            return self.command_names(text)
+        return complete_path(text)
+
+    def complete(self, text, state):
+        if state == 0:
+            try:
+                self.matches = self.candidates(_readline.get_line_buffer(), _readline.get_begidx(), text)
+            except Exception:
+                # an exception in here would just be swallowed by readline
+                self.matches = []
+        return self.matches[state] if state < len(self.matches) else None
+
+
+_readline = None
+
+
+def setup_readline(extra=None):
+    """
+    Hooks the completer up to Tab and starts building the PATH index in the
+    background, so the first Tab doesn't pay for it. Returns the Completer,
+    None without readline.
+    """
+    global _readline
+    try:
+        import readline
+    except ImportError:
+        return None
+    _readline = readline
+    completer = Completer(extra=extra)
+    readline.set_completer(completer.complete)
+    readline.set_completer_delims(" \t\n;|&<>")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    threading.Thread(target=completer.index.refresh, name="yay-pathindex", daemon=True).start()
+    return completer
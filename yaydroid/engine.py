@@ -0,0 +1,215 @@
+import io
+import os
+import sys
+import threading
+import subprocess as sub
+
+import runner
+import listing
+import pipeline
+import commands
+from commands import command, dispatch, traced
+
+# the command engine, shared by the desktop shell (main.py) and yaydroid
+#
+# a Session runs command lines: builtins from the commands table, pipelines
+# through pipeline.py, everything else through its fallback (the external
+# command runner, each front-end brings its own). the builtins both
+# front-ends have (ls, cd, help, whoamiyay, time) live here so they behave
+# the same everywhere.
+#
+#   shell = engine.session()
+#   shell.execute("ls -l")        prints, like at the prompt, returns the code
+#   r = shell.run("ls -l")        captures instead: r.stdout, r.stderr, r.code, r.timings
+#
+# run() never touches the terminal: externals get /dev/null for stdin and
+# builtins that would ask something get no answer. it swaps sys.stdout and
+# sys.stderr while the command runs, so one run() at a time per process
+# (they queue up on a lock), and whatever other threads print meanwhile ends
+# up in the Result too.
+
+
+class Result:
+    __slots__ = ("stdout", "stderr", "code", "timings")
+
+    def __init__(self, stdout, stderr, code, timings):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.code = code
+        self.timings = timings  # {"real": s, "user": s, "sys": s}, children included
+
+    def __repr__(self):
+        return f"Result(code={self.code}, stdout={self.stdout!r}, stderr={self.stderr!r})"
+
+
+def _capture():
+    # a text stream with a .buffer, so runner.write_chunk's raw writes land in
+    # the same place as print()s, in order
+    return io.TextIOWrapper(io.BytesIO(), encoding="utf-8", errors="replace", write_through=True)
+
+
+def _captured(stream):
+    return stream.buffer.getvalue().decode("utf-8", "replace")
+
+
+_run_lock = threading.Lock()
+
+
+class Session:
+    def __init__(self, user="User", hostname="localhost", fallback=None, ask=None):
+        self.user = user
+        self.hostname = hostname
+        # fallback(line) runs what isn't a builtin and returns its exit code
+        self.fallback = fallback or self.run_external
+        # ask(prompt) -> str for builtins that want to ask something, None: they don't get to
+        self.ask = ask
+        # what external commands read: None = our stdin, or sub.DEVNULL / a file
+        self.stdin = None
+        # >0 while `time` runs something, the runner has to make it our own child then
+        self.timing = 0
+
+    def input(self, prompt):
+        """
+        Asks the user through the front-end, None when there's nobody to ask.
+        """
+        if self.ask is None:
+            return None
+        return self.ask(prompt)
+
+    def run_external(self, line):
+        return runner.run_streaming(line, stdin=self.stdin)
+
+    def execute(self, line):
+        """
+        Runs one command line, output going wherever sys.stdout/sys.stderr
+        point. Returns the exit code.
+        """
+        line = line.strip()
+        if not line:
+            return 0
+        _active.append(self)
+        try:
+            if line.split(None, 1)[0] == "time":
+                # a keyword like in bash, so it gets the whole line and not one pipeline stage
+                return self.time(line[4:].strip())
+            stages = pipeline.split_pipeline(line)
+            if stages and pipeline.has_builtin(stages):
+                name = "|".join(stage.split(None, 1)[0] for stage in stages)
+                return traced(name, stages, lambda: pipeline.run_pipeline(stages, stdin=self.stdin))
+            result = dispatch(line, self.fallback)
+            return 0 if result is None else result
+        finally:
+            _active.pop()
+
+    def time(self, line):
+        """
+        `time CMD`: runs CMD and prints real/user/sys to stderr.
+        """
+        import stats
+
+        self.timing += 1
+        try:
+            result, timing = stats.measure(lambda: self.execute(line))
+        finally:
+            self.timing -= 1
+        stats.report(timing)
+        return result
+
+    def run(self, line):
+        """
+        Runs line with its output captured. Never raises for a failing
+        command (an exception inside becomes code 1 and a line on stderr,
+        exit becomes its code); ctrl-c still gets through.
+        """
+        import stats
+
+        out, err = _capture(), _capture()
+        with _run_lock:
+            saved = sys.stdout, sys.stderr, sys.stdin, self.stdin, self.ask
+            sys.stdout, sys.stderr, sys.stdin = out, err, io.StringIO()
+            self.stdin, self.ask = sub.DEVNULL, None
+            try:
+                code, (real, user, system) = stats.measure(lambda: self._contained(line))
+            finally:
+                sys.stdout, sys.stderr, sys.stdin, self.stdin, self.ask = saved
+        return Result(_captured(out), _captured(err), code, {"real": real, "user": user, "sys": system})
+
+    def _contained(self, line):
+        try:
+            return self.execute(line)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=sys.stderr)
+            return 1
+        except EOFError:
+            # something wanted input anyway
+            print("yay: no input available", file=sys.stderr)
+            return 1
+        except Exception as e:
+            print(f"yay: {e}", file=sys.stderr)
+            return 1
+
+
+_session = None
+_active = []  # sessions inside execute(), innermost last
+
+
+def session(create=True):
+    """
+    The process' main Session (what the front-end drives).
+    """
+    global _session
+    if _session is None and create:
+        _session = Session()
+    return _session
+
+
+def current():
+    """
+    The Session running the command that's asking, for builtins.
+    """
+    return _active[-1] if _active else session()
+
+
+# ---the builtins every front-end has
+
+
+@command("help", help="Show this help.", stream=True)
+def cmd_help(argv, stdin):
+    yield commands.help_text() + "\n"
+
+
+@command("ls", help="List files (-l long, -a all, -R recursive, -S size, -t time, -r reverse)", usage="ls [-laRStr] [path...]", stream=True)
+def cmd_ls(argv, stdin):
+    return (yield from listing.ls(argv))
+
+
+@command("cd", help="Change directory", usage="cd [dir]")
+def cmd_cd(argv):
+    if argv:
+        directory = " ".join(argv)
+    else:
+        directory = (current().input("Enter the directory path: ") or "").strip()
+        if not directory:
+            print("cd: no directory given")
+            return 1
+    try:
+        os.chdir(directory)
+        print(f"Directory changed to: {os.getcwd()}")
+    except OSError as error:
+        print("Error changing directory:", error)
+        return 1
+    return 0
+
+
+@command("whoamiyay", help="Show current user", stream=True)
+def cmd_whoamiyay(argv, stdin):
+    yield current().user + "\n"
+
+
+@command("time", help="Time a command (real/user/sys)", usage="time CMD")
+def cmd_time(argv):
+    import shlex
+
+    return current().time(shlex.join(argv))
@@ -0,0 +1,216 @@
+import os
+import stat
+import time
+import collections
+
+# the ls builtin
+#
+# directories are read with os.scandir and the DirEntry list is cached per
+# directory, keyed on the directory's mtime (adding, removing or renaming
+# anything in it bumps that), so running ls again in the same place skips the
+# readdir entirely. -l/-S/-t need stat data: a fresh scan takes it from the
+# DirEntry (entry.stat, which costs nothing extra on Windows and is the one
+# lstat on Linux), a cached scan re-reads it since a file changing in place
+# does not touch its directory's mtime.
+
+CACHE_SIZE = 64
+# a directory changed less than this many seconds ago might change again
+# within the same mtime tick, don't trust it yet (coarse timestamp filesystems)
+RACY_WINDOW = 2.0
+BLOCK_LINES = 1024
+
+_cache = collections.OrderedDict()
+
+
+class Scan:
+    __slots__ = ("mtime", "entries", "rendered", "reused")
+
+    def __init__(self, mtime, entries):
+        self.mtime = mtime
+        # sorted by name once, the other orders need stat data anyway
+        self.entries = sorted(entries, key=lambda e: e.name)
+        # finished output of the plain (no stat) listings, per flag combo
+        self.rendered = {}
+        # served from the cache at least once, the DirEntry stats may be stale
+        self.reused = False
+
+
+def scan(path):
+    """
+    The Scan (name-sorted DirEntry list) for path, straight from the cache if
+    the directory hasn't changed.
+    """
+    key = os.path.abspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    hit = _cache.get(key)
+    if hit is not None and hit.mtime == mtime:
+        _cache.move_to_end(key)
+        hit.reused = True
+        return hit
+    with os.scandir(key) as it:
+        result = Scan(mtime, it)
+    if time.time() - mtime / 1e9 > RACY_WINDOW:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.pop(key, None)
+    return result
+
+
+def forget(path=None):
+    if path is None:
+        _cache.clear()
+    else:
+        _cache.pop(os.path.abspath(path), None)
+
+
+def parse_args(argv):
+    flags = set()
+    paths = []
+    only_paths = False
+    for arg in argv:
+        if not only_paths and arg == "--":
+            only_paths = True
+        elif not only_paths and arg.startswith("-") and len(arg) > 1:
+            for flag in arg[1:]:
+                if flag not in "laRStr":
+                    raise ValueError(f"ls: unknown option -{flag} (try -l -a -R -S -t -r)")
+                flags.add(flag)
+        else:
+            paths.append(arg)
+    return flags, paths
+
+
+_names = {}
+_stamps = {}
+
+
+def _owner(uid, gid):
+    key = (uid, gid)
+    if key not in _names:
+        try:
+            import pwd
+            import grp
+
+            user = pwd.getpwuid(uid).pw_name
+        except (ImportError, KeyError):
+            user = str(uid)
+        try:
+            group = grp.getgrgid(gid).gr_name
+        except (ImportError, KeyError, NameError):
+            group = str(gid)
+        _names[key] = (user, group)
+    return _names[key]
+
+
+def _long_line(name, st, now):
+    user, group = _owner(st.st_uid, st.st_gid)
+    # like ls: the year instead of the time for anything older than ~6 months
+    old = abs(now - st.st_mtime) > 182 * 86400
+    minute = (int(st.st_mtime // 60), old)
+    stamp = _stamps.get(minute)
+    if stamp is None:
+        when = time.localtime(st.st_mtime)
+        stamp = time.strftime("%b %d  %Y" if old else "%b %d %H:%M", when)
+        if len(_stamps) > 100000:
+            _stamps.clear()
+        _stamps[minute] = stamp
+    return f"{stat.filemode(st.st_mode)} {st.st_nlink:>3} {user:<8} {group:<8} {st.st_size:>10} {stamp} {name}"
+
+
+def _stat(entry, reused):
+    try:
+        if reused:
+            # the DirEntry kept whatever it stat'ed last time, go back to the disk
+            return os.lstat(entry.path)
+        return entry.stat(follow_symlinks=False)
+    except OSError:
+        return None
+
+
+def _listing(entries, flags, reused=False):
+    if "a" not in flags:
+        entries = [e for e in entries if not e.name.startswith(".")]
+    need_stat = flags & {"l", "S", "t"}
+    stats = {e.name: _stat(e, reused) for e in entries} if need_stat else {}
+
+    if "S" in flags:
+        entries = sorted(entries, key=lambda e: (-(stats[e.name].st_size if stats[e.name] else 0), e.name))
+    elif "t" in flags:
+        entries = sorted(entries, key=lambda e: (-(stats[e.name].st_mtime_ns if stats[e.name] else 0), e.name))
+    if "r" in flags:
+        entries = entries[::-1]
+    return entries, stats
+
+
+def ls(argv, cwd=None):
+    """
+    Generator behind the ls builtin, yields the output in blocks of lines.
+    Returns the exit code (1 if anything couldn't be listed).
+    """
+    try:
+        flags, paths = parse_args(argv)
+    except ValueError as e:
+        yield f"{e}\n"
+        return 2
+    here = cwd or os.getcwd()
+    if not paths:
+        paths = [here]
+    code = 0
+    now = time.time()
+    todo = collections.deque(paths)
+    first = True
+    while todo:
+        path = todo.popleft()
+        full = path if os.path.isabs(path) else os.path.join(here, path)
+        if not os.path.isdir(full):
+            if os.path.lexists(full):
+                st = os.lstat(full)
+                yield (_long_line(path, st, now) if "l" in flags else path) + "\n"
+            else:
+                yield f"ls: cannot access '{path}': No such file or directory\n"
+                code = 1
+            continue
+        try:
+            result = scan(full)
+        except OSError as error:
+            yield f"Error listing directory: {error}\n"
+            code = 1
+            continue
+        # the header is the directory, like the old ls always printed
+        yield ("" if first else "\n") + (full if path == here else path) + (":\n" if "R" in flags else "\n")
+        first = False
+        plain_key = "a" in flags, "r" in flags
+        if plain_key in result.rendered and not flags & {"l", "S", "t", "R"}:
+            # same directory, same listing: nothing to do at all
+            yield result.rendered[plain_key]
+            continue
+        entries, stats = _listing(result.entries, flags, result.reused)
+        if not stats:
+            text = "".join(name + "\n" for name in (e.name for e in entries))
+            result.rendered[plain_key] = text
+            yield text
+        else:
+            block = []
+            for entry in entries:
+                st = stats.get(entry.name)
+                block.append(_long_line(entry.name, st, now) if "l" in flags and st is not None else entry.name)
+                if len(block) >= BLOCK_LINES:
+                    yield "\n".join(block) + "\n"
+                    block = []
+            if block:
+                yield "\n".join(block) + "\n"
+
+        if "R" in flags:
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(os.path.join(path, entry.name))
+                except OSError:
+                    pass
+            # depth first, like ls -R
+            todo.extendleft(reversed(subdirs))
+    return code
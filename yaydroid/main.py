@@ -8,11 +8,13 @@ Features:
 - File picker for audio (Kivy's FileChooser)
 - Play audio via Android intent (ACTION_VIEW) if available
 - Run shell commands on device (optionally as root via "Run as root" toggle)
+- Same builtins as the desktop shell, through engine.py
 - Secure password storage via Java EncryptedSharedPreferences helper (pyjnius) if available
 - Fallback to littu.py if present, else plaintext storage (not recommended)
 """
 
 import os
+import signal
 import subprocess
 import threading
 from pathlib import Path
@@ -28,6 +30,9 @@ from kivy.uix.button import Button
 from kivy.uix.filechooser import FileChooserListView
 from kivy.uix.togglebutton import ToggleButton
 
+import engine
+from commands import command
+
 # Try to import littu for backward compatibility (optional)
 try:
     import littu as lil
@@ -114,6 +119,9 @@ class RootWidget(BoxLayout):
         super().__init__(**kwargs)
         self.console_text = ""
         self.app = App.get_running_app()
+        # builtins and pipelines come from engine.py, what isn't a builtin goes to the device shell
+        self.shell = engine.session()
+        self.shell.fallback = self._device_command
         self.ensure_config()
         Clock.schedule_once(lambda dt: self.post_startup(), 0.2)
 
@@ -212,6 +220,8 @@ class RootWidget(BoxLayout):
             host = self.hostname_file.read_text().strip() if self.hostname_file.exists() else "localhost"
         except Exception:
             host = "localhost"
+        # whoamiyay asks the engine
+        self.shell.user, self.shell.hostname = user, host
         return f"{user}@{host} $ ~/ "
 
     def append_console(self, text):
@@ -230,67 +240,14 @@ class RootWidget(BoxLayout):
         threading.Thread(target=self._run_command_thread, args=(cmd,), daemon=True).start()
 
     def _run_command_thread(self, cmd):
-        run_as_root = self.ids.root_toggle.state == "down"
-        # builtins
-        if cmd == "ls":
-            out = self._builtin_ls()
-            self.append_console(out + "\n" + self.get_prompt())
-            return
-        if cmd.startswith("cd "):
-            arg = cmd.split(" ", 1)[1].strip()
-            out = self._builtin_cd(arg)
-            self.append_console(out + "\n" + self.get_prompt())
-            return
-        if cmd == "help":
-            out = (
-                "LIST OF COMMANDS:\nhelp, ls, cd <dir>, exit, source, whoamiyay, calc, audioplayer\n"
-                "Other commands forwarded to device shell. Toggle 'Run as root' to use su -c.\n"
-            )
-            self.append_console(out + self.get_prompt())
-            return
-        if cmd == "whoamiyay":
-            try:
-                out = self.user_file.read_text().strip() if self.user_file.exists() else "User"
-            except Exception:
-                out = "User"
-            self.append_console(out + "\n" + self.get_prompt())
-            return
-        if cmd == "source":
-            self.append_console("Open https://github.com/hyuuwu/yaylinux in the device browser.\n")
-            # Launch browser intent
-            try:
-                if PythonActivity:
-                    Intent = autoclass('android.content.Intent')
-                    Uri = autoclass('android.net.Uri')
-                    intent = Intent(Intent.ACTION_VIEW, Uri.parse("https://github.com/hyuuwu/yaylinux"))
-                    PythonActivity.mActivity.startActivity(intent)
-            except Exception:
-                pass
-            self.append_console(self.get_prompt())
-            return
-        if cmd == "exit":
-            self.append_console("Exiting app...\n")
-            Clock.schedule_once(lambda dt: App.get_running_app().stop(), 0)
-            return
+        result = self.shell.run(cmd)
+        out = result.stdout + result.stderr
+        if out and not out.endswith("\n"):
+            out += "\n"
+        self.append_console(out + self.get_prompt())
 
-        # fallback: run shell command
-        out = run_shell_command(cmd, as_root=run_as_root)
-        self.append_console(out + "\n" + self.get_prompt())
-
-    def _builtin_ls(self):
-        try:
-            cwd = os.getcwd()
-            items = os.listdir(cwd)
-            return cwd + "\n" + "\n".join(items)
-        except Exception as e:
-            return f"Error listing directory: {e}"
-
-    def _builtin_cd(self, directory):
-        try:
-            os.chdir(directory)
-            return f"Directory changed to: {os.getcwd()}"
-        except Exception as e:
-            return f"Error changing directory: {e}"
+    def _device_command(self, cmd):
+        return run_shell_command(cmd, as_root=self.ids.root_toggle.state == "down")
 
     def clear_console(self):
         self.console_text = ""
@@ -352,21 +309,68 @@ def has_su():
     return False
 
 def run_shell_command(cmd, as_root=False, timeout=60):
+    """
+    Runs cmd in the device shell and prints what it said. Returns the exit code.
+    """
     if not cmd:
-        return "(no command)"
+        print("(no command)")
+        return 0
     try:
         if as_root and has_su():
             final = ["su", "-c", cmd]
         else:
             final = ["sh", "-c", cmd]
-        proc = subprocess.Popen(final, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-        output = []
-        for line in proc.stdout:
-            output.append(line.rstrip("\n"))
-        proc.wait(timeout=timeout)
-        return "\n".join(output) or "(no output)"
+        # own process group so a timeout takes the command's children down too
+        proc = subprocess.Popen(final, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, start_new_session=True)
+        try:
+            output, _ = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                # su's group can be out of reach, get what we can
+                proc.kill()
+            try:
+                output, _ = proc.communicate(timeout=1)
+            except subprocess.TimeoutExpired:
+                output = ""
+            if output:
+                print(output.rstrip("\n"))
+            print(f"yay: {cmd}: killed after {timeout}s")
+            return 124
+        if output:
+            print(output.rstrip("\n"))
+        return proc.returncode
     except Exception as e:
-        return f"Error running command: {e}"
+        print(f"Error running command: {e}")
+        return 1
+
+
+def open_url(url):
+    try:
+        if PythonActivity:
+            Intent = autoclass('android.content.Intent')
+            Uri = autoclass('android.net.Uri')
+            intent = Intent(Intent.ACTION_VIEW, Uri.parse(url))
+            PythonActivity.mActivity.startActivity(intent)
+    except Exception:
+        pass
+
+
+# the android versions of these, the rest of the builtins are engine.py's
+
+
+@command("source", help="Open the source code in the browser")
+def cmd_source(argv):
+    print("Open https://github.com/hyuuwu/yaylinux in the device browser.")
+    open_url("https://github.com/hyuuwu/yaylinux")
+
+
+@command("exit", help="Exit YAYLinux")
+def cmd_exit(argv):
+    print("Exiting app...")
+    Clock.schedule_once(lambda dt: App.get_running_app().stop(), 0)
+
 
 class YAYApp(App):
     def build(self):
@@ -0,0 +1,269 @@
+import os
+import sys
+import time
+import math
+import collections
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+# per-command latency and resource accounting
+#
+# `stats on` hooks a Recorder into commands' tracers, so every command that
+# goes through execute_command gets its wall time logged under its first word
+# (pipelines as "a|b|c"). around each one getrusage(RUSAGE_CHILDREN) is read
+# twice: the difference is the cpu time of the child processes it started
+# and waited for. ru_maxrss of the children is a high water mark over every
+# child so far, so a command only gets a peak rss when it pushed that mark up.
+# with the coproc backend the children belong to the long lived sh and aren't
+# ours to account, `time` and the limits go through spawn for that reason.
+#
+#   stats            table with count, p50/p95/p99/max, child cpu, peak rss
+#   stats NAME       histogram of NAME's latencies
+#   time CMD         bash style real/user/sys for one command
+#
+# --profile runs the whole session under cProfile (see profiled()).
+
+# latencies kept per command for the percentiles, the oldest fall off
+KEEP = 2048
+
+# ru_maxrss is KiB on linux, bytes on macos
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def children():
+    """
+    (user, sys, maxrss bytes) of our waited-for children, all zeros without resource.
+    """
+    if resource is None:
+        return 0.0, 0.0, 0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime, usage.ru_stime, usage.ru_maxrss * RSS_UNIT
+
+
+class Entry:
+    __slots__ = ("count", "failed", "total", "cpu", "peak_rss", "times")
+
+    def __init__(self, keep=KEEP):
+        self.count = 0
+        self.failed = 0
+        self.total = 0.0
+        self.cpu = 0.0  # child user+sys seconds
+        self.peak_rss = None
+        self.times = collections.deque(maxlen=keep)
+
+
+def percentile(ordered, p):
+    """
+    Nearest rank percentile of an already sorted list.
+    """
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    def __init__(self, keep=KEEP):
+        self.keep = keep
+        self.entries = {}
+        # commands nest (a script function calling commands...), one mark per level
+        self.marks = []
+
+    def before(self, name, argv):
+        self.marks.append(children())
+
+    def after(self, name, argv, seconds, result):
+        start = self.marks.pop() if self.marks else None
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = Entry(self.keep)
+        entry.count += 1
+        entry.total += seconds
+        entry.times.append(seconds)
+        if result not in (None, 0):
+            entry.failed += 1
+        if start is not None:
+            user, system, rss = children()
+            entry.cpu += (user - start[0]) + (system - start[1])
+            if rss > start[2]:
+                entry.peak_rss = max(entry.peak_rss or 0, rss)
+
+    def reset(self):
+        self.entries.clear()
+
+    def summary(self):
+        """
+        One dict per command, the slowest in total first.
+        """
+        rows = []
+        for name, entry in self.entries.items():
+            ordered = sorted(entry.times)
+            rows.append(
+                {
+                    "name": name,
+                    "count": entry.count,
+                    "failed": entry.failed,
+                    "total": entry.total,
+                    "p50": percentile(ordered, 50),
+                    "p95": percentile(ordered, 95),
+                    "p99": percentile(ordered, 99),
+                    "max": ordered[-1] if ordered else None,
+                    "cpu": entry.cpu,
+                    "peak_rss": entry.peak_rss,
+                }
+            )
+        rows.sort(key=lambda row: -row["total"])
+        return rows
+
+
+_recorder = None
+
+
+def recorder(create=True):
+    global _recorder
+    if _recorder is None and create:
+        _recorder = Recorder()
+    return _recorder
+
+
+_on = False
+
+
+def enable():
+    global _on
+    import commands
+
+    rec = recorder()
+    if not _on:
+        commands.add_tracer(rec.after, before=rec.before)
+        _on = True
+    return rec
+
+
+def disable():
+    global _on
+    import commands
+
+    if _on:
+        commands.remove_tracer(_recorder.after)
+        _on = False
+
+
+def enabled():
+    return _on
+
+
+# ---reports
+
+
+def fmt_seconds(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def fmt_rss(n):
+    if n is None:
+        return "-"
+    import sysinfo
+
+    return sysinfo.human_bytes(n)
+
+
+def table(rows):
+    if not rows:
+        return "nothing recorded yet\n"
+    width = max(7, max(len(row["name"]) for row in rows))
+    lines = [
+        f"{'COMMAND':<{width}} {'N':>6} {'FAIL':>5} {'P50':>9} {'P95':>9} {'P99':>9} {'MAX':>9} {'CHILD CPU':>10} {'PEAK RSS':>10}"
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['name']:<{width}} {row['count']:>6} {row['failed']:>5} "
+            f"{fmt_seconds(row['p50']):>9} {fmt_seconds(row['p95']):>9} {fmt_seconds(row['p99']):>9} "
+            f"{fmt_seconds(row['max']):>9} {fmt_seconds(row['cpu']):>10} {fmt_rss(row['peak_rss']):>10}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def histogram(times, width=40):
+    """
+    Latencies bucketed by powers of two (in ms), one bar per bucket.
+    """
+    if not times:
+        return "nothing recorded yet\n"
+    buckets = collections.Counter()
+    for seconds in times:
+        ms = seconds * 1000
+        buckets[math.floor(math.log2(ms)) if ms > 0 else -10] += 1
+    most = max(buckets.values())
+    lines = []
+    for exp in range(min(buckets), max(buckets) + 1):
+        n = buckets.get(exp, 0)
+        bar = "#" * max(1 if n else 0, round(n / most * width))
+        lines.append(f"{fmt_seconds(2 ** exp / 1000):>9} .. {fmt_seconds(2 ** (exp + 1) / 1000):>9} {n:>6} {bar}")
+    return "\n".join(lines) + "\n"
+
+
+# ---time CMD
+
+
+def measure(run):
+    """
+    Runs run() and returns (its result, (real, user, sys)), user/sys
+    counting us and the children we waited for, like bash's time.
+    """
+    t0 = time.perf_counter()
+    before = os.times()
+    try:
+        result = run()
+    finally:
+        after = os.times()
+        real = time.perf_counter() - t0
+    user = (after.user - before.user) + (after.children_user - before.children_user)
+    system = (after.system - before.system) + (after.children_system - before.children_system)
+    return result, (real, user, system)
+
+
+def report(timing, out=None):
+    out = out or sys.stderr
+    for label, seconds in zip(("real", "user", "sys"), timing):
+        minutes, seconds = divmod(seconds, 60)
+        print(f"{label}\t{int(minutes)}m{seconds:.3f}s", file=out)
+
+
+# ---profiling
+
+
+@contextmanager
+def profiled(path, top=25, out=None):
+    """
+    Runs the block under cProfile, then saves the raw stats to path (for
+    snakeviz, pstats...) and prints the top entries by cumulative time.
+    path None = no profiling.
+    """
+    if path is None:
+        yield
+        return
+    import cProfile
+    import pstats
+
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        out = out or sys.stderr
+        try:
+            prof.dump_stats(path)
+            print(f"[profile] saved to {path}", file=out)
+        except OSError as e:
+            print(f"[profile] couldn't save {path}: {e}", file=out)
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(top)
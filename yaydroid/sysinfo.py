@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+import platform
+
+# what neofetch shows, for real this time
+#
+# everything comes straight out of /proc, /sys and /etc/os-release, no
+# subprocesses. facts that can't change while the shell runs (distro, kernel,
+# cpu model, total ram, machine model) are read once per session; the rest
+# (uptime, memory in use, load, battery, temperature) is a handful of tiny
+# reads every time.
+#
+#   sysinfo.collect()   -> dict with all of it (missing things are None)
+#   sysinfo.static()    -> just the cached part
+#   sysinfo.dynamic()   -> just the live part
+#
+# on anything that isn't linux the platform module fills in what it can.
+
+ROOT = "/"
+
+_static = {}  # root -> dict
+
+
+def _read(root, path):
+    try:
+        with open(os.path.join(root, path), "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _first_line(root, path):
+    text = _read(root, path)
+    return text.strip().split("\n", 1)[0].strip() if text else None
+
+
+def os_release(root=ROOT):
+    """
+    /etc/os-release (or /usr/lib/os-release) as a dict, {} when there isn't one.
+    """
+    for path in ("etc/os-release", "usr/lib/os-release"):
+        text = _read(root, path)
+        if text is None:
+            continue
+        info = {}
+        for line in text.splitlines():
+            key, sep, value = line.partition("=")
+            if sep and not key.startswith("#"):
+                info[key.strip()] = value.strip().strip("\"'")
+        return info
+    return {}
+
+
+def _cpu(root):
+    model = None
+    text = _read(root, "proc/cpuinfo") or ""
+    # x86 says "model name", arm "Hardware" or "Model", powerpc "cpu"
+    for key in ("model name", "Hardware", "Model", "cpu"):
+        for line in text.splitlines():
+            name, sep, value = line.partition(":")
+            if sep and name.strip() == key and value.strip():
+                model = " ".join(value.split())
+                break
+        if model:
+            break
+    khz = _first_line(root, "sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_max_freq")
+    mhz = int(khz) // 1000 if khz and khz.isdigit() else None
+    return model, mhz
+
+
+def _meminfo(root):
+    text = _read(root, "proc/meminfo")
+    if text is None:
+        return {}
+    info = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(":")
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            info[key] = int(parts[0]) * 1024  # kB
+    return info
+
+
+def _model(root):
+    name = _first_line(root, "sys/devices/virtual/dmi/id/product_name")
+    vendor = _first_line(root, "sys/devices/virtual/dmi/id/sys_vendor")
+    if name and vendor and not name.startswith(vendor):
+        name = f"{vendor} {name}"
+    if not name:
+        # raspberry pis and other device tree boards
+        name = (_first_line(root, "sys/firmware/devicetree/base/model") or "").rstrip("\0") or None
+    return name
+
+
+def static(root=ROOT):
+    """
+    The facts that stay put for the whole session, read once.
+    """
+    cached = _static.get(root)
+    if cached is not None:
+        return cached
+    uname = platform.uname()
+    if sys.platform.startswith("linux"):
+        release = os_release(root)
+        cpu, mhz = _cpu(root)
+        memory = _meminfo(root).get("MemTotal")
+        distro = release.get("PRETTY_NAME") or release.get("NAME")
+        model = _model(root)
+    else:
+        distro = f"{uname.system} {uname.release}"
+        cpu, mhz, memory, model = uname.processor or None, None, None, None
+    info = {
+        "distro": distro,
+        "kernel": uname.release,
+        "system": uname.system,
+        "arch": uname.machine,
+        "hostname": uname.node,
+        "model": model,
+        "cpu": cpu,
+        "cpu_mhz": mhz,
+        "cores": os.cpu_count(),
+        "memory_total": memory,
+        "python": platform.python_version(),
+    }
+    _static[root] = info
+    return info
+
+
+def _battery(root):
+    base = os.path.join(root, "sys/class/power_supply")
+    try:
+        names = sorted(os.listdir(base))
+    except OSError:
+        return None, None
+    for name in names:
+        if not name.startswith("BAT"):
+            continue
+        capacity = _first_line(base, f"{name}/capacity")
+        if capacity and capacity.isdigit():
+            return int(capacity), _first_line(base, f"{name}/status")
+    return None, None
+
+
+def _temperature(root):
+    # the first thermal zone is usually the cpu package (or the soc on arm)
+    milli = _first_line(root, "sys/class/thermal/thermal_zone0/temp")
+    try:
+        return int(milli) / 1000
+    except (TypeError, ValueError):
+        return None
+
+
+def dynamic(root=ROOT):
+    """
+    What changes from one call to the next.
+    """
+    uptime = _first_line(root, "proc/uptime")
+    memory = _meminfo(root)
+    total = memory.get("MemTotal")
+    available = memory.get("MemAvailable", memory.get("MemFree"))
+    load = _first_line(root, "proc/loadavg")
+    battery, charging = _battery(root)
+    return {
+        "uptime": float(uptime.split()[0]) if uptime else None,
+        "memory_used": total - available if total is not None and available is not None else None,
+        "memory_available": available,
+        "load": tuple(float(x) for x in load.split()[:3]) if load else None,
+        "battery": battery,
+        "battery_status": charging,
+        "temperature": _temperature(root),
+        "time": time.time(),
+    }
+
+
+def collect(root=ROOT):
+    info = dict(static(root))
+    info.update(dynamic(root))
+    return info
+
+
+def forget():
+    _static.clear()
+
+
+# ---pretty printing
+
+
+def human_bytes(n):
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if n < 1024 or unit == "TiB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+
+
+def human_uptime(seconds):
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes = seconds // 60
+    parts = [f"{days}d"] if days else []
+    if hours or days:
+        parts.append(f"{hours}h")
+    parts.append(f"{minutes}m")
+    return " ".join(parts)
+
+
+def neofetch(info, user):
+    """
+    The neofetch screen for a collect() dict, one line per fact we have.
+    """
+    lines = ["Distro: YayLinux v2.5" + (f" (on {info['distro']})" if info.get("distro") else "")]
+    lines.append(f"User: {user}")
+    lines.append(f"Host System: {info['system']} {info['kernel']} ({info['arch']})")
+    if info.get("model"):
+        lines.append(f"Model: {info['model']}")
+    if info.get("uptime") is not None:
+        lines.append(f"Uptime: {human_uptime(info['uptime'])}")
+    lines.append("Terminal: YayTerm")
+    if info.get("cpu"):
+        cpu = info["cpu"]
+        if info.get("cores"):
+            cpu += f" ({info['cores']})"
+        if info.get("cpu_mhz"):
+            cpu += f" @ {info['cpu_mhz'] / 1000:.2f}GHz"
+        lines.append(f"Cpu: {cpu}")
+    if info.get("memory_total"):
+        used = info.get("memory_used")
+        total = human_bytes(info["memory_total"])
+        lines.append(f"Ram: {human_bytes(used)} / {total}" if used is not None else f"Ram: {total}")
+    if info.get("load"):
+        lines.append("Load: " + " ".join(f"{x:.2f}" for x in info["load"]))
+    if info.get("temperature") is not None:
+        lines.append(f"Temp: {info['temperature']:.0f}°C")
+    if info.get("battery") is not None:
+        status = f" ({info['battery_status']})" if info.get("battery_status") else ""
+        lines.append(f"Battery: {info['battery']}%{status}")
+    lines.append("(-_-)zzz")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,760 @@
+import os
+import re
+import ast
+import shlex
+import marshal
+import hashlib
+import operator
+
+# yayscript: sh-ish scripts run by the shell itself
+#
+#   name=value / export name=value     $name ${name} $1.. $@ $# $? $((1 + 2))
+#   if CMD / elif CMD / else / end     (fi works too, `; then` is optional)
+#   while CMD ... end                  (done works too, and until CMD ... end)
+#   for x in a b {1..10} ... end
+#   func name ... end                  (also `function name` and `name() {` ... `}`)
+#   break / continue / return [n]
+#   source file.yay [args]
+#
+# a condition is any command, 0 = true, like sh (`[ $i -lt 10 ]` is a builtin).
+# everything that isn't one of the above goes through the shell's normal
+# command dispatch, builtins and externals alike. blocks have to start on a
+# line of their own; a block that is closed on the same line
+# (`for i in 1 2; do echo $i; done`) is plain sh and goes to the shell as is,
+# and so does a whole case ... esac, collected up to its esac. `name=value`
+# with anything after the value (`LANG=C date`) is a command for sh too.
+#
+# in lines for the shell only what yayscript knows gets expanded (its own
+# variables, $1.. $@ $# $? and $((...))), any other $name or ${...} is left
+# for sh, which may have it set. lines for builtins get everything, the
+# environment included, since no sh ever sees those.
+#
+# scripts are compiled to a flat list of instructions (plain tuples, jumps
+# are indexes) and cached on disk with marshal, keyed on the script's path,
+# mtime and size -- the same idea as python's .pyc files. running a big
+# script the second time skips the parser entirely.
+
+CACHE_VERSION = 3
+MAGIC = b"YAYC"
+
+NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*$")
+ASSIGN = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)=(.*)$")
+FUNC = re.compile(r"(?:(?:func|function)\s+([A-Za-z_][\w-]*)\s*(?:\(\s*\))?|([A-Za-z_][\w-]*)\s*\(\s*\))\s*\{?$")
+BRACE_RANGE = re.compile(r"\{(-?\d+)\.\.(-?\d+)\}$")
+
+
+class ScriptError(Exception):
+    def __init__(self, where, lineno, message):
+        super().__init__(f"{where}:{lineno}: {message}")
+        self.lineno = lineno
+
+
+class ScriptExit(Exception):
+    """
+    set -e tripped: unwinds the whole script with the failing command's status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ---compiler
+#
+# instructions (lineno last, always):
+#   ("cmd", text, ln)             run it
+#   ("sh", text, ln)              run it exactly as written, sh does the expanding
+#   ("set", name, value, ln)      variable
+#   ("export", name, value, ln)   variable, and in os.environ for the commands
+#   ("if", cond, target, ln)      run cond, jump to target if it failed
+#   ("until", cond, target, ln)   run cond, jump to target if it worked
+#   ("jmp", target, ln)
+#   ("iter", words, ln)           start a for loop over the expanded words
+#   ("next", var, target, ln)     next item into var, or drop the loop and jump
+#   ("brk", target, ln)           break out of a for loop
+#   ("func", name, target, ln)    define a function whose body follows, jump past it
+#   ("ret", value, ln)            return from the function (or the script)
+#   ("source", text, ln)
+
+
+def _closed_inline(text):
+    """
+    True when a line opens and closes its block by itself (`if x; then y; fi`).
+    """
+    try:
+        lex = shlex.shlex(text, posix=True, punctuation_chars=";&|")
+        lex.whitespace_split = True
+        tokens = list(lex)
+    except ValueError:
+        return False
+    return any(
+        tok in ("fi", "done", "esac") and tokens[i - 1] in (";", "&", "&&", "||", ";;") for i, tok in enumerate(tokens) if i
+    )
+
+
+def _case_depth(text):
+    # how many case blocks this line opens minus how many it closes
+    try:
+        lex = shlex.shlex(text, posix=True, punctuation_chars=";&|()")
+        lex.whitespace_split = True
+        tokens = list(lex)
+    except ValueError:
+        tokens = text.split()
+    return tokens.count("case") - tokens.count("esac")
+
+
+def _assignment(text):
+    """
+    (name, value) when text is just `name=value`, None when it's anything
+    else, `name=value cmd...` included. The value can't have unquoted
+    whitespace outside $(...), $((...)) and ${...}.
+    """
+    m = ASSIGN.match(text)
+    if m is None:
+        return None
+    value = m.group(2)
+    quote = None
+    depth = 0
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if quote == "'":
+            if ch == "'":
+                quote = None
+        elif ch == "\\":
+            i += 1
+        elif quote == '"' and ch == '"':
+            quote = None
+        elif ch in "'\"" and quote is None:
+            quote = ch
+        elif ch == "$" and value[i + 1:i + 2] in ("(", "{"):
+            depth += 1
+            i += 1
+        elif ch in "({" and depth:
+            depth += 1
+        elif ch in ")}" and depth:
+            depth -= 1
+        elif ch.isspace() and quote is None and not depth:
+            return None
+        i += 1
+    return m.group(1), value
+
+
+def _strip_suffix(text, words):
+    for word in words:
+        for sep in ("; ", ";", " "):
+            if text.endswith(sep + word):
+                return text[: -len(sep + word)].rstrip()
+    return text
+
+
+class Compiler:
+    def __init__(self, where="<script>"):
+        self.where = where
+        self.code = []
+        self.blocks = []
+        self.raw = None  # a case ... esac being collected for sh: [first line, lines, depth]
+
+    @property
+    def depth(self):
+        return len(self.blocks) + (self.raw is not None)
+
+    def _err(self, lineno, message):
+        raise ScriptError(self.where, lineno, message)
+
+    def _emit(self, *instr):
+        self.code.append(instr)
+        return len(self.code) - 1
+
+    def _patch(self, index, target):
+        instr = self.code[index]
+        # the target always sits right before the line number
+        self.code[index] = instr[:-2] + (target, instr[-1])
+
+    def _loop(self, lineno, what):
+        for block in reversed(self.blocks):
+            if block["kind"] == "func":
+                break
+            if block["kind"] in ("while", "for"):
+                return block
+        self._err(lineno, f"{what} outside of a loop")
+
+    def line(self, text, lineno):
+        if self.raw is not None:
+            self.raw[1].append(text)
+            self.raw[2] += _case_depth(text)
+            if self.raw[2] <= 0:
+                self._emit("cmd", "\n".join(self.raw[1]), self.raw[0])
+                self.raw = None
+            return
+        text = text.strip()
+        if not text or text.startswith("#"):
+            return
+        word = text.split(None, 1)[0]
+        rest = text[len(word):].strip()
+
+        if text in ("then", "do", "{"):
+            return
+        if word in ("if", "while", "until", "for", "case") and _closed_inline(text):
+            # the whole compound on one line, sh runs that itself
+            self._emit("sh", text, lineno)
+        elif word == "case":
+            # yayscript has no case of its own, sh gets the whole thing
+            self.raw = [lineno, [text], max(1, _case_depth(text))]
+        elif word == "if":
+            cond = _strip_suffix(rest, ("then",))
+            if not cond:
+                self._err(lineno, "if needs a command")
+            self.blocks.append({"kind": "if", "line": lineno, "false": self._emit("if", cond, None, lineno), "ends": []})
+        elif word in ("elif", "else"):
+            block = self.blocks[-1] if self.blocks else None
+            if block is None or block["kind"] != "if" or block["false"] is None:
+                self._err(lineno, f"{word} without an if")
+            block["ends"].append(self._emit("jmp", None, lineno))
+            self._patch(block["false"], len(self.code))
+            block["false"] = None
+            if word == "elif":
+                cond = _strip_suffix(rest, ("then",))
+                block["false"] = self._emit("if", cond, None, lineno)
+        elif word in ("while", "until"):
+            cond = _strip_suffix(rest, ("do",))
+            start = len(self.code)
+            test = "if" if word == "while" else "until"
+            self.blocks.append(
+                {"kind": "while", "line": lineno, "start": start, "exit": self._emit(test, cond, None, lineno), "breaks": []}
+            )
+        elif word == "for":
+            parts = _strip_suffix(rest, ("do",)).split(None, 2)
+            if len(parts) < 2 or parts[1] != "in" or not NAME.match(parts[0]):
+                self._err(lineno, "for wants: for name in words")
+            self._emit("iter", parts[2] if len(parts) > 2 else "", lineno)
+            start = len(self.code)
+            self.blocks.append(
+                {"kind": "for", "line": lineno, "start": start, "exit": self._emit("next", parts[0], None, lineno), "breaks": []}
+            )
+        elif word in ("end", "fi", "done", "}") and not rest:
+            if not self.blocks:
+                self._err(lineno, f"{word} without a block to end")
+            block = self.blocks.pop()
+            kind = block["kind"]
+            if kind == "if":
+                if block["false"] is not None:
+                    self._patch(block["false"], len(self.code))
+                for index in block["ends"]:
+                    self._patch(index, len(self.code))
+            elif kind in ("while", "for"):
+                self._emit("jmp", block["start"], lineno)
+                self._patch(block["exit"], len(self.code))
+                for index in block["breaks"]:
+                    self._patch(index, len(self.code))
+            else:
+                self._emit("ret", "", lineno)
+                self._patch(block["def"], len(self.code))
+        elif word == "break":
+            block = self._loop(lineno, "break")
+            block["breaks"].append(self._emit("brk" if block["kind"] == "for" else "jmp", None, lineno))
+        elif word == "continue":
+            self._emit("jmp", self._loop(lineno, "continue")["start"], lineno)
+        elif word == "return":
+            self._emit("ret", rest, lineno)
+        elif word in ("source", ".") and rest:
+            self._emit("source", rest, lineno)
+        elif FUNC.match(text):
+            m = FUNC.match(text)
+            self.blocks.append({"kind": "func", "line": lineno, "def": self._emit("func", m.group(1) or m.group(2), None, lineno)})
+        elif word == "export" and _assignment(rest):
+            name, value = _assignment(rest)
+            self._emit("export", name, value, lineno)
+        elif _assignment(text):
+            name, value = _assignment(text)
+            self._emit("set", name, value, lineno)
+        else:
+            self._emit("cmd", text, lineno)
+
+    def finish(self):
+        if self.raw is not None:
+            self._err(self.raw[0], "case is never closed (missing esac)")
+        if self.blocks:
+            block = self.blocks[-1]
+            self._err(block["line"], f"{block['kind']} is never closed (missing end)")
+        return tuple(self.code)
+
+
+def compile_text(text, where="<script>"):
+    c = Compiler(where)
+    for lineno, line in enumerate(text.splitlines(), 1):
+        c.line(line, lineno)
+    return c.finish()
+
+
+# ---on disk cache
+
+
+def cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "yaylinux", "scripts")
+
+
+def _cache_path(path):
+    return os.path.join(cache_dir(), hashlib.sha1(path.encode("utf-8", "surrogateescape")).hexdigest() + ".yayc")
+
+
+_compiled = {}
+
+
+def load(path):
+    """
+    The compiled instructions for the script at path, from memory or the
+    disk cache when the file hasn't changed since, parsed otherwise.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    hit = _compiled.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+
+    cached = _cache_path(path)
+    code = None
+    try:
+        with open(cached, "rb") as f:
+            data = f.read()
+            if data[:4] == MAGIC:
+                # loads() on the whole thing, load(f) reads the file in tiny pieces
+                version, mtime, size, where, code = marshal.loads(data[4:])
+                if (version, mtime, size, where) != (CACHE_VERSION, key[0], key[1], path):
+                    code = None
+    except (OSError, EOFError, ValueError, TypeError):
+        code = None
+
+    if code is None:
+        with open(path, "r") as f:
+            code = compile_text(f.read(), os.path.basename(path))
+        try:
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            tmp = f"{cached}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(MAGIC + marshal.dumps((CACHE_VERSION, key[0], key[1], path, code)))
+            os.replace(tmp, cached)
+        except OSError:
+            # no cache is only slower
+            pass
+    _compiled[path] = (key, code)
+    return code
+
+
+# ---expansion
+
+def _div(a, b):
+    # C division like sh: truncated towards zero, -7/2 is -3
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+
+def _mod(a, b):
+    return a - b * _div(a, b)
+
+
+def _pow(a, b):
+    if b < 0:
+        raise ValueError("exponent less than 0")
+    # modulo 2**64 is all the 64 bit result keeps anyway, and pow() gets
+    # there without building 9**9**9 first
+    return pow(a, b, 1 << 64)
+
+
+def _wrap(n):
+    # sh arithmetic is signed 64 bit
+    n &= (1 << 64) - 1
+    return n - (1 << 64) if n >> 63 else n
+
+
+_ARITH_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _div,
+    ast.FloorDiv: _div,
+    ast.Mod: _mod,
+    ast.Pow: _pow,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+
+def arith(expr, lookup):
+    """
+    $((...)): 64 bit integers, + - * / % **, comparisons (1/0), names are variables.
+    """
+    expr = expr.replace("&&", " and ").replace("||", " or ")
+
+    def ev(node):
+        if isinstance(node, ast.Expression):
+            return ev(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            return node.value
+        if isinstance(node, ast.Name):
+            value = lookup(node.id)
+            try:
+                return int(value or 0)
+            except ValueError:
+                raise ValueError(f"{node.id} is not a number ({value})") from None
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Not)):
+            value = ev(node.operand)
+            return -value if isinstance(node.op, ast.USub) else int(not value) if isinstance(node.op, ast.Not) else value
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITH_OPS:
+            return _wrap(_ARITH_OPS[type(node.op)](ev(node.left), ev(node.right)))
+        if isinstance(node, ast.BoolOp):
+            values = [ev(v) for v in node.values]
+            return int(all(values) if isinstance(node.op, ast.And) else any(values))
+        if isinstance(node, ast.Compare):
+            left = ev(node.left)
+            for op, right in zip(node.ops, node.comparators):
+                right = ev(right)
+                if type(op) not in _ARITH_OPS or not _ARITH_OPS[type(op)](left, right):
+                    return 0
+                left = right
+            return 1
+        raise ValueError(f"can't do arithmetic with: {expr.strip()}")
+
+    try:
+        return ev(ast.parse(expr.strip().replace("!", " not ").replace(" not =", "!="), mode="eval"))
+    except SyntaxError:
+        raise ValueError(f"bad arithmetic: {expr.strip()}") from None
+    except ZeroDivisionError:
+        raise ValueError("division by zero") from None
+
+
+def expand(text, lookup):
+    """
+    Replaces $name, ${name}, $1, $@, $#, $? and $((...)) in text. Nothing
+    inside single quotes is touched, and $(...) is left for sh. When lookup
+    gives None for a name the reference stays as it was.
+    """
+    if "$" not in text:
+        return text
+    out = []
+    i = 0
+    n = len(text)
+    quote = None
+    while i < n:
+        ch = text[i]
+        if ch == "'" and quote != '"':
+            quote = None if quote == "'" else "'"
+        elif ch == '"' and quote != "'":
+            quote = None if quote == '"' else '"'
+        elif ch == "\\" and quote != "'" and i + 1 < n:
+            out.append(text[i:i + 2])
+            i += 2
+            continue
+        elif ch == "$" and quote != "'" and i + 1 < n:
+            nxt = text[i + 1]
+            if text.startswith("$((", i):
+                depth = 0
+                j = i + 1
+                while j < n:
+                    if text[j] == "(":
+                        depth += 1
+                    elif text[j] == ")":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    j += 1
+                inner = text[i + 3:j - 1]
+                out.append(str(arith(expand(inner, lookup), lookup)))
+                i = j + 1
+                continue
+            if nxt == "{":
+                end = text.find("}", i)
+                if end != -1:
+                    value = lookup(text[i + 2:end])
+                    out.append(text[i:end + 1] if value is None else value)
+                    i = end + 1
+                    continue
+            elif nxt in "?#@" or nxt.isdigit():
+                value = lookup(nxt)
+                out.append(text[i:i + 2] if value is None else value)
+                i += 2
+                continue
+            else:
+                m = re.match(r"[A-Za-z_][A-Za-z0-9_]*", text[i + 1:])
+                if m:
+                    value = lookup(m.group())
+                    out.append(text[i:i + 1 + m.end()] if value is None else value)
+                    i += 1 + m.end()
+                    continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def words(text):
+    """
+    shlex words with {a..b} ranges expanded (for loops, assignments).
+    """
+    try:
+        parts = shlex.split(text)
+    except ValueError:
+        parts = text.split()
+    out = []
+    for part in parts:
+        m = BRACE_RANGE.match(part)
+        if m:
+            a, b = int(m.group(1)), int(m.group(2))
+            step = 1 if b >= a else -1
+            out.extend(str(x) for x in range(a, b + step, step))
+        else:
+            out.append(part)
+    return out
+
+
+# ---the interpreter
+
+
+class Interpreter:
+    """
+    execute(line) -> exit code runs one ordinary command (the shell's
+    execute_command). errexit() says whether set -e is on right now.
+    is_builtin(name) tells lines for builtins (fully expanded here) from
+    lines for sh (left to expand the rest itself). on_export(name, value)
+    runs after every export, for a shell that already has its environment.
+    """
+
+    def __init__(self, execute, errexit=lambda: False, is_builtin=lambda name: False, on_export=None):
+        self.execute = execute
+        self.errexit = errexit
+        self.is_builtin = is_builtin
+        self.on_export = on_export
+        self.vars = {}
+        self.functions = {}  # name -> (code, start)
+        self.status = 0
+        self.args = []
+        self.name = "yay"
+        self.conditions = 0  # set -e doesn't apply while we're inside one
+        self.depth = 0
+        self.top = None  # compiler for the lines fed in one at a time
+        self.lineno = 0
+
+    def lookup(self, name):
+        if name == "?":
+            return str(self.status)
+        if name == "#":
+            return str(len(self.args))
+        if name == "@":
+            return " ".join(shlex.quote(a) if " " in a else a for a in self.args)
+        if name.isdigit():
+            index = int(name)
+            if index == 0:
+                return self.name
+            return self.args[index - 1] if index <= len(self.args) else ""
+        if name in self.vars:
+            return self.vars[name]
+        return os.environ.get(name, "")
+
+    def own(self, name):
+        """
+        lookup() for what yayscript itself knows, None for the rest.
+        """
+        if name in self.vars or name in "?#@" or name.isdigit():
+            return self.lookup(name)
+        return None
+
+    def _expand(self, text):
+        return expand(text, self.lookup)
+
+    def _value(self, text):
+        return " ".join(words(self._expand(text)))
+
+    def _command(self, text):
+        first = text.split(None, 1)[0] if text.strip() else ""
+        if first in self.functions or self.is_builtin(first):
+            line = self._expand(text)
+            first = line.split(None, 1)[0] if line.strip() else ""
+            if first in self.functions:
+                return self.call(first, words(line)[1:])
+            return self.execute(line)
+        return self.execute(expand(text, self.own))
+
+    def call(self, name, args):
+        code, start = self.functions[name]
+        saved = self.args
+        self.args = list(args)
+        try:
+            return self._run(code, start)
+        finally:
+            self.args = saved
+
+    def _run(self, code, pc=0, end=None):
+        self.depth += 1
+        if self.depth > 200:
+            self.depth -= 1
+            raise RecursionError("functions nested more than 200 deep")
+        loops = []
+        end = len(code) if end is None else end
+        try:
+            while pc < end:
+                instr = code[pc]
+                op = instr[0]
+                pc += 1
+                if op == "cmd" or op == "sh":
+                    self.status = self._command(instr[1]) if op == "cmd" else self.execute(instr[1])
+                    if self.status and self.conditions == 0 and self.errexit():
+                        raise ScriptExit(self.status, f"{self.name}:{instr[-1]}: `{instr[1]}` failed with {self.status}")
+                elif op == "if" or op == "until":
+                    self.conditions += 1
+                    try:
+                        self.status = self._command(instr[1])
+                    finally:
+                        self.conditions -= 1
+                    if (self.status != 0) == (op == "if"):
+                        pc = instr[2]
+                elif op == "jmp":
+                    pc = instr[1]
+                elif op == "set" or op == "export":
+                    value = self._value(instr[2])
+                    self.vars[instr[1]] = value
+                    if op == "export":
+                        os.environ[instr[1]] = value
+                        if self.on_export is not None:
+                            self.on_export(instr[1], value)
+                    self.status = 0
+                elif op == "iter":
+                    loops.append([words(self._expand(instr[1])), 0])
+                elif op == "next":
+                    items, index = loops[-1]
+                    if index >= len(items):
+                        loops.pop()
+                        pc = instr[2]
+                    else:
+                        self.vars[instr[1]] = items[index]
+                        loops[-1][1] = index + 1
+                elif op == "brk":
+                    loops.pop()
+                    pc = instr[1]
+                elif op == "func":
+                    self.functions[instr[1]] = (code, pc)
+                    pc = instr[2]
+                elif op == "ret":
+                    if instr[1]:
+                        try:
+                            self.status = int(self._expand(instr[1]))
+                        except ValueError:
+                            self.status = 2
+                    return self.status
+                elif op == "source":
+                    parts = words(self._expand(instr[1]))
+                    self.status = self.source(parts[0], parts[1:])
+            return self.status
+        finally:
+            self.depth -= 1
+
+    def source(self, path, args=()):
+        """
+        Runs a script file in this interpreter: its variables and functions stay around.
+        """
+        code = load(path)
+        saved = self.args, self.name
+        self.args, self.name = list(args), path
+        try:
+            return self._run(code)
+        finally:
+            self.args, self.name = saved
+
+    def run_file(self, path, args=()):
+        return self.source(path, args)
+
+    def feed(self, line):
+        """
+        One line of a script that arrives a line at a time (stdin, -c, the
+        prompt). A statement runs as soon as it is complete; returns True
+        while a block is still open and more lines are needed.
+        """
+        if self.top is None:
+            self.top = Compiler(self.name)
+        self.lineno += 1
+        try:
+            self.top.line(line, self.lineno)
+        except ScriptError:
+            self.top = None
+            raise
+        if self.top.depth:
+            return True
+        code, self.top = self.top.code, None
+        if code:
+            self._run(code)
+        return False
+
+    def pending(self):
+        """
+        The block that's still open after the last feed(), for the error at EOF.
+        """
+        if self.top is not None and self.top.depth:
+            try:
+                self.top.finish()
+            except ScriptError as e:
+                self.top = None
+                return e
+        return None
+
+    def run_lines(self, lines, where="<stdin>"):
+        self.name = where
+        self.lineno = 0
+        for line in lines:
+            self.feed(line)
+        error = self.pending()
+        if error is not None:
+            raise error
+        return self.status
+
+
+# ---test / [ builtin
+
+_UNARY = {
+    "-z": lambda s: s == "",
+    "-n": lambda s: s != "",
+    "-e": os.path.exists,
+    "-f": os.path.isfile,
+    "-d": os.path.isdir,
+    "-L": os.path.islink,
+    "-h": os.path.islink,
+    "-s": lambda p: os.path.isfile(p) and os.path.getsize(p) > 0,
+    "-r": lambda p: os.access(p, os.R_OK),
+    "-w": lambda p: os.access(p, os.W_OK),
+    "-x": lambda p: os.access(p, os.X_OK),
+}
+_STRING = {"=": operator.eq, "==": operator.eq, "!=": operator.ne}
+_NUMBER = {"-eq": operator.eq, "-ne": operator.ne, "-lt": operator.lt, "-le": operator.le, "-gt": operator.gt, "-ge": operator.ge}
+
+
+def test(argv):
+    """
+    The common part of test(1): 0 true, 1 false, 2 for a broken expression.
+    """
+    if argv and argv[-1] == "]":
+        argv = argv[:-1]
+    negate = False
+    while argv and argv[0] == "!":
+        negate = not negate
+        argv = argv[1:]
+    try:
+        if not argv:
+            result = False
+        elif len(argv) == 1:
+            result = argv[0] != ""
+        elif len(argv) == 2 and argv[0] in _UNARY:
+            result = _UNARY[argv[0]](argv[1])
+        elif len(argv) == 3 and argv[1] in _STRING:
+            result = _STRING[argv[1]](argv[0], argv[2])
+        elif len(argv) == 3 and argv[1] in _NUMBER:
+            result = _NUMBER[argv[1]](int(argv[0]), int(argv[2]))
+        else:
+            print(f"test: don't know how to test: {' '.join(argv)}")
+            return 2
+    except ValueError:
+        print(f"test: integer expected: {' '.join(argv)}")
+        return 2
+    return 0 if result != negate else 1